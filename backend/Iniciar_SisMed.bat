@@ -46,7 +46,7 @@ if errorlevel 1 (
     exit /b 1
 )
 
-echo 🧹 Executando limpeza automática de receitas...
+echo 🧹 Removendo receitas anteriores ao prazo de retencao...
 python limpar_receitas.py
 if errorlevel 1 (
     echo ⚠️  Aviso: Erro na limpeza, continuando...
@@ -63,7 +63,7 @@ if errorlevel 1 (
 echo.
 echo ✅ Sistema configurado com sucesso!
 echo.
-echo 🚀 Iniciando servidor Flask...
+echo 🚀 Iniciando servidor (waitress, modo producao)...
 echo    Acesse: http://localhost:5001
 echo.
 echo ⚠️  Para parar o servidor, pressione Ctrl+C
@@ -72,7 +72,7 @@ echo.
 timeout /t 3 >nul
 start http://localhost:5001
 
-python app.py
+python server.py
 
 echo.
 echo 👋 SisMed Perobal encerrado.
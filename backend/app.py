@@ -12,15 +12,25 @@ from datetime import datetime
 
 from config import Config
 from database import db
+from migrations import run_migrations, start_background_migrations
+from storage import init_storage
+from utils.compression import compress_response
+from utils.json_provider import FastJSONProvider
+from utils.metrics import init_metrics
+from utils.sql_profiler import init_sql_profiler
 from routes.api_patients import patients_bp
 from routes.api_medicines import medicines_bp
 from routes.api_prescriptions import prescriptions_bp
 from routes.api_prescriptions_multiple import multiple_prescriptions_bp
 from routes.api_pdf import pdf_bp
+from routes.api_storage import storage_bp
+from routes.api_export import export_bp
+from routes.api_metrics import metrics_bp
 
 def create_app():
     app = Flask(__name__, static_folder='static', static_url_path='')
     app.config.from_object(Config)
+    app.json = FastJSONProvider(app)
     
     # CORS para desenvolvimento
     CORS(app, origins=['http://localhost:3000', 'http://localhost:5001'])
@@ -28,12 +38,22 @@ def create_app():
     # Inicializar banco de dados
     db.init_app(app)
     
+    # Métricas de latência e SQL por endpoint
+    init_metrics(app)
+    init_sql_profiler(app)
+    
     # Registrar blueprints
-    app.register_blueprint(patients_bp, url_prefix='/api')
-    app.register_blueprint(medicines_bp, url_prefix='/api')
-    app.register_blueprint(prescriptions_bp, url_prefix='/api')
+    app.register_blueprint(patients_bp, url_prefix='/api/patients')
+    app.register_blueprint(medicines_bp, url_prefix='/api/medicines')
+    app.register_blueprint(prescriptions_bp, url_prefix='/api/prescriptions')
     app.register_blueprint(multiple_prescriptions_bp, url_prefix='/api')
-    app.register_blueprint(pdf_bp, url_prefix='/api')
+    app.register_blueprint(pdf_bp, url_prefix='/api/pdf')
+    app.register_blueprint(storage_bp, url_prefix='/api')
+    app.register_blueprint(export_bp, url_prefix='/api')
+    app.register_blueprint(metrics_bp, url_prefix='/api')
+    
+    # Compressão gzip/deflate das respostas grandes
+    app.after_request(compress_response)
     
     # Servir o frontend React
     @app.route('/')
@@ -50,13 +70,18 @@ def create_app():
     
     # Criar tabelas se não existirem
     with app.app_context():
+        init_storage(app)
         db.create_all()
+        run_migrations(app)
         print("✅ Banco de dados SQLite inicializado")
     
     return app
 
 if __name__ == '__main__':
+    # Servidor de desenvolvimento (debugger e reloader); em produção use server.py
     app = create_app()
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':  # Só no processo filho do reloader
+        start_background_migrations(app)
     print("🚀 SisMed Perobal v9.0 iniciado!")
     print("📱 Acesse: http://localhost:5001")
     app.run(host='0.0.0.0', port=5001, debug=True)
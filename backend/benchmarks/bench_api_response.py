@@ -0,0 +1,78 @@
+"""
+Benchmark do envelope da API: tempo de codificação JSON e bytes enviados
+Compara o jsonify padrão do Flask (json da biblioteca padrão) com o FastJSONProvider
+e a resposta sem compressão com gzip/deflate
+Uso (na pasta backend): python benchmarks/bench_api_response.py [--linhas 500]
+"""
+
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify
+from flask.json.provider import DefaultJSONProvider
+
+from utils.compression import compress_response
+from utils.json_provider import FastJSONProvider, orjson
+
+def sample_prescriptions(count):
+    """Receitas no formato do to_dict, com acentos e 3 medicamentos cada"""
+    return [
+        {
+            'id': str(uuid.uuid4()),
+            'pacienteId': str(uuid.uuid4()),
+            'data': '2024-03-15',
+            'dataVencimento': None,
+            'medicamentos': [
+                {'medicamentoId': str(uuid.uuid4()), 'posologia': 'TOMAR 1 COMPRIMIDO À NOITE'}
+                for _ in range(3)
+            ],
+            'observacoes': 'USO CONTÍNUO - RETORNO EM 30 DIAS' if i % 3 == 0 else '',
+            'created_at': datetime(2024, 3, 15, 10, i % 60).isoformat(),
+        }
+        for i in range(count)
+    ]
+
+def timeit(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main(rows=500, repeat=20):
+    payload = {'data': sample_prescriptions(rows), 'error': None}
+    app = Flask(__name__)
+    results = []
+
+    for label, provider in (('stdlib', DefaultJSONProvider(app)), ('fast', FastJSONProvider(app))):
+        app.json = provider
+        with app.test_request_context('/'):
+            seconds = timeit(lambda: jsonify(payload), repeat)
+            body = jsonify(payload).get_data()
+        results.append((f'encode {label}', seconds, len(body)))
+
+    for encoding in ('gzip', 'deflate'):
+        with app.test_request_context('/', headers={'Accept-Encoding': encoding}):
+            def encode_and_compress():
+                return compress_response(jsonify(payload))
+            seconds = timeit(encode_and_compress, repeat)
+            body = encode_and_compress().get_data()
+        results.append((f'fast + {encoding}', seconds, len(body)))
+
+    print(f"Envelope com {rows} receitas (orjson {'ativo' if orjson else 'ausente'})")
+    print(f"{'etapa':<20}{'ms':>10}{'bytes':>12}")
+    for label, seconds, size in results:
+        print(f"{label:<20}{seconds * 1000:>10.2f}{size:>12}")
+    return results
+
+if __name__ == "__main__":
+    linhas = 500
+    if '--linhas' in sys.argv:
+        linhas = int(sys.argv[sys.argv.index('--linhas') + 1])
+    main(linhas)
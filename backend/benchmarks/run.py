@@ -0,0 +1,264 @@
+"""
+Suíte de microbenchmarks dos caminhos críticos do SisMed
+Cria (ou reaproveita) um banco sintético, mede cada caso e grava o resultado em JSON;
+o modo compare aponta regressões entre duas execuções
+
+Uso (na pasta backend):
+  python benchmarks/run.py [--pacientes 50000] [--receitas 500000] [--saida arquivo.json]
+  python benchmarks/run.py compare base.json novo.json [--limite 0.15] [--minimo 0.1]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+BENCH_DIR = os.path.join(BACKEND_DIR, 'benchmarks')
+DEFAULT_DB = os.path.join(BENCH_DIR, 'bench_sismed.db')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+def create_bench_app(db_path):
+    """App apontando para o banco de benchmark, sem manutenção em segundo plano"""
+    from config import Config
+    Config.SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+    Config.SQLITE_MAINTENANCE_ENABLED = False
+
+    from app import create_app
+    return create_app()
+
+def measure(func, repeat, warmup=2):
+    """Executa func e retorna estatísticas em milissegundos"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'runs': repeat,
+        'min_ms': round(samples[0], 4),
+        'median_ms': round(statistics.median(samples), 4),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+        'mean_ms': round(statistics.fmean(samples), 4),
+    }
+
+def call_view(app, endpoint, path='/', method='GET', view_args=None, **request_kwargs):
+    """
+    Chama a view pelo nome do endpoint (como o Flask faria após o roteamento)
+    e devolve a resposta já serializada
+    """
+    def run():
+        with app.test_request_context(path, method=method, **request_kwargs):
+            response = app.make_response(app.view_functions[endpoint](**(view_args or {})))
+            if response.status_code >= 400:
+                raise RuntimeError(f'{endpoint}: {response.status_code} {response.get_data()[:200]}')
+            return response
+    return run
+
+def build_cases(app):
+    """Casos do benchmark: nome -> (função, repetições)"""
+    from database import db
+    from models import Patient, Prescription
+    from utils.medicine_catalog import medicine_catalog
+    from utils.pdf_generator import generate_prescription_pdf
+
+    with app.app_context():
+        patient_count = db.session.query(db.func.max(Patient.id)).scalar()
+        sample_patient = db.session.get(Patient, patient_count // 2)
+        patient_public_id = sample_patient.public_id
+        cpf_prefix = db.session.execute(
+            db.select(Patient.cpf).where(Patient.cpf.isnot(None)).limit(1)
+        ).scalar()[:7]
+        medicamentos = [
+            {'medicamentoId': entry.public_id, 'posologia': 'TOMAR 1 COMPRIMIDO À NOITE'}
+            for entry in medicine_catalog.entries()[:3]
+        ]
+        latest_prescription_id = db.session.query(db.func.max(Prescription.id)).scalar()
+
+    def with_context(func):
+        # Um app_context por execução, como numa requisição real
+        def run():
+            with app.app_context():
+                return func()
+        return run
+
+    with app.app_context():
+        # Instâncias carregadas uma vez (já com relacionamentos): mede só a serialização
+        patients = Patient.query.order_by(Patient.id).limit(1000).all()
+        prescriptions = Prescription.query_with_details().order_by(
+            Prescription.id.desc()
+        ).limit(500).all()
+        for prescription in prescriptions:
+            prescription.items  # Itens carregados antes de a sessão ser fechada
+
+    def pdf():
+        prescription = Prescription.query_with_details().filter_by(id=latest_prescription_id).one()
+        return generate_prescription_pdf(prescription)
+
+    multiple_body = {
+        'pacienteId': patient_public_id,
+        'medicamentos': medicamentos,
+        'datas': [{'date': f'2030-0{month}-10', 'enabled': True} for month in (1, 2, 3)],
+    }
+
+    return {
+        'patient_to_dict_1000': (with_context(
+            lambda: [patient.to_dict() for patient in patients]), 30),
+        'prescription_to_dict_500': (with_context(
+            lambda: [prescription.to_dict() for prescription in prescriptions]), 30),
+        'get_medicamentos_500': (with_context(
+            lambda: [prescription.get_medicamentos() for prescription in prescriptions]), 30),
+        'search_patients_nome': (call_view(
+            app, 'patients.search_patients', query_string={'q': 'MARIA SIL', 'limit': 50}), 50),
+        'search_patients_cpf': (call_view(
+            app, 'patients.search_patients', query_string={'q': cpf_prefix, 'limit': 50}), 50),
+        'search_medicines': (call_view(
+            app, 'medicines.search_medicines', query_string={'q': 'clon'}), 200),
+        'get_prescriptions_page': (call_view(
+            app, 'prescriptions.get_prescriptions', query_string={'limit': 100}), 30),
+        'get_prescriptions_patient': (call_view(
+            app, 'prescriptions.get_prescriptions',
+            query_string={'patient_id': patient_public_id, 'limit': 100}), 50),
+        'create_multiple_prescriptions_3': (call_view(
+            app, 'multiple_prescriptions.create_multiple_prescriptions',
+            method='POST', json=multiple_body), 20),
+        'generate_prescription_pdf': (with_context(pdf), 20),
+    }
+
+def run_suite(args):
+    from database import db
+    from utils.medicine_catalog import medicine_catalog
+
+    db_path = os.path.abspath(args.banco)
+    reuse = os.path.exists(db_path) and not args.recriar
+    if not reuse:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+    app = create_bench_app(db_path)
+    with app.app_context():
+        if reuse:
+            print(f"♻️  Reaproveitando {db_path} (use --recriar para gerar de novo)")
+        else:
+            from benchmarks.synthetic_data import generate_dataset
+            print(f"🏗️  Gerando {args.pacientes} pacientes e {args.receitas} receitas...")
+            _, seconds = generate_dataset(args.pacientes, args.receitas)
+            medicine_catalog.invalidate()
+            print(f"✅ Dados gerados em {seconds:.1f}s")
+
+        dataset = {
+            table: db.session.execute(db.text(f"SELECT COUNT(*) FROM {table}")).scalar()
+            for table in ('patients', 'medicines', 'prescriptions', 'prescription_items')
+        }
+
+    results = {}
+    for name, (func, repeat) in build_cases(app).items():
+        if args.casos and name not in args.casos:
+            continue
+        results[name] = measure(func, max(1, int(repeat * args.escala)))
+        print(f"   {name:<34}{results[name]['median_ms']:>10.3f} ms (mediana)")
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'dataset': dataset,
+        },
+        'results': results,
+    }
+
+    output = args.saida or os.path.join(
+        RESULTS_DIR, f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"📄 Resultado gravado em {output}")
+    return report
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(base_path, new_path, threshold, floor_ms=0.1):
+    """
+    Compara medianas caso a caso; retorna a lista de regressões
+    Diferenças menores que floor_ms são ruído de medição e não contam
+    """
+    with open(base_path, encoding='utf-8') as f:
+        base = json.load(f)
+    with open(new_path, encoding='utf-8') as f:
+        new = json.load(f)
+
+    # create_multiple_prescriptions grava receitas: tolera a diferença de poucas linhas
+    base_dataset, new_dataset = base['meta'].get('dataset', {}), new['meta'].get('dataset', {})
+    if any(abs(new_dataset.get(table, 0) - rows) > rows * 0.01 for table, rows in base_dataset.items()):
+        print("⚠️  Bancos de tamanhos diferentes: a comparação pode não ser justa")
+
+    regressions = []
+    print(f"{'caso':<34}{'base ms':>10}{'novo ms':>10}{'variação':>10}")
+    for name in sorted(set(base['results']) | set(new['results'])):
+        if name not in base['results'] or name not in new['results']:
+            print(f"{name:<34}{'(só em um dos arquivos)':>30}")
+            continue
+        old_ms = base['results'][name]['median_ms']
+        new_ms = new['results'][name]['median_ms']
+        change = (new_ms - old_ms) / old_ms if old_ms else 0.0
+        flag = ''
+        if abs(new_ms - old_ms) < floor_ms:
+            pass
+        elif change > threshold:
+            flag = '  ❌ REGRESSÃO'
+            regressions.append(name)
+        elif change < -threshold:
+            flag = '  ✅ melhora'
+        print(f"{name:<34}{old_ms:>10.3f}{new_ms:>10.3f}{change:>+10.1%}{flag}")
+
+    return regressions
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+
+    if argv and argv[0] == 'compare':
+        parser = argparse.ArgumentParser(prog='run.py compare')
+        parser.add_argument('base')
+        parser.add_argument('novo')
+        parser.add_argument('--limite', type=float, default=0.15,
+                            help='variação da mediana considerada regressão (0.15 = 15%%)')
+        parser.add_argument('--minimo', type=float, default=0.1,
+                            help='diferença absoluta mínima em ms para contar')
+        args = parser.parse_args(argv[1:])
+        regressions = compare(args.base, args.novo, args.limite, args.minimo)
+        return 1 if regressions else 0
+
+    parser = argparse.ArgumentParser(prog='run.py')
+    parser.add_argument('--banco', default=DEFAULT_DB, help='banco SQLite de benchmark')
+    parser.add_argument('--pacientes', type=int, default=50000)
+    parser.add_argument('--receitas', type=int, default=500000)
+    parser.add_argument('--recriar', action='store_true', help='gera o banco de novo')
+    parser.add_argument('--casos', nargs='*', help='executa só os casos informados')
+    parser.add_argument('--escala', type=float, default=1.0, help='multiplica as repetições')
+    parser.add_argument('--saida', help='arquivo JSON de resultado')
+    run_suite(parser.parse_args(argv))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Gerador de dados sintéticos em escala real para os benchmarks
+Insere pacientes, receitas e itens com executemany em lotes (centenas de milhares
+de linhas por segundo), com nomes acentuados, CPFs válidos e datas distribuídas
+Deve ser chamado dentro do app_context de um banco descartável
+"""
+
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+from database import db
+from seed import MEDICAMENTOS_OFICIAIS_PEROBAL
+
+FIRST_NAMES = [
+    'MARIA', 'JOSÉ', 'ANA', 'JOÃO', 'ANTÔNIO', 'FRANCISCA', 'CARLOS', 'PAULO', 'LÚCIA',
+    'PEDRO', 'LUCAS', 'LUIZ', 'MÁRCIA', 'ADRIANA', 'RAFAEL', 'JULIANA', 'FERNANDA', 'SEBASTIÃO',
+    'CONCEIÇÃO', 'RAIMUNDO', 'SÔNIA', 'VITÓRIA', 'GABRIEL', 'LETÍCIA', 'MATEUS', 'BEATRIZ',
+]
+LAST_NAMES = [
+    'SILVA', 'SANTOS', 'OLIVEIRA', 'SOUZA', 'RODRIGUES', 'FERREIRA', 'ALVES', 'PEREIRA',
+    'LIMA', 'GOMES', 'COSTA', 'RIBEIRO', 'MARTINS', 'CARVALHO', 'ARAÚJO', 'MELO', 'BARBOSA',
+    'ROCHA', 'DIAS', 'NASCIMENTO', 'ANDRADE', 'MOREIRA', 'NUNES', 'MARQUES', 'MACHADO', 'GONÇALVES',
+]
+POSOLOGIAS = [
+    'TOMAR 1 COMPRIMIDO À NOITE', 'TOMAR 1 COMPRIMIDO PELA MANHÃ', '1 COMPRIMIDO DE 12 EM 12 HORAS',
+    '10 GOTAS AO DEITAR', 'MEIO COMPRIMIDO 2X AO DIA', '',
+]
+OBSERVACOES = ['USO CONTÍNUO', 'RETORNO EM 30 DIAS', 'USO CONTÍNUO - RETORNO EM 60 DIAS']
+
+def random_cpf(rng):
+    """CPF com dígitos verificadores válidos, formatado como no cadastro"""
+    digits = [rng.randrange(10) for _ in range(9)]
+    for length in (9, 10):
+        total = sum(d * (length + 1 - i) for i, d in enumerate(digits))
+        digits.append((total * 10 % 11) % 10)
+    cpf = ''.join(map(str, digits))
+    return f'{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}'
+
+def _public_id(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+def _insert(conn, sql, rows):
+    conn.exec_driver_sql(sql, rows)
+
+def _insert_medicines(conn, rng):
+    now = datetime.now()
+    rows = [
+        (_public_id(rng), med['denominacao'], med['concentracao'], med['apresentacao'], now)
+        for med in MEDICAMENTOS_OFICIAIS_PEROBAL
+    ]
+    _insert(conn, "INSERT INTO medicines (public_id, denominacao_generica, concentracao, "
+                  "apresentacao, created_at) VALUES (?, ?, ?, ?, ?)", rows)
+    return [row[0] for row in conn.exec_driver_sql("SELECT id FROM medicines").fetchall()]
+
+def _patient_rows(rng, start_id, count, created_start, used_cpfs):
+    for offset in range(count):
+        nome = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}'
+        cpf = None
+        if rng.random() < 0.7:
+            cpf = random_cpf(rng)
+            while cpf in used_cpfs:  # Índice único em cpf_digits
+                cpf = random_cpf(rng)
+            used_cpfs.add(cpf)
+        digits = cpf.replace('.', '').replace('-', '') if cpf else None
+        nascimento = date(1930, 1, 1) + timedelta(days=rng.randrange(33000))
+        created = created_start + timedelta(seconds=(start_id + offset) * 30)
+        yield (start_id + offset, _public_id(rng), nome, cpf, digits, nascimento.isoformat(), str(created))
+
+def _prescription_rows(rng, start_id, count, patients, medicine_ids, first_day):
+    prescriptions, items = [], []
+    for prescription_id in range(start_id, start_id + count):
+        created = first_day + timedelta(seconds=prescription_id * 30)
+        observacoes = rng.choice(OBSERVACOES) if rng.random() < 0.3 else None
+        prescriptions.append((
+            prescription_id, _public_id(rng), rng.randint(1, patients),
+            created.date().isoformat(), None, '', observacoes, str(created)
+        ))
+        for position, medicine_id in enumerate(rng.sample(medicine_ids, rng.randint(1, 4))):
+            items.append((prescription_id, medicine_id, rng.choice(POSOLOGIAS), position))
+    return prescriptions, items
+
+def generate_dataset(patients, prescriptions, seed=42, chunk_size=50000, log=print):
+    """
+    Popula um banco vazio com patients pacientes e prescriptions receitas (1 a 4 itens cada)
+    Retorna {'tabela': linhas} e o tempo total
+    """
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    created_start = datetime(2015, 1, 1)
+
+    with db.engine.connect() as conn:
+        # Banco descartável: durabilidade não importa durante a carga
+        conn.exec_driver_sql("PRAGMA synchronous = OFF")
+
+        medicine_ids = _insert_medicines(conn, rng)
+        conn.commit()
+
+        used_cpfs = set()
+        for start in range(1, patients + 1, chunk_size):
+            count = min(chunk_size, patients + 1 - start)
+            _insert(conn, "INSERT INTO patients (id, public_id, nome, cpf, cpf_digits, data_nascimento, "
+                          "created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    list(_patient_rows(rng, start, count, created_start, used_cpfs)))
+            conn.commit()
+        log(f"   {patients} pacientes em {time.perf_counter() - started:.1f}s")
+
+        # Receitas espalhadas pelos últimos ~5 anos, em ordem de criação
+        first_day = datetime.now() - timedelta(seconds=(prescriptions + 1) * 30)
+        total_items = 0
+        for start in range(1, prescriptions + 1, chunk_size):
+            count = min(chunk_size, prescriptions + 1 - start)
+            prescription_rows, item_rows = _prescription_rows(
+                rng, start, count, patients, medicine_ids, first_day
+            )
+            _insert(conn, "INSERT INTO prescriptions (id, public_id, patient_id, data, "
+                          "data_vencimento, medicamentos_json, observacoes, created_at) "
+                          "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", prescription_rows)
+            _insert(conn, "INSERT INTO prescription_items (prescription_id, medicine_id, "
+                          "posologia, position) VALUES (?, ?, ?, ?)", item_rows)
+            conn.commit()
+            total_items += len(item_rows)
+        log(f"   {prescriptions} receitas / {total_items} itens em {time.perf_counter() - started:.1f}s")
+
+        conn.exec_driver_sql("PRAGMA optimize")
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    return {
+        'medicines': len(medicine_ids),
+        'patients': patients,
+        'prescriptions': prescriptions,
+        'prescription_items': total_items,
+    }, time.perf_counter() - started
@@ -10,6 +10,27 @@ class Config:
     # Banco de dados SQLite local
     SQLALCHEMY_DATABASE_URI = 'sqlite:///sismed_v9.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # uri=True: permite ATTACH 'file:...?mode=ro' dos arquivos anuais (caminhos comuns não mudam)
+    SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'uri': True}}
+    
+    # Perfil SQLite (aplicado em cada conexão - ver storage.py)
+    SQLITE_BUSY_TIMEOUT_MS = 15000
+    SQLITE_SYNCHRONOUS = 'NORMAL'  # Seguro com WAL; FULL para máxima durabilidade
+    SQLITE_CACHE_SIZE_KIB = 65536
+    SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+    SQLITE_WAL_SIZE_LIMIT = 32 * 1024 * 1024  # WAL é truncado a este tamanho após checkpoint
+    SQLITE_MAINTENANCE_ENABLED = True
+    SQLITE_CHECKPOINT_INTERVAL = 60  # segundos
+    SQLITE_ANALYZE_INTERVAL = 6 * 60 * 60  # segundos (ANALYZE + incremental vacuum)
+    SQLITE_VACUUM_PAGES = 2000
+    
+    # Servidor de produção (server.py, waitress): um processo, várias threads
+    SERVER_HOST = '0.0.0.0'
+    SERVER_PORT = 5001
+    SERVER_THREADS = 8  # Requisições atendidas em paralelo
+    SERVER_CONNECTION_LIMIT = 100  # Conexões abertas simultâneas (inclui keep-alive)
+    SERVER_CHANNEL_TIMEOUT = 120  # Segundos de inatividade até fechar a conexão
+    SERVER_SHUTDOWN_TIMEOUT = 15  # Segundos de espera pelas requisições ao encerrar
     
     # Segurança
     SECRET_KEY = 'sismed-perobal-v9-local-secret-key-2024'
@@ -21,8 +42,54 @@ class Config:
     BASE_DIR = os.path.abspath(os.path.dirname(__file__))
     STATIC_FOLDER = os.path.join(BASE_DIR, 'static')
     
+    # Retenção de receitas (limpar_receitas.py e /api/storage/retention)
+    PRESCRIPTION_RETENTION_DAYS = 365  # Receitas com data anterior são removidas
+    RETENTION_BATCH_SIZE = 500  # Receitas por transação
+    RETENTION_BATCH_PAUSE = 0.05  # Segundos entre lotes (libera o lock de escrita para a API)
+    RETENTION_STATE_FILE = os.path.join(BASE_DIR, 'retencao_estado.json')  # Progresso para retomar
+    RETENTION_ARCHIVE = True  # Anos encerrados vão para ARCHIVE_DIR em vez de serem apagados
+    ARCHIVE_DIR = os.path.join(BASE_DIR, 'arquivo')  # receitas_<ano>.db dos anos arquivados
+    
     # PDF Config
-    PDF_TEMP_DIR = os.path.join(BASE_DIR, 'temp_pdfs')
+    PDF_TEMP_DIR = os.path.join(BASE_DIR, 'temp_pdfs')  # Cache de PDFs gerados
+    PDF_CACHE_MAX_BYTES = 200 * 1024 * 1024
+    PDF_WORKERS = os.cpu_count() or 1  # Processos para PDFs em lote
+    PDF_PARALLEL_MIN_BATCH = 8  # Abaixo disso o lote é gerado em um único processo
+    PDF_BATCH_MAX = 500  # Máximo de receitas por PDF em lote
+    PDF_JOB_WORKERS = 2  # Threads da fila assíncrona (o ReportLab roda no pool de processos)
+    PDF_JOB_QUEUE_MAX = 100  # PDFs aguardando; acima disso o pedido recebe 503
+    PDF_JOB_TTL = 60 * 60  # Segundos que um job concluído continua consultável
+    PDF_JOB_RETRY_AFTER = 5  # Segundos sugeridos ao cliente quando a fila está cheia
+    
+    # Compressão das respostas (gzip/deflate conforme Accept-Encoding)
+    COMPRESS_MIN_SIZE = 1024  # Bytes; abaixo disso não compensa
+    COMPRESS_LEVEL = 1  # Rápido; 6 comprime ~10% mais custando ~2,5x o tempo
+    
+    # Métricas em /api/metrics (formato Prometheus)
+    METRICS_ENABLED = True
+    METRICS_LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+    METRICS_PDF_BUCKETS = [0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+    
+    # Profiler de SQL/N+1 por requisição (desenvolvimento): SISMED_SQL_PROFILER=1
+    SQL_PROFILER_ENABLED = os.environ.get('SISMED_SQL_PROFILER') == '1'
+    SQL_PROFILER_N1_THRESHOLD = 5  # Repetições do mesmo formato de consulta
+    
+    # Paginação das listagens (cursor + limit)
+    API_PAGE_SIZE = 100
+    API_MAX_PAGE_SIZE = 500
+    
+    # Importação em massa de pacientes
+    IMPORT_CHUNK_SIZE = 1000  # Linhas por transação
+    IMPORT_MAX_ERRORS = 1000  # Erros detalhados no relatório (os demais só são contados)
+    
+    # Campanhas de receitas (mesmo esquema para vários pacientes e datas)
+    CAMPAIGN_MAX_PRESCRIPTIONS = 20000  # Pacientes x datas por pedido
+    
+    # Exportação em fluxo (linhas lidas do banco por lote)
+    EXPORT_BATCH_SIZE = 1000
+    
+    # Cache do catálogo de medicamentos (segundos até recarregar do banco)
+    MEDICINE_CACHE_TTL = 300
     
     # Aplicação Info
     APP_NAME = "SisMed Perobal v9.0"
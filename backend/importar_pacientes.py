@@ -0,0 +1,44 @@
+"""
+Importação em massa de pacientes - SisMed Perobal v9.0
+Uso: python importar_pacientes.py arquivo.csv|arquivo.ndjson [--formato csv|ndjson]
+CSV com cabeçalho nome,cpf,dataNascimento (separador ',' ou ';'); NDJSON com um objeto por linha
+"""
+
+import argparse
+import time
+
+from app import create_app
+from utils.patient_import import detect_format, iter_records, import_patients
+
+def importar_pacientes(path, file_format=None):
+    """Importa o arquivo em lotes e imprime o relatório de erros por linha"""
+    file_format = file_format or detect_format(path)
+    app = create_app()
+
+    with app.app_context():
+        print(f"📥 Importando pacientes de {path} ({file_format})...")
+        started = time.perf_counter()
+
+        with open(path, 'rb') as source:
+            summary = import_patients(iter_records(source, file_format))
+
+        elapsed = time.perf_counter() - started
+        print(f"✅ {summary['inserted']} de {summary['total']} pacientes importados em {elapsed:.1f}s")
+
+        if summary['errorCount']:
+            print(f"⚠️  {summary['errorCount']} linhas com erro:")
+            for error in summary['errors']:
+                print(f"   linha {error['linha']}: {error['erro']}")
+            if summary['errorCount'] > len(summary['errors']):
+                print(f"   ... e mais {summary['errorCount'] - len(summary['errors'])}")
+
+        return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog='importar_pacientes.py')
+    parser.add_argument('arquivo', help='arquivo CSV (nome,cpf,dataNascimento) ou NDJSON')
+    parser.add_argument('--formato', choices=['csv', 'ndjson'],
+                        help='formato do arquivo (padrão: pela extensão)')
+    args = parser.parse_args()
+
+    importar_pacientes(args.arquivo, args.formato)
@@ -1,58 +1,66 @@
-
 """
 Script de Limpeza Automática de Receitas - SisMed Perobal v9.0
-Remove todas as receitas do sistema mantendo pacientes e medicamentos
+Remove as receitas mais antigas que o prazo de retenção, mantendo pacientes e medicamentos
+Com --arquivar, os anos encerrados vão para arquivo/receitas_<ano>.db em vez de serem apagados
+Uso: python limpar_receitas.py [--dias 365] [--arquivar|--no-arquivar] [--simular] [--lote 500] [--pausa 0.05]
 """
 
-import os
-import sqlite3
+import argparse
+import sys
 from datetime import datetime
 
-def limpar_receitas():
+from app import create_app
+from config import Config
+from utils.retention import preview_purge, purge_prescriptions, retention_cutoff
+
+def limpar_receitas(dias=None, simular=False, lote=None, pausa=None, arquivar=None):
     """
-    Remove todas as receitas do banco de dados
-    Mantém intactos: pacientes, medicamentos
+    Remove em lotes as receitas com data anterior a hoje - dias
+    Com simular=True apenas informa o que seria removido
     """
-    db_path = 'sismed_v9.db'
-    
-    try:
-        # Verificar se o banco existe
-        if not os.path.exists(db_path):
-            print("✅ Banco de dados não encontrado - nada para limpar")
-            return
-        
-        # Conectar ao banco
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Contar receitas antes da limpeza
-        cursor.execute("SELECT COUNT(*) FROM prescriptions")
-        count_before = cursor.fetchone()[0]
-        
-        # Limpar todas as receitas
-        cursor.execute("DELETE FROM prescriptions")
-        
-        # Resetar auto-increment
-        cursor.execute("DELETE FROM sqlite_sequence WHERE name='prescriptions'")
-        
-        # Confirmar mudanças
-        conn.commit()
-        
-        print(f"🧹 Limpeza concluída: {count_before} receitas removidas")
-        print(f"📊 Pacientes e medicamentos preservados")
-        print(f"⏰ Executado em: {datetime.now().strftime('%d/%m/%Y às %H:%M:%S')}")
-        
-    except Exception as e:
-        print(f"❌ Erro durante a limpeza: {str(e)}")
-        return False
-    
-    finally:
-        if 'conn' in locals():
-            conn.close()
-    
-    return True
+    arquivar = Config.RETENTION_ARCHIVE if arquivar is None else arquivar
+    app = create_app()
+
+    with app.app_context():
+        try:
+            cutoff = retention_cutoff(dias, arquivar)
+
+            if simular:
+                preview = preview_purge(cutoff)
+                destino = 'arquivados' if arquivar else 'removidos'
+                print(f"🔎 Simulação: {preview['receitas']} receitas e {preview['itens']} itens "
+                      f"anteriores a {cutoff.strftime('%d/%m/%Y')} seriam {destino}")
+                return preview
+
+            summary = purge_prescriptions(cutoff, batch_size=lote, pause=pausa, archive=arquivar)
+            corte = datetime.fromisoformat(summary['corte']).strftime('%d/%m/%Y')
+            destino = f"arquivados em {Config.ARCHIVE_DIR}" if summary['arquivadas'] else 'removidos'
+            print(f"🧹 Limpeza concluída: {summary['receitas']} receitas e {summary['itens']} itens "
+                  f"anteriores a {corte} {destino}")
+            if summary['receitasPorSegundo']:
+                print(f"⚡ {summary['segundos']:.1f}s ({summary['receitasPorSegundo']:.0f} receitas/s)")
+            print(f"📊 Pacientes e medicamentos preservados")
+            print(f"⏰ Executado em: {datetime.now().strftime('%d/%m/%Y às %H:%M:%S')}")
+            return summary
+
+        except Exception as e:
+            print(f"❌ Erro durante a limpeza: {str(e)}")
+            print("   Execute novamente para continuar de onde parou")
+            return False
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog='limpar_receitas.py')
+    parser.add_argument('--dias', type=int,
+                        help=f'prazo de retenção em dias (padrão {Config.PRESCRIPTION_RETENTION_DAYS})')
+    parser.add_argument('--arquivar', action=argparse.BooleanOptionalAction,
+                        help='move os anos encerrados para os arquivos anuais em vez de apagar '
+                             f'(padrão {Config.RETENTION_ARCHIVE}; --no-arquivar apaga)')
+    parser.add_argument('--simular', action='store_true', help='só informa o que seria removido')
+    parser.add_argument('--lote', type=int, help=f'receitas por transação (padrão {Config.RETENTION_BATCH_SIZE})')
+    parser.add_argument('--pausa', type=float, help=f'segundos entre lotes (padrão {Config.RETENTION_BATCH_PAUSE})')
+    args = parser.parse_args()
+
     print("🚀 Iniciando limpeza automática de receitas...")
-    limpar_receitas()
+    if limpar_receitas(args.dias, args.simular, args.lote, args.pausa, args.arquivar) is False:
+        sys.exit(1)
     print("✅ Limpeza finalizada")
@@ -0,0 +1,233 @@
+"""
+Migrações incrementais do banco SQLite
+db.create_all() só cria tabelas novas - aqui ficam os ajustes em bancos já existentes
+"""
+
+import json
+import threading
+import time
+
+from database import db
+from utils.security import normalize_cpf
+
+# Tamanho do lote da migração de medicamentos_json -> prescription_items
+ITEMS_MIGRATION_BATCH_SIZE = 500
+
+def ensure_indexes():
+    """Cria índices declarados nos modelos que ainda não existem no banco"""
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+def ensure_patient_cpf_digits():
+    """
+    Adiciona patients.cpf_digits em bancos existentes e preenche os CPFs pendentes
+    CPF repetido: só o cadastro mais antigo recebe cpf_digits (índice único); os
+    demais ficam sem e são listados a cada inicialização até serem corrigidos
+    """
+    columns = {row[1] for row in db.session.execute(db.text("PRAGMA table_info(patients)"))}
+    if 'cpf_digits' not in columns:
+        db.session.execute(db.text("ALTER TABLE patients ADD COLUMN cpf_digits VARCHAR(11)"))
+        db.session.commit()
+
+    pending = db.session.execute(db.text(
+        "SELECT id, cpf FROM patients WHERE cpf IS NOT NULL AND cpf_digits IS NULL ORDER BY id"
+    )).fetchall()
+    if not pending:
+        return 0
+
+    taken = set(db.session.execute(db.text(
+        "SELECT cpf_digits FROM patients WHERE cpf_digits IS NOT NULL"
+    )).scalars())
+    updates, duplicates = [], []
+    for patient_id, cpf in pending:
+        digits = normalize_cpf(cpf)
+        if digits is None:
+            continue  # CPF incompleto: fica fora do índice
+        if digits in taken:
+            duplicates.append(patient_id)
+            continue
+        taken.add(digits)
+        updates.append({'id': patient_id, 'digits': digits})
+
+    if updates:
+        db.session.execute(
+            db.text("UPDATE patients SET cpf_digits = :digits WHERE id = :id"), updates
+        )
+        db.session.commit()
+        print(f"✅ CPF normalizado em {len(updates)} pacientes")
+    if duplicates:
+        shown = ', '.join(map(str, duplicates[:20]))
+        print(f"⚠️  {len(duplicates)} pacientes com CPF repetido (ids {shown}): revise os cadastros")
+    return len(updates)
+
+def ensure_patient_search_index(app):
+    """Cria o índice FTS5 de pacientes e seus triggers; reconstrói se for novo"""
+    from utils.patient_search import PATIENT_FTS_DDL
+
+    try:
+        exists = db.session.execute(db.text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'patients_fts'"
+        )).first() is not None
+
+        for statement in PATIENT_FTS_DDL:
+            db.session.execute(db.text(statement))
+        if not exists:
+            db.session.execute(db.text("INSERT INTO patients_fts(patients_fts) VALUES ('rebuild')"))
+        db.session.commit()
+        app.config['PATIENT_FTS_ENABLED'] = True
+    except Exception as e:
+        # SQLite sem FTS5: a busca volta a usar LIKE
+        db.session.rollback()
+        app.config['PATIENT_FTS_ENABLED'] = False
+        print(f"⚠️  Índice de busca FTS5 indisponível, usando LIKE: {e}")
+
+def ensure_archives_upgraded():
+    """Arquivos anuais antigos ganham patient_public_id (histórico pelo public_id do paciente)"""
+    from utils.archive import upgrade_archives
+
+    upgraded = upgrade_archives()
+    if upgraded:
+        print(f"✅ Arquivos de receitas atualizados: {', '.join(map(str, upgraded))}")
+
+def _parse_legacy_medicamentos(medicamentos_json):
+    """Lista [{'medicamentoId', 'posologia'}] do JSON legado, ou None se o formato for inválido"""
+    try:
+        medicamentos = json.loads(medicamentos_json)
+    except ValueError:
+        return None
+    if not isinstance(medicamentos, list):
+        return None
+    if not all(isinstance(med, dict) and isinstance(med.get('medicamentoId'), str) for med in medicamentos):
+        return None
+    return medicamentos
+
+def migrate_prescription_items_batch(batch_size=ITEMS_MIGRATION_BATCH_SIZE, after_id=0):
+    """
+    Migra um lote de receitas (id > after_id) de medicamentos_json para prescription_items
+    Cada lote é uma transação curta; só receitas com todos os medicamentos migrados
+    ficam com medicamentos_json = ''. JSON inválido ou medicamento que não existe mais
+    no catálogo: a receita fica intacta (continua sendo lida do JSON) e é listada
+    Idempotente: o índice único (prescription_id, position) descarta itens repetidos
+    Retorna (receitas migradas, receitas mantidas, último id lido) ou None se nada pendente
+    """
+    rows = db.session.execute(
+        db.text(
+            "SELECT id, medicamentos_json FROM prescriptions "
+            "WHERE medicamentos_json != '' AND id > :after_id ORDER BY id LIMIT :limit"
+        ),
+        {'after_id': after_id, 'limit': batch_size}
+    ).fetchall()
+
+    if not rows:
+        return None
+
+    parsed = {}
+    kept = 0
+    public_ids = set()
+    for prescription_id, medicamentos_json in rows:
+        medicamentos = _parse_legacy_medicamentos(medicamentos_json)
+        if medicamentos is None:
+            print(f"⚠️  Receita {prescription_id}: medicamentos_json inválido, mantido sem migrar")
+            kept += 1
+            continue
+        parsed[prescription_id] = medicamentos
+        public_ids.update(med['medicamentoId'] for med in medicamentos)
+
+    medicine_ids = {}
+    if public_ids:
+        medicine_ids = dict(db.session.execute(
+            db.text("SELECT public_id, id FROM medicines WHERE public_id IN :ids")
+            .bindparams(db.bindparam('ids', expanding=True)),
+            {'ids': list(public_ids)}
+        ).fetchall())
+
+    items = []
+    migrated = []
+    for prescription_id, medicamentos in parsed.items():
+        missing = [med['medicamentoId'] for med in medicamentos if med['medicamentoId'] not in medicine_ids]
+        if missing:
+            # Medicamento excluído do catálogo: o JSON é o único registro dele
+            print(f"⚠️  Receita {prescription_id}: medicamento(s) {', '.join(missing)} "
+                  f"fora do catálogo, mantida sem migrar")
+            kept += 1
+            continue
+        migrated.append(prescription_id)
+        items.extend(
+            {
+                'prescription_id': prescription_id,
+                'medicine_id': medicine_ids[med['medicamentoId']],
+                'posologia': med.get('posologia') or '',
+                'position': position,
+            }
+            for position, med in enumerate(medicamentos)
+        )
+
+    if items:
+        db.session.execute(
+            db.text(
+                "INSERT OR IGNORE INTO prescription_items (prescription_id, medicine_id, posologia, position) "
+                "VALUES (:prescription_id, :medicine_id, :posologia, :position)"
+            ),
+            items
+        )
+    if migrated:
+        db.session.execute(
+            db.text("UPDATE prescriptions SET medicamentos_json = '' WHERE id IN :ids")
+            .bindparams(db.bindparam('ids', expanding=True)),
+            {'ids': migrated}
+        )
+    db.session.commit()
+
+    return len(migrated), kept, rows[-1][0]
+
+def migrate_prescription_items(batch_size=ITEMS_MIGRATION_BATCH_SIZE, pause=0.05):
+    """Migra todas as receitas pendentes em lotes, liberando o banco entre eles"""
+    total = kept = last_id = 0
+    while True:
+        result = migrate_prescription_items_batch(batch_size, last_id)
+        if result is None:
+            break
+        migrated, batch_kept, last_id = result
+        total += migrated
+        kept += batch_kept
+        time.sleep(pause)
+
+    if total:
+        print(f"✅ {total} receitas migradas para prescription_items")
+    if kept:
+        print(f"⚠️  {kept} receitas mantidas em medicamentos_json (ver avisos acima)")
+    return total
+
+def start_background_migrations(app):
+    """
+    Executa as migrações de dados em segundo plano com a API já no ar
+    Chamada só pelos pontos de entrada do servidor (server.py e app.py), não pelos scripts
+    """
+    def worker():
+        with app.app_context():
+            try:
+                migrate_prescription_items()
+            except Exception as e:
+                db.session.rollback()
+                print(f"❌ Erro na migração de prescription_items: {e}")
+            finally:
+                db.session.remove()
+
+    thread = threading.Thread(target=worker, name='sismed-migrations', daemon=True)
+    thread.start()
+    return thread
+
+def run_migrations(app):
+    """Executa todas as migrações idempotentes (chamada no create_app)"""
+    ensure_patient_cpf_digits()  # Antes dos índices: o único de cpf_digits depende da coluna
+    ensure_indexes()
+    ensure_patient_search_index(app)
+    ensure_archives_upgraded()
+
+if __name__ == "__main__":
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        migrate_prescription_items(pause=0)
@@ -4,19 +4,28 @@ Modelos de dados simplificados para SisMed Perobal v9.0
 """
 
 from database import db
-from utils.security import generate_public_id
+from utils.security import generate_public_id, normalize_cpf
 from utils.data_format import format_text_field
+from utils.medicine_catalog import medicine_catalog
+from utils.table_versions import table_versions
 from datetime import datetime
 import json
 
 class Patient(db.Model):
     """Modelo simplificado de Paciente - apenas campos essenciais"""
     __tablename__ = 'patients'
+    __table_args__ = (
+        db.Index('ix_patients_nome_id', 'nome', 'id'),  # Paginação keyset
+        db.Index('ix_patients_cpf', 'cpf'),  # Busca por CPF (prefixo formatado)
+        db.Index('ux_patients_cpf_digits', 'cpf_digits', unique=True),  # Um cadastro por CPF
+        {'sqlite_autoincrement': True},  # Id de paciente excluído não é reutilizado (bancos novos)
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     public_id = db.Column(db.String(36), unique=True, nullable=False, default=generate_public_id)
     nome = db.Column(db.String(200), nullable=False)
     cpf = db.Column(db.String(14), nullable=True)  # Opcional
+    cpf_digits = db.Column(db.String(11), nullable=True)  # Só dígitos, mantido pelo validador de cpf
     data_nascimento = db.Column(db.Date, nullable=True)  # Opcional
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
@@ -32,6 +41,22 @@ class Patient(db.Model):
         
         super().__init__(**kwargs)
     
+    @db.validates('cpf')
+    def _sync_cpf_digits(self, key, cpf):
+        self.cpf_digits = normalize_cpf(cpf)
+        return cpf
+    
+    @classmethod
+    def find_by_cpf(cls, cpf, exclude_id=None):
+        """Paciente com o mesmo CPF (uma leitura no índice único) ou None"""
+        digits = normalize_cpf(cpf)
+        if digits is None:
+            return None
+        query = cls.query.filter_by(cpf_digits=digits)
+        if exclude_id is not None:
+            query = query.filter(cls.id != exclude_id)
+        return query.first()
+    
     def to_dict(self):
         return {
             'id': self.public_id,  # Usar public_id externamente
@@ -44,6 +69,9 @@ class Patient(db.Model):
 class Medicine(db.Model):
     """Modelo simplificado de Medicamento"""
     __tablename__ = 'medicines'
+    __table_args__ = (
+        db.Index('ix_medicines_denominacao_id', 'denominacao_generica', 'id'),  # Paginação keyset
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     public_id = db.Column(db.String(36), unique=True, nullable=False, default=generate_public_id)
@@ -72,16 +100,28 @@ class Medicine(db.Model):
 class Prescription(db.Model):
     """Modelo de Receita Médica - Campos opcionais flexíveis"""
     __tablename__ = 'prescriptions'
+    __table_args__ = (
+        db.Index('ix_prescriptions_created_at_id', 'created_at', 'id'),  # Paginação keyset
+        db.Index('ix_prescriptions_patient_created_at_id', 'patient_id', 'created_at', 'id'),
+        db.Index('ix_prescriptions_data', 'data'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     public_id = db.Column(db.String(36), unique=True, nullable=False, default=generate_public_id)
     patient_id = db.Column(db.Integer, db.ForeignKey('patients.id'), nullable=False)
     data = db.Column(db.Date, nullable=False, default=datetime.utcnow().date)
     data_vencimento = db.Column(db.Date, nullable=True)
-    medicamentos_json = db.Column(db.Text, nullable=False)  # JSON dos medicamentos
+    # LEGADO: lista em JSON, migrada para prescription_items ('' = já migrada)
+    medicamentos_json = db.Column(db.Text, nullable=False, default='')
     observacoes = db.Column(db.Text, nullable=True)  # OPCIONAL - pode estar vazio
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Itens da receita (medicamento + posologia) em ordem
+    items = db.relationship(
+        'PrescriptionItem', backref='prescription', lazy=True,
+        order_by='PrescriptionItem.position', cascade='all, delete-orphan'
+    )
+    
     def __init__(self, **kwargs):
         # Padronizar observações apenas se não estiver vazio
         if 'observacoes' in kwargs and kwargs['observacoes'] and kwargs['observacoes'].strip():
@@ -91,21 +131,105 @@ class Prescription(db.Model):
         
         super().__init__(**kwargs)
     
-    def get_medicamentos(self):
-        """Retorna a lista de medicamentos deserializada"""
-        return json.loads(self.medicamentos_json) if self.medicamentos_json else []
+    @classmethod
+    def query_with_details(cls):
+        """
+        Query com paciente (join) e itens (selectin) carregados em lote
+        Serializar N receitas custa um número fixo de consultas, sem N+1 no to_dict
+        """
+        return cls.query.options(
+            db.joinedload(cls.patient),
+            db.selectinload(cls.items)
+        )
+    
+    def get_medicamentos(self, expand=False):
+        """
+        Retorna a lista de medicamentos no formato da API
+        expand=True inclui os dados do medicamento ('medicamento', pelo catálogo em memória)
+        """
+        if self.medicamentos_json:
+            # Receita ainda não migrada para prescription_items
+            medicamentos = json.loads(self.medicamentos_json)
+            if expand:
+                for med in medicamentos:
+                    medicine = medicine_catalog.get(med.get('medicamentoId'))
+                    med['medicamento'] = medicine.to_dict() if medicine is not None else None
+            return medicamentos
+        
+        medicamentos = []
+        for medicine, posologia in self.get_medicamentos_detalhados():
+            med = {'medicamentoId': medicine.public_id, 'posologia': posologia}
+            if expand:
+                med['medicamento'] = medicine.to_dict()
+            medicamentos.append(med)
+        return medicamentos
+    
+    def get_medicamentos_detalhados(self):
+        """Retorna [(CatalogEntry, posologia)] na ordem da receita"""
+        if self.medicamentos_json:
+            detalhados = []
+            for med in json.loads(self.medicamentos_json):
+                medicine = medicine_catalog.get(med['medicamentoId'])
+                if medicine is not None:
+                    detalhados.append((medicine, med.get('posologia') or ''))
+            return detalhados
+        
+        detalhados = []
+        for item in self.items:
+            medicine = medicine_catalog.get_by_id(item.medicine_id)
+            if medicine is not None:  # Medicamento excluído do catálogo
+                detalhados.append((medicine, item.posologia or ''))
+        return detalhados
     
     def set_medicamentos(self, medicamentos_list):
-        """Define a lista de medicamentos serializada"""
-        self.medicamentos_json = json.dumps(medicamentos_list)
+        """
+        Define os itens da receita a partir de [{'medicamentoId', 'posologia'}]
+        Medicamentos resolvidos pelo catálogo em memória
+        """
+        items = []
+        for position, med in enumerate(medicamentos_list):
+            medicine = medicine_catalog.get(med['medicamentoId'])
+            if medicine is None:
+                raise ValueError(f"Medicamento {med['medicamentoId']} não encontrado")
+            items.append(PrescriptionItem(
+                medicine_id=medicine.id,
+                posologia=med.get('posologia') or '',
+                position=position
+            ))
+        
+        self.items = items
+        self.medicamentos_json = ''
     
-    def to_dict(self):
-        return {
+    def to_dict(self, expand=()):
+        """expand: 'medicamentos' e/ou 'paciente' incluem os dados completos junto dos ids"""
+        result = {
             'id': self.public_id,  # Usar public_id externamente
             'pacienteId': self.patient.public_id,  # Usar public_id do paciente
             'data': self.data.isoformat(),
             'dataVencimento': self.data_vencimento.isoformat() if self.data_vencimento else None,
-            'medicamentos': self.get_medicamentos(),
+            'medicamentos': self.get_medicamentos(expand='medicamentos' in expand),
             'observacoes': self.observacoes if self.observacoes else '',  # Retornar string vazia se None
             'created_at': self.created_at.isoformat()
         }
+        if 'paciente' in expand:
+            result['paciente'] = self.patient.to_dict()  # Já carregado pelo query_with_details
+        return result
+
+class PrescriptionItem(db.Model):
+    """Item da receita - um medicamento com sua posologia"""
+    __tablename__ = 'prescription_items'
+    __table_args__ = (
+        db.Index('ix_prescription_items_prescription_position', 'prescription_id', 'position', unique=True),
+        db.Index('ix_prescription_items_medicine_prescription', 'medicine_id', 'prescription_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    prescription_id = db.Column(db.Integer, db.ForeignKey('prescriptions.id'), nullable=False)
+    medicine_id = db.Column(db.Integer, db.ForeignKey('medicines.id'), nullable=False)
+    posologia = db.Column(db.Text, nullable=False, default='')  # OPCIONAL - pode estar vazia
+    position = db.Column(db.Integer, nullable=False, default=0)  # Ordem na receita
+    
+    medicine = db.relationship('Medicine')  # Serialização usa o medicine_catalog
+
+# ETags das leituras: versão de cada tabela avança a cada alteração confirmada
+table_versions.watch(Patient, Medicine, Prescription)
@@ -0,0 +1,74 @@
+"""
+API Routes para exportação (relatórios mensais) em CSV ou NDJSON
+"""
+
+from flask import Blueprint, Response, request, stream_with_context
+from utils.api_response import error_response
+from utils.data_export import (
+    PATIENT_COLUMNS, PRESCRIPTION_COLUMNS, flatten_prescription,
+    iter_patients, iter_prescriptions, stream_csv, stream_ndjson
+)
+from datetime import datetime
+
+export_bp = Blueprint('export', __name__)
+
+def parse_export_args():
+    """Lê format, dataInicio e dataFim da query string (ValueError se inválidos)"""
+    file_format = request.args.get('format', 'csv').lower()
+    if file_format not in ('csv', 'ndjson'):
+        raise ValueError("Formato inválido (use csv ou ndjson)")
+
+    try:
+        start = request.args.get('dataInicio')
+        end = request.args.get('dataFim')
+        start = datetime.strptime(start, '%Y-%m-%d').date() if start else None
+        end = datetime.strptime(end, '%Y-%m-%d').date() if end else None
+    except ValueError:
+        raise ValueError("Data inválida")
+
+    return file_format, start, end
+
+def export_response(chunks, file_format, name):
+    """Resposta em fluxo: o gerador roda durante o envio, com o contexto da requisição"""
+    if file_format == 'ndjson':
+        mimetype, extension = 'application/x-ndjson', 'ndjson'
+    else:
+        mimetype, extension = 'text/csv', 'csv'
+
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={name}.{extension}'}
+    )
+
+@export_bp.route('/export/prescriptions', methods=['GET'])
+def export_prescriptions():
+    """Exportar receitas com paciente e medicamentos, filtradas pela data da receita"""
+    try:
+        file_format, start, end = parse_export_args()
+    except ValueError as e:
+        return error_response(str(e))
+
+    batches = iter_prescriptions(start, end)
+    if file_format == 'ndjson':
+        chunks = stream_ndjson(batches)
+    else:
+        chunks = stream_csv(batches, PRESCRIPTION_COLUMNS, flatten_prescription)
+
+    return export_response(chunks, file_format, 'receitas')
+
+@export_bp.route('/export/patients', methods=['GET'])
+def export_patients():
+    """Exportar pacientes, filtrados pela data de cadastro"""
+    try:
+        file_format, start, end = parse_export_args()
+    except ValueError as e:
+        return error_response(str(e))
+
+    batches = iter_patients(start, end)
+    if file_format == 'ndjson':
+        chunks = stream_ndjson(batches)
+    else:
+        chunks = stream_csv(batches, PATIENT_COLUMNS)
+
+    return export_response(chunks, file_format, 'pacientes')
@@ -4,24 +4,43 @@ API Routes para Medicamentos
 """
 
 from flask import Blueprint, request
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
 from database import db
-from models import Medicine
-from utils.api_response import api_response_wrapper, success_response, error_response
+from models import Medicine, Prescription, PrescriptionItem
+from utils.api_response import api_response_wrapper, conditional_response, success_response, error_response
+from utils.fieldsets import medicine_fields
+from utils.medicine_autocomplete import medicine_autocomplete
+from utils.medicine_catalog import medicine_catalog
+from utils.pagination import Page, get_page_args, paginate_keyset
 
 medicines_bp = Blueprint('medicines', __name__)
 
 @medicines_bp.route('', methods=['GET'])
+@conditional_response('medicines')
 @api_response_wrapper
 def get_medicines():
-    """Listar todos os medicamentos"""
-    medicines = Medicine.query.order_by(Medicine.denominacao_generica).all()
-    return [medicine.to_dict() for medicine in medicines]
+    """Listar medicamentos paginados por (nome, id); fields=id,nome restringe as colunas"""
+    cursor, limit = get_page_args()
+    fields = medicine_fields.parse()
+    
+    query = Medicine.query
+    if fields:
+        query = query.options(*medicine_fields.load_options(fields, Medicine.denominacao_generica))
+    
+    page = paginate_keyset(
+        query, [Medicine.denominacao_generica, Medicine.id], cursor, limit
+    )
+    if fields:
+        return Page([medicine_fields.serialize(medicine, fields) for medicine in page.items], page.next_cursor)
+    return Page([medicine.to_dict() for medicine in page.items], page.next_cursor)
 
 @medicines_bp.route('/<medicine_id>', methods=['GET'])
+@conditional_response('medicines')
 @api_response_wrapper
 def get_medicine(medicine_id):
     """Obter um medicamento específico por public_id"""
-    medicine = Medicine.query.filter_by(public_id=medicine_id).first()
+    medicine = medicine_catalog.get(medicine_id)
     if not medicine:
         raise Exception("Medicamento não encontrado")
     
@@ -58,6 +77,7 @@ def create_medicine():
         
         db.session.add(medicine)
         db.session.commit()
+        medicine_catalog.put(medicine)
         
         return success_response(medicine.to_dict())
         
@@ -92,6 +112,7 @@ def update_medicine(medicine_id):
             medicine.apresentacao = data['apresentacao']
         
         db.session.commit()
+        medicine_catalog.put(medicine)
         return success_response(medicine.to_dict())
         
     except Exception as e:
@@ -106,26 +127,43 @@ def delete_medicine(medicine_id):
         if not medicine:
             return error_response("Medicamento não encontrado", 404)
         
+        # Receitas guardam o id interno (prescription_items) ou o public_id (JSON legado):
+        # excluir apagaria o medicamento das receitas já emitidas e dos PDFs delas
+        in_use = db.session.query(or_(
+            PrescriptionItem.query.filter_by(medicine_id=medicine.id).exists(),
+            Prescription.query.filter(Prescription.medicamentos_json.contains(medicine.public_id)).exists()
+        )).scalar()
+        if in_use:
+            return error_response("Medicamento usado em receitas não pode ser excluído", 409)
+        
         db.session.delete(medicine)
         db.session.commit()
+        medicine_catalog.discard(medicine_id)
         
         return success_response({"message": "Medicamento excluído com sucesso"})
         
+    except IntegrityError:
+        # Receita criada com o medicamento entre a verificação e a exclusão (foreign_keys=ON)
+        db.session.rollback()
+        return error_response("Medicamento usado em receitas não pode ser excluído", 409)
     except Exception as e:
         db.session.rollback()
         return error_response(f"Erro ao excluir medicamento: {str(e)}")
 
 @medicines_bp.route('/search', methods=['GET'])
+@conditional_response('medicines')
 @api_response_wrapper
 def search_medicines():
-    """Buscar medicamentos por nome"""
+    """Buscar medicamentos por nome, concentração ou apresentação (índice em memória)"""
     query = request.args.get('q', '').strip()
+    fields = medicine_fields.parse()
     
     if not query:
         return []
     
-    medicines = Medicine.query.filter(
-        Medicine.denominacao_generica.contains(query.upper())
-    ).order_by(Medicine.denominacao_generica).all()
+    _, limit = get_page_args()
+    medicines = medicine_autocomplete.search(query, limit)
     
+    if fields:
+        return [medicine_fields.serialize(medicine, fields) for medicine in medicines]
     return [medicine.to_dict() for medicine in medicines]
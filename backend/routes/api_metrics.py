@@ -0,0 +1,13 @@
+"""
+API Route de métricas no formato de texto do Prometheus
+"""
+
+from flask import Blueprint, Response
+from utils.metrics import metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Latência, status, SQL por endpoint e tempo de PDF"""
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -3,23 +3,44 @@
 API Routes para Pacientes
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy.exc import IntegrityError
 from database import db
-from models import Patient
-from utils.api_response import api_response_wrapper, success_response, error_response
-from utils.security import validate_cpf, format_cpf
+from models import Patient, Prescription
+from routes.api_prescriptions import get_expand_args
+from utils.api_response import api_response_wrapper, conditional_response, success_response, error_response
+from utils.archive import archived_prescriptions, delete_archived_prescriptions
+from utils.fieldsets import patient_fields
+from utils.pagination import Page, get_page_args, paginate_keyset
+from utils.patient_import import detect_format, iter_records, import_patients
+from utils.patient_search import search_patients as find_patients
+from utils.security import validate_cpf, format_cpf, normalize_cpf
 from datetime import datetime
 
 patients_bp = Blueprint('patients', __name__)
 
 @patients_bp.route('', methods=['GET'])
+@conditional_response('patients')
 @api_response_wrapper
 def get_patients():
-    """Listar todos os pacientes"""
-    patients = Patient.query.order_by(Patient.nome).all()
-    return [patient.to_dict() for patient in patients]
+    """
+    Listar pacientes paginados por (nome, id)
+    fields=id,nome: só essas colunas são lidas e enviadas (seletor de pacientes)
+    """
+    cursor, limit = get_page_args()
+    fields = patient_fields.parse()
+    
+    query = Patient.query
+    if fields:
+        query = query.options(*patient_fields.load_options(fields, Patient.nome))
+    
+    page = paginate_keyset(query, [Patient.nome, Patient.id], cursor, limit)
+    if fields:
+        return Page([patient_fields.serialize(patient, fields) for patient in page.items], page.next_cursor)
+    return Page([patient.to_dict() for patient in page.items], page.next_cursor)
 
 @patients_bp.route('/<patient_id>', methods=['GET'])
+@conditional_response('patients')
 @api_response_wrapper
 def get_patient(patient_id):
     """Obter um paciente específico por public_id"""
@@ -29,6 +50,56 @@ def get_patient(patient_id):
     
     return patient.to_dict()
 
+@patients_bp.route('/cpf/<cpf>', methods=['GET'])
+@conditional_response('patients')
+def get_patient_by_cpf(cpf):
+    """Paciente pelo CPF exato, com ou sem máscara (uma leitura no índice único)"""
+    if normalize_cpf(cpf) is None:
+        return error_response("CPF inválido")
+    
+    patient = Patient.find_by_cpf(cpf)
+    if not patient:
+        return error_response("Paciente não encontrado", 404)
+    return success_response(patient.to_dict())
+
+@patients_bp.route('/<patient_id>/prescriptions', methods=['GET'])
+@conditional_response('prescriptions', 'medicines', 'patients')
+@api_response_wrapper
+def get_patient_history(patient_id):
+    """
+    Histórico completo do paciente (dataInicio/dataFim opcionais), mais recentes primeiro
+    Inclui os anos arquivados que o período alcança (campo 'arquivo' com o ano)
+    Aceita expand=medicamentos,paciente como a listagem
+    """
+    expand = get_expand_args()
+    patient = Patient.query.filter_by(public_id=patient_id).first()
+    if not patient:
+        raise Exception("Paciente não encontrado")
+    
+    try:
+        start = datetime.strptime(request.args['dataInicio'], '%Y-%m-%d').date() if request.args.get('dataInicio') else None
+        end = datetime.strptime(request.args['dataFim'], '%Y-%m-%d').date() if request.args.get('dataFim') else None
+    except ValueError:
+        raise Exception("Data inválida")
+    
+    query = Prescription.query_with_details().filter(Prescription.patient_id == patient.id)
+    if start:
+        query = query.filter(Prescription.data >= start)
+    if end:
+        query = query.filter(Prescription.data <= end)
+    
+    history = [prescription.to_dict(expand) for prescription in query.all()]
+    history += archived_prescriptions(patient, start, end, expand)
+    history.sort(key=lambda prescription: (prescription['data'], prescription['created_at']), reverse=True)
+    return history
+
+def duplicate_cpf_response(patient):
+    """409 com o cadastro existente em data, para a tela oferecer abri-lo"""
+    return jsonify({
+        "data": patient.to_dict(),
+        "error": f"CPF já cadastrado para {patient.nome}"
+    }), 409
+
 @patients_bp.route('', methods=['POST'])
 def create_patient():
     """Criar novo paciente"""
@@ -43,6 +114,10 @@ def create_patient():
         if data.get('cpf') and not validate_cpf(data.get('cpf')):
             return error_response("CPF inválido")
         
+        duplicate = Patient.find_by_cpf(data.get('cpf'))
+        if duplicate:
+            return duplicate_cpf_response(duplicate)
+        
         # Preparar dados
         patient_data = {
             'nome': data['nome'],
@@ -65,6 +140,10 @@ def create_patient():
         
         return success_response(patient.to_dict())
         
+    except IntegrityError:
+        # Mesmo CPF gravado por outra requisição entre a verificação e o commit
+        db.session.rollback()
+        return error_response("CPF já cadastrado", 409)
     except Exception as e:
         db.session.rollback()
         return error_response(f"Erro ao criar paciente: {str(e)}")
@@ -86,6 +165,10 @@ def update_patient(patient_id):
         if 'cpf' in data and data['cpf'] and not validate_cpf(data['cpf']):
             return error_response("CPF inválido")
         
+        duplicate = Patient.find_by_cpf(data.get('cpf'), exclude_id=patient.id) if 'cpf' in data else None
+        if duplicate:
+            return duplicate_cpf_response(duplicate)
+        
         # Atualizar campos
         if 'nome' in data:
             patient.nome = data['nome']
@@ -107,6 +190,9 @@ def update_patient(patient_id):
         db.session.commit()
         return success_response(patient.to_dict())
         
+    except IntegrityError:
+        db.session.rollback()
+        return error_response("CPF já cadastrado", 409)
     except Exception as e:
         db.session.rollback()
         return error_response(f"Erro ao atualizar paciente: {str(e)}")
@@ -122,6 +208,12 @@ def delete_patient(patient_id):
         db.session.delete(patient)
         db.session.commit()
         
+        # Receitas dos anos arquivados saem junto com as do banco principal
+        try:
+            delete_archived_prescriptions(patient)
+        except Exception as e:
+            print(f"⚠️  Receitas arquivadas do paciente {patient_id} não foram removidas: {e}")
+        
         return success_response({"message": "Paciente excluído com sucesso"})
         
     except Exception as e:
@@ -129,20 +221,45 @@ def delete_patient(patient_id):
         return error_response(f"Erro ao excluir paciente: {str(e)}")
 
 @patients_bp.route('/search', methods=['GET'])
+@conditional_response('patients')
 @api_response_wrapper
 def search_patients():
-    """Buscar pacientes por nome ou CPF"""
+    """Buscar pacientes por nome (sem acentos, por prefixo) ou CPF; aceita fields como a listagem"""
     query = request.args.get('q', '').strip()
+    fields = patient_fields.parse()
     
     if not query:
         return []
     
-    # Buscar por nome ou CPF
-    patients = Patient.query.filter(
-        db.or_(
-            Patient.nome.contains(query.upper()),
-            Patient.cpf.contains(query)
-        )
-    ).order_by(Patient.nome).all()
+    _, limit = get_page_args()
+    patients = find_patients(
+        query, limit, fts_enabled=current_app.config.get('PATIENT_FTS_ENABLED', False),
+        columns=patient_fields.columns(fields) if fields else None
+    )
     
+    if fields:
+        return [patient_fields.serialize(patient, fields) for patient in patients]
     return [patient.to_dict() for patient in patients]
+
+@patients_bp.route('/import', methods=['POST'])
+def import_patients_file():
+    """Importar pacientes em massa de um arquivo CSV ou NDJSON (lido em fluxo)"""
+    try:
+        upload = request.files.get('file')
+        if upload:
+            stream = upload.stream
+            default_format = detect_format(upload.filename, upload.mimetype)
+        else:
+            stream = request.stream
+            default_format = detect_format(content_type=request.content_type)
+        
+        file_format = request.args.get('format', default_format).lower()
+        if file_format not in ('csv', 'ndjson'):
+            return error_response("Formato inválido (use csv ou ndjson)")
+        
+        summary = import_patients(iter_records(stream, file_format))
+        return success_response(summary)
+        
+    except Exception as e:
+        db.session.rollback()
+        return error_response(f"Erro ao importar pacientes: {str(e)}")
@@ -3,39 +3,196 @@
 API Routes para geração de PDF
 """
 
-from flask import Blueprint, send_file, request
+from flask import Blueprint, send_file, request, url_for
+from config import Config
 from models import Prescription, Patient, Medicine
-from utils.api_response import error_response
-from utils.pdf_generator import generate_prescription_pdf
-import os
-import tempfile
+from utils.api_response import error_response, success_response
+from utils.pdf_cache import pdf_cache, pdf_cache_key
+from utils.pdf_jobs import DONE, FAILED, PdfQueueFull, pdf_jobs
+from utils.pdf_generator import get_pdf_template, prescription_pdf_data, render_prescriptions_pdf
+from datetime import datetime
+from io import BytesIO
 
 pdf_bp = Blueprint('pdf', __name__)
 
+def send_prescriptions_pdf(data_list, download_name):
+    """
+    Envia o PDF das receitas: do cache em disco quando o conteúdo não mudou,
+    senão gera, grava no cache e envia direto da memória
+    """
+    key = pdf_cache_key(data_list, get_pdf_template().fingerprint)
+    
+    source = pdf_cache.open(key)
+    if source is None:
+        pdf_bytes = render_prescriptions_pdf(data_list)
+        try:
+            pdf_cache.put(key, pdf_bytes)
+        except OSError as e:
+            print(f"⚠️  Cache de PDF indisponível: {e}")
+        source = BytesIO(pdf_bytes)
+    
+    return send_file(
+        source,
+        as_attachment=True,
+        download_name=download_name,
+        mimetype='application/pdf',
+        etag=key,
+        conditional=True
+    )
+
 @pdf_bp.route('/prescription/<prescription_id>', methods=['GET'])
 def generate_prescription_pdf_route(prescription_id):
     """Gerar PDF de uma receita específica"""
     try:
         # Buscar receita por public_id
-        prescription = Prescription.query.filter_by(public_id=prescription_id).first()
+        prescription = Prescription.query_with_details().filter_by(public_id=prescription_id).first()
         if not prescription:
             return error_response("Receita não encontrada", 404)
         
-        # Gerar PDF
-        pdf_buffer = generate_prescription_pdf(prescription)
+        return send_prescriptions_pdf(
+            [prescription_pdf_data(prescription)], prescription_download_name(prescription)
+        )
+        
+    except Exception as e:
+        return error_response(f"Erro ao gerar PDF: {str(e)}")
+
+def find_pdf_prescriptions(data):
+    """
+    Receitas pedidas em {"prescriptionId": ...}, {"ids": [...]} ou
+    {"pacienteId": ..., "dataInicio": ..., "dataFim": ...}
+    Retorna (receitas, nome do arquivo, None) ou (None, None, (mensagem, status))
+    """
+    query = Prescription.query_with_details()
+    
+    if data.get('prescriptionId'):
+        prescription = query.filter_by(public_id=data['prescriptionId']).first()
+        if not prescription:
+            return None, None, ("Receita não encontrada", 404)
+        return [prescription], prescription_download_name(prescription), None
+    
+    if data.get('ids'):
+        ids = data['ids']
+        if len(ids) > Config.PDF_BATCH_MAX:
+            return None, None, (f"Máximo de {Config.PDF_BATCH_MAX} receitas por PDF", 400)
+        
+        prescriptions = query.filter(Prescription.public_id.in_(ids)).all()
+        by_public_id = {prescription.public_id: prescription for prescription in prescriptions}
+        missing = [public_id for public_id in ids if public_id not in by_public_id]
+        if missing:
+            return None, None, (f"Receitas não encontradas: {', '.join(missing)}", 404)
+        
+        # Mesma ordem da lista recebida
+        prescriptions = [by_public_id[public_id] for public_id in ids]
+        return prescriptions, f'receitas_{len(prescriptions)}.pdf', None
+    
+    if data.get('pacienteId'):
+        patient = Patient.query.filter_by(public_id=data['pacienteId']).first()
+        if not patient:
+            return None, None, ("Paciente não encontrado", 404)
+        
+        query = query.filter(Prescription.patient_id == patient.id)
+        try:
+            if data.get('dataInicio'):
+                start = datetime.strptime(data['dataInicio'], '%Y-%m-%d').date()
+                query = query.filter(Prescription.data >= start)
+            if data.get('dataFim'):
+                end = datetime.strptime(data['dataFim'], '%Y-%m-%d').date()
+                query = query.filter(Prescription.data <= end)
+        except ValueError:
+            return None, None, ("Data inválida", 400)
+        
+        prescriptions = query.order_by(Prescription.data, Prescription.id).limit(
+            Config.PDF_BATCH_MAX + 1
+        ).all()
+        if len(prescriptions) > Config.PDF_BATCH_MAX:
+            return None, None, (f"Máximo de {Config.PDF_BATCH_MAX} receitas por PDF", 400)
+        if not prescriptions:
+            return None, None, ("Nenhuma receita encontrada", 404)
+        return prescriptions, f'receitas_{patient.nome.replace(" ", "_")}.pdf', None
+    
+    return None, None, ("Informe prescriptionId, ids ou pacienteId", 400)
+
+def prescription_download_name(prescription):
+    return f'receita_{prescription.patient.nome.replace(" ", "_")}_{prescription.data.strftime("%Y%m%d")}.pdf'
+
+@pdf_bp.route('/prescriptions/batch', methods=['POST'])
+def generate_batch_pdf_route():
+    """
+    Gerar um único PDF com várias receitas (uma por página)
+    Aceita {"ids": [...]} ou {"pacienteId": ..., "dataInicio": ..., "dataFim": ...}
+    """
+    try:
+        data = request.get_json() or {}
+        if not data.get('ids') and not data.get('pacienteId'):
+            return error_response("Informe ids ou pacienteId")
         
-        # Criar arquivo temporário
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-        temp_file.write(pdf_buffer.getvalue())
-        temp_file.close()
+        prescriptions, download_name, error = find_pdf_prescriptions(data)
+        if error:
+            return error_response(*error)
         
-        # Retornar arquivo para download
-        return send_file(
-            temp_file.name,
-            as_attachment=True,
-            download_name=f'receita_{prescription.patient.nome.replace(" ", "_")}_{prescription.data.strftime("%Y%m%d")}.pdf',
-            mimetype='application/pdf'
+        return send_prescriptions_pdf(
+            [prescription_pdf_data(prescription) for prescription in prescriptions],
+            download_name
         )
         
     except Exception as e:
         return error_response(f"Erro ao gerar PDF: {str(e)}")
+
+@pdf_bp.route('/jobs', methods=['POST'])
+def submit_pdf_job():
+    """
+    Enfileirar um PDF (mesmo corpo do lote, ou {"prescriptionId": ...}) e responder na hora
+    202 com o job; pedido idêntico em andamento devolve o mesmo job; fila cheia: 503
+    """
+    try:
+        prescriptions, download_name, error = find_pdf_prescriptions(request.get_json() or {})
+        if error:
+            return error_response(*error)
+        
+        job, created = pdf_jobs.submit(
+            [prescription_pdf_data(prescription) for prescription in prescriptions],
+            download_name
+        )
+        response = success_response(job.to_dict())
+        response.status_code = 202 if created else 200
+        response.headers['Location'] = url_for('pdf.get_pdf_job', job_id=job.id)
+        return response
+        
+    except PdfQueueFull as e:
+        response, status = error_response(str(e), 503)
+        response.headers['Retry-After'] = str(Config.PDF_JOB_RETRY_AFTER)
+        return response, status
+    except Exception as e:
+        return error_response(f"Erro ao enfileirar PDF: {str(e)}")
+
+@pdf_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_pdf_job(job_id):
+    """Status do job: pendente, gerando, concluido ou erro"""
+    job = pdf_jobs.get(job_id)
+    if job is None:
+        return error_response("Job de PDF não encontrado", 404)
+    return success_response(job.to_dict())
+
+@pdf_bp.route('/jobs/<job_id>/download', methods=['GET'])
+def download_pdf_job(job_id):
+    """PDF do job concluído (409 enquanto estiver na fila)"""
+    job = pdf_jobs.get(job_id)
+    if job is None:
+        return error_response("Job de PDF não encontrado", 404)
+    if job.status == FAILED:
+        return error_response(job.error, 500)
+    if job.status != DONE:
+        return error_response("PDF ainda não está pronto", 409)
+    
+    source = pdf_jobs.open_result(job)
+    if source is None:
+        return error_response("PDF removido do cache; envie o pedido novamente", 410)
+    
+    return send_file(
+        source,
+        as_attachment=True,
+        download_name=job.download_name,
+        mimetype='application/pdf',
+        etag=job.id,
+        conditional=True
+    )
@@ -5,20 +5,50 @@ API Routes para Receitas Médicas - Campos opcionais flexíveis
 
 from flask import Blueprint, request
 from database import db
-from models import Prescription, Patient, Medicine
-from utils.api_response import api_response_wrapper, success_response, error_response
+from models import Prescription, Patient
+from utils.api_response import api_response_wrapper, conditional_response, success_response, error_response
+from utils.fieldsets import prescription_fields
+from utils.medicine_catalog import medicine_catalog
+from utils.pagination import InvalidParameter, Page, get_page_args, paginate_keyset
 from datetime import datetime
-import json
 
 prescriptions_bp = Blueprint('prescriptions', __name__)
 
+EXPANDABLE = ('medicamentos', 'paciente')
+
+def get_expand_args():
+    """?expand=medicamentos,paciente -> conjunto validado das expansões pedidas"""
+    expand = {name.strip() for name in request.args.get('expand', '').split(',') if name.strip()}
+    invalid = expand.difference(EXPANDABLE)
+    if invalid:
+        raise InvalidParameter(f"expand inválido: {', '.join(sorted(invalid))} (use {', '.join(EXPANDABLE)})")
+    return expand
+
 @prescriptions_bp.route('', methods=['GET'])
+@conditional_response('prescriptions', 'medicines', 'patients')
 @api_response_wrapper
 def get_prescriptions():
-    """Listar todas as receitas"""
+    """
+    Listar receitas paginadas por (created_at, id), mais recentes primeiro
+    expand=medicamentos,paciente: dados completos na mesma resposta (paciente vem no join
+    da página, medicamentos do catálogo em memória; nenhuma consulta por receita)
+    fields=id,data,pacienteId: só as colunas (e relacionamentos) desses campos são lidos;
+    com fields, expand só detalha campos pedidos (paciente vem pelo campo 'paciente')
+    """
     patient_id = request.args.get('patient_id')
+    cursor, limit = get_page_args()
+    expand = get_expand_args()
+    fields = prescription_fields.parse()
     
-    query = Prescription.query
+    if fields:
+        for name in sorted(expand):
+            if name not in fields:
+                raise InvalidParameter(f"expand={name} exige o campo {name} em fields")
+        query = Prescription.query.options(
+            *prescription_fields.load_options(fields, Prescription.created_at)
+        )
+    else:
+        query = Prescription.query_with_details()
     
     if patient_id:
         # Buscar por public_id do paciente
@@ -26,20 +56,29 @@ def get_prescriptions():
         if patient:
             query = query.filter_by(patient_id=patient.id)
         else:
-            return []
+            return Page([], None)
     
-    prescriptions = query.order_by(Prescription.created_at.desc()).all()
-    return [prescription.to_dict() for prescription in prescriptions]
+    page = paginate_keyset(
+        query, [Prescription.created_at, Prescription.id], cursor, limit, descending=True
+    )
+    if fields:
+        return Page(
+            [prescription_fields.serialize(prescription, fields, expand) for prescription in page.items],
+            page.next_cursor
+        )
+    return Page([prescription.to_dict(expand) for prescription in page.items], page.next_cursor)
 
 @prescriptions_bp.route('/<prescription_id>', methods=['GET'])
+@conditional_response('prescriptions', 'medicines', 'patients')
 @api_response_wrapper
 def get_prescription(prescription_id):
-    """Obter uma receita específica por public_id"""
-    prescription = Prescription.query.filter_by(public_id=prescription_id).first()
+    """Obter uma receita específica por public_id (aceita expand como a listagem)"""
+    expand = get_expand_args()
+    prescription = Prescription.query_with_details().filter_by(public_id=prescription_id).first()
     if not prescription:
         raise Exception("Receita não encontrada")
     
-    return prescription.to_dict()
+    return prescription.to_dict(expand)
 
 @prescriptions_bp.route('', methods=['POST'])
 def create_prescription():
@@ -65,8 +104,8 @@ def create_prescription():
             if not med_data.get('medicamentoId'):
                 return error_response("ID do medicamento é obrigatório")
             
-            # Verificar se o medicamento existe (por public_id)
-            medicine = Medicine.query.filter_by(public_id=med_data['medicamentoId']).first()
+            # Verificar se o medicamento existe (catálogo em memória)
+            medicine = medicine_catalog.get(med_data['medicamentoId'])
             if not medicine:
                 return error_response(f"Medicamento {med_data['medicamentoId']} não encontrado")
             
@@ -97,9 +136,9 @@ def create_prescription():
         prescription = Prescription(
             patient_id=patient.id,
             data=prescription_date,
-            observacoes=observacoes,
-            medicamentos_json=json.dumps(medicamentos_list)
+            observacoes=observacoes
         )
+        prescription.set_medicamentos(medicamentos_list)
         
         # Data de vencimento se fornecida
         if data.get('dataVencimento'):
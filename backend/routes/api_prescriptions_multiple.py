@@ -4,9 +4,11 @@ Integração com a funcionalidade de múltiplas datas
 """
 
 from flask import Blueprint, request
-from models import Patient, Prescription, Medicine
+from models import Patient, Prescription
 from database import db
 from utils.api_response import success_response, error_response
+from utils.medicine_catalog import medicine_catalog
+from utils.prescription_campaign import create_campaign, plan_campaign
 from datetime import datetime
 
 multiple_prescriptions_bp = Blueprint('multiple_prescriptions', __name__)
@@ -38,6 +40,11 @@ def create_multiple_prescriptions():
         if not enabled_dates:
             return error_response("Nenhuma data foi selecionada", 400)
         
+        # Validar medicamentos uma única vez para todas as datas
+        medicine_ids = {med.get('medicamentoId') for med in data['medicamentos']}
+        if len(medicine_catalog.get_many(medicine_ids)) != len(medicine_ids):
+            return error_response("Medicamento não encontrado", 404)
+        
         created_prescriptions = []
         
         # Criar uma receita para cada data habilitada
@@ -53,7 +60,7 @@ def create_multiple_prescriptions():
                     observacoes=data.get('observacoes', ''),
                 )
                 
-                # Definir medicamentos (JSON)
+                # Definir medicamentos (prescription_items)
                 prescription.set_medicamentos(data['medicamentos'])
                 
                 db.session.add(prescription)
@@ -77,4 +84,26 @@ def create_multiple_prescriptions():
         
     except Exception as e:
         db.session.rollback()
-        return error_response(f"Erro ao criar múltiplas receitas: {str(e)}")
\ No newline at end of file
+        return error_response(f"Erro ao criar múltiplas receitas: {str(e)}")
+
+
+@multiple_prescriptions_bp.route('/prescriptions/campaign', methods=['POST'])
+def create_campaign_prescriptions():
+    """
+    Campanha: mesmos medicamentos para vários pacientes em várias datas
+    {"pacientes": [ids], "medicamentos": [...], "datas": ["2025-01-10", ...], "observacoes": ...}
+    Tudo ou nada: qualquer paciente ou medicamento inválido cancela a campanha
+    """
+    try:
+        plan, error = plan_campaign(request.get_json(silent=True))
+        if error:
+            return error_response(*error)
+        
+        summary = create_campaign(plan)
+        return success_response(
+            summary,
+            f"Criadas {summary['receitas']} receitas para {summary['pacientes']} pacientes"
+        )
+        
+    except Exception as e:
+        return error_response(f"Erro ao criar campanha: {str(e)}")
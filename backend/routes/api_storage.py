@@ -0,0 +1,52 @@
+"""
+API Routes para acompanhamento do armazenamento SQLite
+"""
+
+from flask import Blueprint, current_app, request
+from config import Config
+from storage import get_storage
+from utils.api_response import api_response_wrapper, error_response, success_response
+from utils.retention import RetentionRunner, preview_purge, retention_cutoff
+
+storage_bp = Blueprint('storage', __name__)
+
+@storage_bp.route('/storage/status', methods=['GET'])
+@api_response_wrapper
+def get_storage_status():
+    """Tamanho do WAL, atraso do checkpoint e última manutenção"""
+    return get_storage().stats()
+
+def get_retention_runner():
+    """Execução em segundo plano do app atual (criada no primeiro uso)"""
+    app = current_app._get_current_object()
+    return app.extensions.setdefault('sismed_retention', RetentionRunner(app))
+
+@storage_bp.route('/storage/retention', methods=['GET'])
+@api_response_wrapper
+def get_retention_status():
+    """Progresso da última limpeza por retenção"""
+    return get_retention_runner().status()
+
+@storage_bp.route('/storage/retention', methods=['POST'])
+def start_retention():
+    """
+    Limpeza das receitas anteriores ao prazo de retenção, em segundo plano
+    Aceita {"dias": 365, "simular": true, "arquivar": false}; a simulação responde na hora
+    Com arquivar (padrão RETENTION_ARCHIVE), anos encerrados vão para os arquivos anuais
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        archive = bool(data.get('arquivar', Config.RETENTION_ARCHIVE))
+        cutoff = retention_cutoff(int(data['dias']) if data.get('dias') is not None else None, archive)
+    except (TypeError, ValueError):
+        return error_response("dias deve ser um número inteiro")
+    
+    if data.get('simular'):
+        return success_response(preview_purge(cutoff))
+    
+    runner = get_retention_runner()
+    if not runner.start(cutoff, archive):
+        return error_response("Já existe uma limpeza em andamento", 409)
+    response = success_response(runner.status())
+    response.status_code = 202
+    return response
@@ -7,6 +7,8 @@ Popula tabela de medicamentos com lista padrão oficial atualizada
 from app import create_app
 from database import db
 from models import Medicine
+from sqlalchemy.exc import IntegrityError
+from utils.medicine_catalog import medicine_catalog
 import json
 
 # Lista oficial atualizada de 36 medicamentos especializados - Perobal PR
@@ -100,6 +102,7 @@ def seed_medicines():
         # Commit todas as inserções/atualizações
         try:
             db.session.commit()
+            medicine_catalog.invalidate()
             print(f"✅ {inserted} medicamentos inseridos, {updated} atualizados com sucesso!")
             print(f"📋 Total de medicamentos oficiais: {len(MEDICAMENTOS_OFICIAIS_PEROBAL)}")
             print("🏥 Lista oficial da Secretaria Municipal de Saúde de Perobal - PR")
@@ -113,8 +116,14 @@ def clear_and_reseed():
     
     with app.app_context():
         print("🗑️  Limpando tabela de medicamentos...")
-        Medicine.query.delete()
-        db.session.commit()
+        try:
+            Medicine.query.delete()
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            print("❌ Há receitas com esses medicamentos; a tabela não foi limpa")
+            return
+        medicine_catalog.invalidate()
         
         print("🔄 Reinserindo medicamentos oficiais...")
         seed_medicines()
@@ -0,0 +1,100 @@
+"""
+Servidor de produção do SisMed Perobal v9.0 (waitress, multi-thread, sem debug)
+Uso: python server.py [--host 0.0.0.0] [--port 5001] [--threads 8]
+
+Um único processo com várias threads: catálogo de medicamentos, versões das
+tabelas (ETags) e métricas ficam em memória e precisam ser os mesmos para todas
+as requisições. PDFs em lote já usam processos próprios (PDF_WORKERS).
+Para desenvolvimento continue usando python app.py (reloader e debugger)
+"""
+
+import argparse
+import signal
+import threading
+import time
+
+from waitress import create_server
+from werkzeug.wsgi import ClosingIterator
+
+from app import create_app
+from config import Config
+from migrations import start_background_migrations
+
+class InFlightRequests:
+    """Middleware WSGI que conta as requisições em andamento para aguardá-las ao encerrar"""
+
+    def __init__(self, app):
+        self.app = app
+        self._active = 0
+        self._idle = threading.Condition()
+
+    def __call__(self, environ, start_response):
+        with self._idle:
+            self._active += 1
+        try:
+            # Respostas em fluxo (exportações) só terminam quando o iterável é fechado
+            return ClosingIterator(self.app(environ, start_response), self._finished)
+        except BaseException:
+            self._finished()
+            raise
+
+    def _finished(self):
+        with self._idle:
+            self._active -= 1
+            self._idle.notify_all()
+
+    def wait(self, timeout):
+        """Espera até não haver requisições em andamento; False se o prazo acabar antes"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._active == 0, timeout)
+
+def serve(host=None, port=None, threads=None):
+    app = create_app()
+    app.debug = False
+    start_background_migrations(app)
+
+    in_flight = InFlightRequests(app)
+    server = create_server(
+        in_flight,
+        host=host or Config.SERVER_HOST,
+        port=port or Config.SERVER_PORT,
+        threads=threads or Config.SERVER_THREADS,
+        connection_limit=Config.SERVER_CONNECTION_LIMIT,
+        channel_timeout=Config.SERVER_CHANNEL_TIMEOUT,
+        ident='SisMed',
+    )
+
+    shutdown_deadline = []
+
+    def request_shutdown(signum, frame):
+        # KeyboardInterrupt é o encerramento do próprio waitress: o run() sai do laço
+        # (nenhuma conexão nova é aceita) e espera um pouco pelas threads
+        shutdown_deadline.append(time.monotonic() + Config.SERVER_SHUTDOWN_TIMEOUT)
+        raise KeyboardInterrupt
+
+    for name in ('SIGINT', 'SIGTERM', 'SIGBREAK'):  # SIGBREAK: Ctrl+Break no Windows
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), request_shutdown)
+
+    print(f"🚀 SisMed Perobal v9.0 em produção ({server.adj.threads} threads)")
+    print(f"📱 Acesse: http://localhost:{server.effective_port}")
+    try:
+        server.run()
+        if shutdown_deadline:
+            remaining = shutdown_deadline[0] - time.monotonic()
+            if not in_flight.wait(max(remaining, 0)):
+                print("⚠️  Encerrado com requisições ainda em andamento")
+    finally:
+        server.close()
+        maintenance = app.extensions.get('sismed_storage')
+        if maintenance is not None:
+            maintenance.stop()
+    print("👋 Servidor encerrado")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog='server.py')
+    parser.add_argument('--host', help=f'padrão {Config.SERVER_HOST}')
+    parser.add_argument('--port', type=int, help=f'padrão {Config.SERVER_PORT}')
+    parser.add_argument('--threads', type=int, help=f'padrão {Config.SERVER_THREADS}')
+    args = parser.parse_args()
+    serve(args.host, args.port, args.threads)
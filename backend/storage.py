@@ -0,0 +1,131 @@
+"""
+Perfil de armazenamento SQLite: WAL, pragmas por conexão e manutenção em segundo plano
+Permite vários balcões lendo enquanto um grava, sem "database is locked"
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import event
+
+from config import Config
+from database import db
+
+class StorageMaintenance:
+    """Checkpoint do WAL, ANALYZE (PRAGMA optimize) e incremental vacuum periódicos"""
+
+    def __init__(self, app):
+        self.app = app
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_checkpoint = None  # (busy, frames no WAL, frames copiados para o banco)
+        self.last_checkpoint_at = None
+        self.last_analyze_at = None
+        self.last_vacuum_at = None
+        self.last_error = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='sismed-storage', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        next_analyze = time.monotonic() + Config.SQLITE_ANALYZE_INTERVAL
+        while not self._stop.wait(Config.SQLITE_CHECKPOINT_INTERVAL):
+            with self.app.app_context():
+                try:
+                    self.checkpoint()
+                    if time.monotonic() >= next_analyze:
+                        self.analyze()
+                        self.incremental_vacuum()
+                        next_analyze = time.monotonic() + Config.SQLITE_ANALYZE_INTERVAL
+                    self.last_error = None
+                except Exception as e:
+                    # Banco ocupado ou indisponível: tenta de novo no próximo ciclo
+                    self.last_error = str(e)
+
+    def checkpoint(self, mode='PASSIVE'):
+        """Copia páginas do WAL para o banco sem bloquear leitores nem escritores"""
+        with db.engine.connect() as conn:
+            self.last_checkpoint = tuple(
+                conn.exec_driver_sql(f"PRAGMA wal_checkpoint({mode})").fetchone()
+            )
+        self.last_checkpoint_at = datetime.now()
+        return self.last_checkpoint
+
+    def analyze(self):
+        """Atualiza as estatísticas do planejador só onde necessário"""
+        with db.engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA optimize")
+        self.last_analyze_at = datetime.now()
+
+    def incremental_vacuum(self):
+        """Devolve páginas livres ao sistema (bancos com auto_vacuum=INCREMENTAL)"""
+        with db.engine.connect() as conn:
+            conn.exec_driver_sql(f"PRAGMA incremental_vacuum({Config.SQLITE_VACUUM_PAGES})")
+            conn.commit()
+        self.last_vacuum_at = datetime.now()
+
+    def stats(self):
+        """Tamanho do WAL, atraso do checkpoint e estado da manutenção"""
+        database_path = db.engine.url.database
+        wal_path = f'{database_path}-wal'
+        wal_bytes = os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
+
+        with db.engine.connect() as conn:
+            page_size = conn.exec_driver_sql("PRAGMA page_size").scalar()
+            page_count = conn.exec_driver_sql("PRAGMA page_count").scalar()
+            freelist_count = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+            journal_mode = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+
+        checkpoint_lag = None
+        if self.last_checkpoint is not None:
+            _, log_frames, checkpointed_frames = self.last_checkpoint
+            checkpoint_lag = max(log_frames - checkpointed_frames, 0)
+
+        return {
+            'journalMode': journal_mode,
+            'databaseBytes': page_size * page_count,
+            'freelistBytes': page_size * freelist_count,
+            'walBytes': wal_bytes,
+            'checkpointLagFrames': checkpoint_lag,
+            'lastCheckpoint': self.last_checkpoint_at.isoformat() if self.last_checkpoint_at else None,
+            'lastAnalyze': self.last_analyze_at.isoformat() if self.last_analyze_at else None,
+            'lastVacuum': self.last_vacuum_at.isoformat() if self.last_vacuum_at else None,
+            'lastError': self.last_error,
+        }
+
+def _apply_pragmas(dbapi_connection, connection_record):
+    """Executado em cada nova conexão do pool"""
+    cursor = dbapi_connection.cursor()
+    # Só vale para bancos novos (antes da primeira tabela) ou após um VACUUM completo
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    cursor.execute(f"PRAGMA busy_timeout = {Config.SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA journal_mode = WAL")
+    cursor.execute(f"PRAGMA journal_size_limit = {Config.SQLITE_WAL_SIZE_LIMIT}")
+    cursor.execute(f"PRAGMA synchronous = {Config.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA cache_size = -{Config.SQLITE_CACHE_SIZE_KIB}")
+    cursor.execute(f"PRAGMA mmap_size = {Config.SQLITE_MMAP_SIZE}")
+    cursor.execute("PRAGMA temp_store = MEMORY")
+    # SQLite só aplica as chaves estrangeiras declaradas nos modelos com este pragma
+    cursor.execute("PRAGMA foreign_keys = ON")
+    cursor.close()
+
+def init_storage(app):
+    """Aplica o perfil SQLite ao engine e inicia a manutenção (chamada no create_app)"""
+    event.listen(db.engine, 'connect', _apply_pragmas)
+
+    maintenance = StorageMaintenance(app)
+    app.extensions['sismed_storage'] = maintenance
+    if Config.SQLITE_MAINTENANCE_ENABLED:
+        maintenance.start()
+    return maintenance
+
+def get_storage():
+    """Manutenção do app atual (para relatórios)"""
+    from flask import current_app
+    return current_app.extensions['sismed_storage']
@@ -0,0 +1,72 @@
+"""
+Fixtures dos testes do backend: app com banco SQLite temporário e dados mínimos
+Rodar a partir de backend/: python -m pytest
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from config import Config
+from database import db
+from models import Medicine, Patient, Prescription
+from utils.medicine_catalog import medicine_catalog
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'sismed_teste.db'}")
+    monkeypatch.setattr(Config, 'SQLITE_MAINTENANCE_ENABLED', False)
+    monkeypatch.setattr(Config, 'ARCHIVE_DIR', str(tmp_path / 'arquivo'))
+    monkeypatch.setattr(Config, 'PDF_TEMP_DIR', str(tmp_path / 'pdfs'))
+    monkeypatch.setattr(Config, 'RETENTION_STATE_FILE', str(tmp_path / 'retencao_estado.json'))
+
+    app = create_app()
+    app.config['TESTING'] = True
+    medicine_catalog.invalidate()  # Catálogo em memória é do processo, não do banco
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    medicine_catalog.invalidate()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def seed_prescriptions(app):
+    """seed_prescriptions(n): cria n receitas (com 2 itens cada) para pacientes variados"""
+    def seed(count):
+        with app.app_context():
+            medicines = Medicine.query.order_by(Medicine.id).all()
+            if not medicines:
+                medicines = [
+                    Medicine(denominacao_generica=f'MEDICAMENTO {number}', concentracao='10MG',
+                             apresentacao='COMPRIMIDO')
+                    for number in range(3)
+                ]
+                db.session.add_all(medicines)
+                db.session.commit()
+                medicine_catalog.invalidate()
+
+            patients = []
+            for number in range(count):
+                patient = Patient(nome=f'PACIENTE {Patient.query.count() + number:05d}')
+                patients.append(patient)
+            db.session.add_all(patients)
+            db.session.flush()
+
+            for number, patient in enumerate(patients):
+                prescription = Prescription(patient_id=patient.id, observacoes='TESTE')
+                prescription.set_medicamentos([
+                    {'medicamentoId': medicines[number % 3].public_id, 'posologia': '1 AO DIA'},
+                    {'medicamentoId': medicines[(number + 1) % 3].public_id, 'posologia': ''},
+                ])
+                db.session.add(prescription)
+            db.session.commit()
+    return seed
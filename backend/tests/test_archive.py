@@ -0,0 +1,105 @@
+"""
+Arquivos anuais: receitas de anos encerrados saem do banco e continuam no histórico
+"""
+
+import sqlite3
+from datetime import date, datetime
+
+from database import db
+from models import Medicine, Patient, Prescription
+from utils.archive import archive_path, archived_prescriptions, upgrade_archives
+from utils.medicine_catalog import medicine_catalog
+from utils.retention import purge_prescriptions
+
+def _patient_with_prescription(nome, data):
+    medicine = Medicine.query.first()
+    if medicine is None:
+        medicine = Medicine(denominacao_generica='DIPIRONA', concentracao='500MG', apresentacao='COMPRIMIDO')
+        db.session.add(medicine)
+        db.session.commit()
+        medicine_catalog.invalidate()
+
+    patient = Patient(nome=nome, created_at=datetime(2019, 1, 1))
+    db.session.add(patient)
+    db.session.flush()
+    prescription = Prescription(patient_id=patient.id, data=data, created_at=datetime(data.year, data.month, data.day))
+    prescription.set_medicamentos([{'medicamentoId': medicine.public_id, 'posologia': '1 AO DIA'}])
+    db.session.add(prescription)
+    db.session.commit()
+    return patient.public_id, prescription.public_id
+
+def _archive_before(cutoff, tmp_path):
+    purge_prescriptions(cutoff, pause=0, state_path=str(tmp_path / 'estado.json'),
+                        archive=True, log=lambda *args: None)
+
+def test_archived_prescription_stays_in_patient_history(app, client, tmp_path):
+    with app.app_context():
+        patient_id, old_id = _patient_with_prescription('ANA', date(2020, 3, 1))
+        _archive_before(date(2021, 1, 1), tmp_path)
+        assert Prescription.query.count() == 0
+
+    history = client.get(f'/api/patients/{patient_id}/prescriptions').get_json()['data']
+
+    assert [(item['id'], item['arquivo']) for item in history] == [(old_id, 2020)]
+    assert history[0]['medicamentos'][0]['posologia'] == '1 AO DIA'
+    assert client.get(f'/api/patients/{patient_id}/prescriptions?dataInicio=2021-01-01').get_json()['data'] == []
+
+def test_reused_patient_id_does_not_see_archived_history(app, client, tmp_path):
+    with app.app_context():
+        ana_id, _ = _patient_with_prescription('ANA', date(2020, 3, 1))
+        _archive_before(date(2021, 1, 1), tmp_path)
+        ana_internal_id = Patient.query.filter_by(public_id=ana_id).one().id
+
+    assert client.delete(f'/api/patients/{ana_id}').status_code == 200
+
+    with app.app_context():
+        # Banco antigo sem AUTOINCREMENT: o novo cadastro recebe o id que ficou livre
+        bruno = Patient(id=ana_internal_id, nome='BRUNO')
+        db.session.add(bruno)
+        db.session.commit()
+        bruno_id = bruno.public_id
+
+        with sqlite3.connect(archive_path(2020)) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM prescriptions").fetchone() == (0,)
+
+    assert client.get(f'/api/patients/{bruno_id}/prescriptions').get_json()['data'] == []
+
+def test_patient_ids_are_not_reused(app):
+    with app.app_context():
+        first = Patient(nome='ANA')
+        db.session.add(first)
+        db.session.commit()
+        first_id = first.id
+        db.session.delete(first)
+        db.session.commit()
+
+        second = Patient(nome='BRUNO')
+        db.session.add(second)
+        db.session.commit()
+        assert second.id != first_id
+
+def test_upgrade_assigns_archived_rows_only_to_their_owner(app, tmp_path):
+    with app.app_context():
+        ana_id, _ = _patient_with_prescription('ANA', date(2020, 3, 1))
+        _archive_before(date(2021, 1, 1), tmp_path)
+        ana = Patient.query.filter_by(public_id=ana_id).one()
+
+        # Arquivo no formato anterior: sem patient_public_id, mais uma receita de um
+        # paciente excluído cujo id foi reutilizado por um cadastro posterior
+        later = Patient(nome='CADASTRO POSTERIOR', created_at=datetime(2022, 1, 1))
+        db.session.add(later)
+        db.session.commit()
+        with sqlite3.connect(archive_path(2020)) as conn:
+            conn.execute("DROP INDEX ix_arquivo_prescriptions_patient_public_id_data")
+            conn.execute("ALTER TABLE prescriptions DROP COLUMN patient_public_id")
+            conn.execute(
+                "INSERT INTO prescriptions (id, public_id, patient_id, data, medicamentos_json, created_at) "
+                "VALUES (999, 'receita-de-excluido', ?, '2020-06-01', '[]', '2020-06-01 00:00:00.000000')",
+                (later.id,)
+            )
+
+        assert upgrade_archives() == [2020]
+        assert upgrade_archives() == []
+
+        assert [item['arquivo'] for item in archived_prescriptions(ana)] == [2020]
+        assert archived_prescriptions(later) == []
@@ -0,0 +1,62 @@
+"""
+Exportação em fluxo de receitas e pacientes (CSV ou NDJSON)
+"""
+
+import csv
+import io
+import json
+from datetime import date
+
+from config import Config
+from database import db
+from models import Prescription
+from utils.patient_import import iter_records, normalize_patient_record
+
+def test_prescriptions_csv_has_one_row_per_medicine(client, seed_prescriptions):
+    seed_prescriptions(2)
+
+    response = client.get('/api/export/prescriptions?format=csv')
+
+    assert response.mimetype == 'text/csv'
+    assert 'receitas.csv' in response.headers['Content-Disposition']
+    text = response.get_data(as_text=True)
+    assert text.startswith('\ufeff')
+    rows = list(csv.DictReader(io.StringIO(text[1:]), delimiter=';'))
+    assert len(rows) == 4
+    assert len({row['id'] for row in rows}) == 2
+    assert all(row['denominacaoGenerica'].startswith('MEDICAMENTO') for row in rows)
+
+def test_prescriptions_ndjson_across_batches_and_date_filter(app, client, seed_prescriptions, monkeypatch):
+    seed_prescriptions(3)
+    with app.app_context():
+        old = Prescription.query.order_by(Prescription.id).first()
+        old.data = date(2020, 1, 15)
+        db.session.commit()
+        old_id = old.public_id
+    monkeypatch.setattr(Config, 'EXPORT_BATCH_SIZE', 1)
+
+    lines = client.get('/api/export/prescriptions?format=ndjson').get_data(as_text=True).splitlines()
+    records = [json.loads(line) for line in lines]
+    assert len(records) == 3
+    assert all(len(record['medicamentos']) == 2 for record in records)
+    assert records[0]['id'] == old_id  # Ordenado pela data da receita
+
+    filtered = client.get('/api/export/prescriptions?format=ndjson&dataFim=2020-12-31').get_data(as_text=True)
+    assert [json.loads(line)['id'] for line in filtered.splitlines()] == [old_id]
+
+def test_patients_csv_goes_back_through_the_importer(client):
+    client.post('/api/patients', json={'nome': 'Ana Souza', 'cpf': '12345678901', 'dataNascimento': '1980-05-01'})
+    client.post('/api/patients', json={'nome': 'Bruno Lima'})
+
+    response = client.get('/api/export/patients?format=csv')
+    records = list(iter_records(io.BytesIO(response.data), 'csv'))
+
+    rows = [normalize_patient_record(record)[0] for _, record in records]
+    assert [(row['nome'], row['cpf_digits'], row['data_nascimento']) for row in rows] == [
+        ('ANA SOUZA', '12345678901', date(1980, 5, 1)),
+        ('BRUNO LIMA', None, None),
+    ]
+
+def test_invalid_export_arguments(client):
+    assert client.get('/api/export/patients?format=xml').status_code == 400
+    assert client.get('/api/export/prescriptions?dataInicio=01/02/2024').status_code == 400
@@ -0,0 +1,73 @@
+"""
+fields= nas listagens e buscas: só as colunas pedidas são lidas e enviadas
+"""
+
+from utils.sql_profiler import query_budget
+
+def _patient_selects(profile):
+    return [
+        record.statement for record in profile.records
+        if 'FROM patients' in record.statement and 'table_versions' not in record.statement
+    ]
+
+def test_patient_fields_read_only_requested_columns(client, seed_prescriptions):
+    seed_prescriptions(3)
+
+    with query_budget(10) as profile:
+        response = client.get('/api/patients?fields=id,nome')
+
+    assert response.status_code == 200
+    assert all(set(patient) == {'id', 'nome'} for patient in response.get_json()['data'])
+    [statement] = _patient_selects(profile)
+    selected = statement.split('FROM')[0]
+    assert 'public_id' in selected and 'nome' in selected
+    for column in ('cpf', 'data_nascimento', 'created_at'):
+        assert column not in selected
+
+def test_keyset_cursor_works_with_load_only(client, seed_prescriptions):
+    seed_prescriptions(7)
+    full = [patient['id'] for patient in client.get('/api/patients?limit=100').get_json()['data']]
+
+    paged, cursor = [], None
+    while True:
+        url = '/api/patients?fields=id&limit=3' + (f'&cursor={cursor}' if cursor else '')
+        body = client.get(url).get_json()
+        paged += [patient['id'] for patient in body['data']]
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+
+    assert paged == full
+
+def test_prescription_fields_skip_text_blobs(client, seed_prescriptions):
+    seed_prescriptions(3)
+
+    with query_budget(10) as profile:
+        response = client.get('/api/prescriptions?fields=id,data')
+
+    assert response.status_code == 200
+    assert all(set(prescription) == {'id', 'data'} for prescription in response.get_json()['data'])
+    selects = [record.statement for record in profile.records if 'FROM prescriptions' in record.statement]
+    assert len(selects) == 1
+    assert 'medicamentos_json' not in selects[0] and 'observacoes' not in selects[0]
+    assert 'prescription_items' not in ' '.join(record.statement for record in profile.records)
+
+def test_invalid_fields_and_expand_without_field_are_client_errors(client):
+    response = client.get('/api/patients?fields=bogus')
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith('fields inválido: bogus')
+
+    response = client.get('/api/prescriptions?fields=id&expand=paciente')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'expand=paciente exige o campo paciente em fields'
+
+def test_prescription_fields_with_patient_and_expanded_medicines(client, seed_prescriptions):
+    seed_prescriptions(2)
+
+    response = client.get('/api/prescriptions?fields=id,paciente,medicamentos&expand=medicamentos,paciente')
+
+    assert response.status_code == 200
+    for prescription in response.get_json()['data']:
+        assert set(prescription) == {'id', 'paciente', 'medicamentos'}
+        assert prescription['paciente']['nome'].startswith('PACIENTE')
+        assert all(med['medicamento']['id'] == med['medicamentoId'] for med in prescription['medicamentos'])
@@ -0,0 +1,40 @@
+"""
+Autocomplete de medicamentos: prefixo, trecho da palavra e erro de digitação, sem acentos
+"""
+
+import pytest
+
+def _names(response):
+    return [medicine['nome'] for medicine in response.get_json()['data']]
+
+@pytest.fixture
+def medicines(client):
+    created = {}
+    for nome, dosagem, apresentacao in [('DIPIRONA SÓDICA', '500MG', 'COMPRIMIDO'),
+                                        ('PARACETAMOL', '750MG', 'COMPRIMIDO'),
+                                        ('AMOXICILINA', '250MG/5ML', 'SUSPENSÃO ORAL'),
+                                        ('ÁCIDO ACETILSALICÍLICO', '100MG', 'COMPRIMIDO')]:
+        response = client.post('/api/medicines', json={'nome': nome, 'dosagem': dosagem, 'apresentacao': apresentacao})
+        created[nome] = response.get_json()['data']['id']
+    return created
+
+def test_prefix_accent_substring_and_typo(client, medicines):
+    assert _names(client.get('/api/medicines/search?q=dip')) == ['DIPIRONA SÓDICA']
+    assert _names(client.get('/api/medicines/search?q=acido acetil')) == ['ÁCIDO ACETILSALICÍLICO']
+    assert _names(client.get('/api/medicines/search?q=cetamol')) == ['PARACETAMOL']
+    assert _names(client.get('/api/medicines/search?q=amoxicilna')) == ['AMOXICILINA']
+    assert _names(client.get('/api/medicines/search?q=suspensao')) == ['AMOXICILINA']
+
+def test_name_prefix_ranks_before_other_fields(client, medicines):
+    client.post('/api/medicines', json={'nome': 'LORATADINA', 'dosagem': '1MG/ML', 'apresentacao': 'XAROPE PARA'})
+    assert _names(client.get('/api/medicines/search?q=para'))[0] == 'PARACETAMOL'
+
+def test_index_follows_catalog_changes(client, medicines):
+    assert _names(client.get('/api/medicines/search?q=dip')) == ['DIPIRONA SÓDICA']
+
+    client.put(f"/api/medicines/{medicines['DIPIRONA SÓDICA']}", json={'nome': 'METAMIZOL'})
+    assert _names(client.get('/api/medicines/search?q=dip')) == []
+    assert _names(client.get('/api/medicines/search?q=metam')) == ['METAMIZOL']
+
+    client.delete(f"/api/medicines/{medicines['PARACETAMOL']}")
+    assert _names(client.get('/api/medicines/search?q=paracetamol')) == []
@@ -0,0 +1,57 @@
+"""
+Exclusão de medicamentos: os usados em receitas continuam no catálogo
+"""
+
+import json
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from database import db
+from models import Medicine, Patient, Prescription, PrescriptionItem
+
+def test_medicine_in_prescription_items_cannot_be_deleted(app, client, seed_prescriptions):
+    seed_prescriptions(1)
+    with app.app_context():
+        prescription = Prescription.query.first()
+        prescription_id = prescription.public_id
+        medicine_id = prescription.get_medicamentos()[0]['medicamentoId']
+
+    response = client.delete(f'/api/medicines/{medicine_id}')
+
+    assert response.status_code == 409
+    medicamentos = client.get(f'/api/prescriptions/{prescription_id}').get_json()['data']['medicamentos']
+    assert medicine_id in [med['medicamentoId'] for med in medicamentos]
+
+def test_medicine_in_legacy_json_cannot_be_deleted(app, client, seed_prescriptions):
+    seed_prescriptions(1)
+    with app.app_context():
+        medicine = Medicine(denominacao_generica='SÓ NO LEGADO', concentracao='1MG', apresentacao='GOTAS')
+        db.session.add(medicine)
+        db.session.flush()
+        db.session.add(Prescription(
+            patient_id=Patient.query.first().id,
+            medicamentos_json=json.dumps([{'medicamentoId': medicine.public_id, 'posologia': ''}])
+        ))
+        db.session.commit()
+        medicine_id = medicine.public_id
+
+    assert client.delete(f'/api/medicines/{medicine_id}').status_code == 409
+
+def test_unused_medicine_is_deleted(app, client):
+    with app.app_context():
+        medicine = Medicine(denominacao_generica='SEM RECEITAS', concentracao='5MG', apresentacao='COMPRIMIDO')
+        db.session.add(medicine)
+        db.session.commit()
+        medicine_id = medicine.public_id
+
+    assert client.delete(f'/api/medicines/{medicine_id}').status_code == 200
+    assert client.get(f'/api/medicines/{medicine_id}').status_code != 200
+
+def test_foreign_keys_are_enforced(app, seed_prescriptions):
+    seed_prescriptions(1)
+    with app.app_context():
+        item = PrescriptionItem.query.first()
+        with pytest.raises(IntegrityError):
+            db.session.execute(db.delete(Medicine).where(Medicine.id == item.medicine_id))
+        db.session.rollback()
@@ -0,0 +1,45 @@
+"""
+Paginação keyset: cursores válidos percorrem tudo, cursores forjados respondem 400
+"""
+
+import base64
+import json
+
+import pytest
+
+def _cursor(values):
+    raw = json.dumps(values).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def test_cursor_walks_every_row_once(client, seed_prescriptions):
+    seed_prescriptions(7)
+
+    seen, cursor = [], None
+    while True:
+        url = '/api/patients?limit=3' + (f'&cursor={cursor}' if cursor else '')
+        body = client.get(url).get_json()
+        seen.extend(patient['id'] for patient in body['data'])
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+
+    assert len(seen) == len(set(seen)) == 7
+
+@pytest.mark.parametrize('endpoint, cursor', [
+    ('/api/prescriptions', _cursor(['abc', 1])),
+    ('/api/prescriptions', _cursor([{'a': 1}, 1])),
+    ('/api/prescriptions', _cursor(['2024-01-01T00:00:00', 'x'])),
+    ('/api/patients', _cursor([{'a': 1}, 1])),
+    ('/api/patients', _cursor(['ANA', [1]])),
+    ('/api/patients', _cursor(['ANA', True])),
+    ('/api/patients', _cursor(['ANA'])),
+    ('/api/medicines', _cursor([1.5, 1])),
+    ('/api/medicines', 'não é base64'),
+])
+def test_malformed_cursor_is_a_client_error(client, seed_prescriptions, endpoint, cursor):
+    seed_prescriptions(1)
+
+    response = client.get(endpoint, query_string={'cursor': cursor})
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Cursor de paginação inválido'
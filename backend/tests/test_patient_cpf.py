@@ -0,0 +1,43 @@
+"""
+CPF normalizado (patients.cpf_digits): busca exata com ou sem máscara e um cadastro por CPF
+"""
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from database import db
+from models import Patient
+
+def test_lookup_by_cpf_with_or_without_mask(client):
+    created = client.post('/api/patients', json={'nome': 'Ana', 'cpf': '123.456.789-01'}).get_json()['data']
+
+    for cpf in ('12345678901', '123.456.789-01'):
+        response = client.get(f'/api/patients/cpf/{cpf}')
+        assert response.status_code == 200
+        assert response.get_json()['data']['id'] == created['id']
+
+    assert client.get('/api/patients/cpf/10987654321').status_code == 404
+    assert client.get('/api/patients/cpf/123').status_code == 400
+
+def test_duplicate_cpf_returns_existing_patient(client):
+    existing = client.post('/api/patients', json={'nome': 'Ana', 'cpf': '12345678901'}).get_json()['data']
+
+    response = client.post('/api/patients', json={'nome': 'Outra Ana', 'cpf': '123.456.789-01'})
+    assert response.status_code == 409
+    assert response.get_json()['data']['id'] == existing['id']
+
+    other = client.post('/api/patients', json={'nome': 'Bruno'}).get_json()['data']
+    response = client.put(f"/api/patients/{other['id']}", json={'cpf': '123.456.789.01'})
+    assert response.status_code == 409
+
+def test_unique_index_rejects_duplicates_outside_the_api(app):
+    with app.app_context():
+        db.session.add(Patient(nome='ANA', cpf='123.456.789-01'))
+        db.session.commit()
+        assert Patient.query.one().cpf_digits == '12345678901'
+
+        db.session.add(Patient(nome='OUTRA', cpf='12345678901'))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+        assert Patient.query.count() == 1
@@ -0,0 +1,73 @@
+"""
+Importação em massa de pacientes (utils/patient_import e importar_pacientes.py)
+"""
+
+import io
+
+import utils.patient_import
+from database import db
+from models import Patient
+from utils.patient_import import import_patients, iter_records
+
+def _csv(text):
+    return iter_records(io.BytesIO(text.encode('utf-8')), 'csv')
+
+def test_import_reports_errors_per_line(app):
+    source = (
+        "nome;cpf;dataNascimento\n"
+        "ana souza;111.111.111-11;1980-05-01\n"
+        ";22222222222;\n"
+        "bruno lima;123;\n"
+        "carla dias;33333333333;01/02/1990\n"
+        "daniel reis;11111111111;\n"
+        "elisa melo;;\n"
+    )
+    with app.app_context():
+        summary = import_patients(_csv(source), chunk_size=2)
+
+        assert summary['total'] == 6
+        assert summary['inserted'] == 2
+        assert {error['linha']: error['erro'] for error in summary['errors']} == {
+            3: "Nome é obrigatório",
+            4: "CPF inválido",
+            5: "Data de nascimento inválida",
+            6: "CPF repetido no arquivo (linha 2)",
+        }
+        assert sorted(patient.nome for patient in Patient.query) == ['ANA SOUZA', 'ELISA MELO']
+
+def test_cpf_already_registered_is_a_line_error(app, client):
+    client.post('/api/patients', json={'nome': 'Ana', 'cpf': '11111111111'})
+    with app.app_context():
+        summary = import_patients(_csv("nome,cpf\nAna Souza,111.111.111-11\nBruno,22222222222\n"))
+
+        assert summary['inserted'] == 1
+        assert summary['errors'] == [{'linha': 2, 'erro': "CPF já cadastrado"}]
+
+def test_concurrent_cpf_insert_falls_back_to_row_by_row(app, monkeypatch):
+    with app.app_context():
+        db.session.add(Patient(nome='JÁ CADASTRADO', cpf='333.333.333-33'))
+        db.session.commit()
+
+        # Outra conexão grava o CPF depois da consulta do lote
+        monkeypatch.setattr(utils.patient_import, '_existing_cpfs', lambda digits: set())
+        summary = import_patients(_csv(
+            "nome,cpf\n"
+            "Ana,11111111111\n"
+            "Bruno,22222222222\n"
+            "Carla,33333333333\n"
+            "Daniel,44444444444\n"
+        ), chunk_size=2)
+
+        assert summary['inserted'] == 3
+        assert summary['errors'] == [{'linha': 4, 'erro': "CPF já cadastrado"}]
+        assert Patient.query.count() == 4
+
+def test_ndjson_import_endpoint(client):
+    body = b'{"nome": "ana"}\n\nnao e json\n{"nome": "bruno", "cpf": "44444444444"}\n'
+    response = client.post('/api/patients/import?format=ndjson', data=body,
+                           content_type='application/x-ndjson')
+
+    summary = response.get_json()['data']
+    assert summary['inserted'] == 2
+    assert summary['errors'] == [{'linha': 3, 'erro': "Linha inválida"}]
+    assert client.get('/api/patients/cpf/444.444.444-44').status_code == 200
@@ -0,0 +1,38 @@
+"""
+Busca de pacientes: nome sem acentos por prefixo (FTS5) e CPF parcial
+"""
+
+import pytest
+
+def _names(response):
+    return [patient['nome'] for patient in response.get_json()['data']]
+
+@pytest.fixture
+def patients(client):
+    for nome, cpf in [('João da Silva', '12345678901'), ('Joana Souza', '98765432100'),
+                      ('Maria José Silveira', None), ('Ana Paula', '12399988877')]:
+        client.post('/api/patients', json={'nome': nome, 'cpf': cpf})
+
+def test_name_search_ignores_accents_and_matches_prefixes(app, client, patients):
+    assert app.config['PATIENT_FTS_ENABLED']
+    assert _names(client.get('/api/patients/search?q=joao')) == ['JOÃO DA SILVA']
+    assert sorted(_names(client.get('/api/patients/search?q=jo sil'))) == ['JOÃO DA SILVA', 'MARIA JOSÉ SILVEIRA']
+    assert _names(client.get('/api/patients/search?q=xyz')) == []
+
+def test_index_follows_renames_and_deletes(client, patients):
+    [joana] = client.get('/api/patients/search?q=joana').get_json()['data']
+    client.put(f"/api/patients/{joana['id']}", json={'nome': 'JOANA FERREIRA'})
+    assert _names(client.get('/api/patients/search?q=ferreira')) == ['JOANA FERREIRA']
+    assert _names(client.get('/api/patients/search?q=souza')) == []
+
+    client.delete(f"/api/patients/{joana['id']}")
+    assert _names(client.get('/api/patients/search?q=joana')) == []
+
+def test_like_fallback_without_fts(app, client, patients):
+    app.config['PATIENT_FTS_ENABLED'] = False
+    assert sorted(_names(client.get('/api/patients/search?q=silv'))) == ['JOÃO DA SILVA', 'MARIA JOSÉ SILVEIRA']
+
+def test_cpf_search_by_prefix_or_full_number(client, patients):
+    assert sorted(_names(client.get('/api/patients/search?q=123'))) == ['ANA PAULA', 'JOÃO DA SILVA']
+    assert _names(client.get('/api/patients/search?q=123.456')) == ['JOÃO DA SILVA']
+    assert _names(client.get('/api/patients/search?q=123.456.789-01')) == ['JOÃO DA SILVA']
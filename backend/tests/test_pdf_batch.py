@@ -0,0 +1,66 @@
+"""
+PDF em lote: várias receitas em um arquivo, na ordem pedida, em um ou vários processos
+"""
+
+from io import BytesIO
+
+from pypdf import PdfReader
+
+from config import Config
+from models import Prescription
+from utils.pdf_generator import prescription_pdf_data, render_prescriptions_pdf
+
+def _prescription_ids(app, count):
+    with app.app_context():
+        return [prescription.public_id for prescription in Prescription.query.order_by(Prescription.id).limit(count)]
+
+def _patient_names(app, ids):
+    with app.app_context():
+        by_id = {p.public_id: p.patient.nome for p in Prescription.query.filter(Prescription.public_id.in_(ids))}
+    return [by_id[public_id] for public_id in ids]
+
+def _page_texts(pdf_bytes):
+    return [page.extract_text() for page in PdfReader(BytesIO(pdf_bytes)).pages]
+
+def test_batch_pdf_has_one_page_per_prescription_in_request_order(app, client, seed_prescriptions):
+    seed_prescriptions(3)
+    ids = list(reversed(_prescription_ids(app, 3)))
+
+    response = client.post('/api/pdf/prescriptions/batch', json={'ids': ids})
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/pdf'
+    pages = _page_texts(response.data)
+    assert len(pages) == 3
+    for page, nome in zip(pages, _patient_names(app, ids)):
+        assert nome in page
+
+def test_batch_pdf_errors(app, client, seed_prescriptions, monkeypatch):
+    seed_prescriptions(2)
+    ids = _prescription_ids(app, 2)
+
+    assert client.post('/api/pdf/prescriptions/batch', json={}).status_code == 400
+    response = client.post('/api/pdf/prescriptions/batch', json={'ids': ids + ['nao-existe']})
+    assert response.status_code == 404
+    assert 'nao-existe' in response.get_json()['error']
+
+    monkeypatch.setattr(Config, 'PDF_BATCH_MAX', 1)
+    assert client.post('/api/pdf/prescriptions/batch', json={'ids': ids}).status_code == 400
+
+def test_parallel_render_matches_single_process(app, seed_prescriptions, monkeypatch):
+    seed_prescriptions(4)
+    with app.app_context():
+        data_list = [
+            prescription_pdf_data(prescription)
+            for prescription in Prescription.query_with_details().order_by(Prescription.id)
+        ]
+
+    monkeypatch.setattr(Config, 'PDF_WORKERS', 1)
+    single = _page_texts(render_prescriptions_pdf(data_list))
+
+    monkeypatch.setattr(Config, 'PDF_WORKERS', 2)
+    monkeypatch.setattr(Config, 'PDF_PARALLEL_MIN_BATCH', 2)
+    merged = _page_texts(render_prescriptions_pdf(data_list))
+
+    assert len(merged) == 4
+    assert merged == single
@@ -0,0 +1,56 @@
+"""
+Cache de PDFs em disco: reimpressão sem ReportLab, chave pelo conteúdo, limite de tamanho
+"""
+
+import os
+
+import routes.api_pdf
+from config import Config
+from models import Prescription
+from utils.pdf_cache import PdfCache
+
+def _count_renders(monkeypatch):
+    calls = []
+    render = routes.api_pdf.render_prescriptions_pdf
+
+    def counting_render(data_list, offload=False):
+        calls.append(len(data_list))
+        return render(data_list, offload)
+
+    monkeypatch.setattr(routes.api_pdf, 'render_prescriptions_pdf', counting_render)
+    return calls
+
+def test_reprint_is_served_from_cache_until_content_changes(app, client, seed_prescriptions, monkeypatch):
+    seed_prescriptions(1)
+    with app.app_context():
+        prescription = Prescription.query.first()
+        prescription_id, patient_id = prescription.public_id, prescription.patient.public_id
+    calls = _count_renders(monkeypatch)
+
+    first = client.get(f'/api/pdf/prescription/{prescription_id}')
+    second = client.get(f'/api/pdf/prescription/{prescription_id}')
+    assert calls == [1]
+    assert first.data == second.data
+    assert client.get(f'/api/pdf/prescription/{prescription_id}',
+                      headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    client.put(f'/api/patients/{patient_id}', json={'nome': 'NOME CORRIGIDO'})
+    third = client.get(f'/api/pdf/prescription/{prescription_id}')
+    assert calls == [1, 1]
+    assert third.headers['ETag'] != first.headers['ETag']
+
+    # Só PDFs finais no diretório: nenhum temporário esquecido
+    assert sorted(name.endswith('.pdf') for name in os.listdir(Config.PDF_TEMP_DIR)) == [True, True]
+
+def test_least_recently_used_pdfs_are_evicted(tmp_path):
+    cache = PdfCache(directory=str(tmp_path), max_bytes=350)
+    for number, key in enumerate(['a', 'b', 'c']):
+        cache.put(key, b'x' * 100)
+        os.utime(cache.path_for(key), (1000 + number, 1000 + number))
+
+    cache.open('a').close()  # Acesso recente: 'b' passa a ser o mais antigo
+    cache.put('d', b'x' * 100)
+
+    assert not cache.exists('b')
+    assert all(cache.exists(key) for key in ('a', 'c', 'd'))
+    assert cache.open('b') is None
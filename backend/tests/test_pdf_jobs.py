@@ -0,0 +1,86 @@
+"""
+Fila assíncrona de PDFs: 202 com o job, status, download, pedidos repetidos e fila cheia
+"""
+
+import threading
+import time
+from io import BytesIO
+
+import pytest
+from pypdf import PdfReader
+
+import utils.pdf_jobs
+from models import Prescription
+from utils.pdf_jobs import DONE, PdfJobQueue, PdfQueueFull
+
+def _wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('tempo esgotado')
+        time.sleep(0.01)
+
+def _wait_done(client, location, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(location).get_json()['data']
+        if job['status'] not in ('pendente', 'gerando'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError('job de PDF não terminou')
+
+def test_job_is_queued_polled_and_downloaded(app, client, seed_prescriptions):
+    seed_prescriptions(2)
+    with app.app_context():
+        ids = [prescription.public_id for prescription in Prescription.query]
+
+    response = client.post('/api/pdf/jobs', json={'ids': ids})
+    assert response.status_code == 202
+    location = response.headers['Location']
+
+    job = _wait_done(client, location)
+    assert job['status'] == DONE
+    assert job['receitas'] == 2
+
+    download = client.get(f'{location}/download')
+    assert download.status_code == 200
+    assert len(PdfReader(BytesIO(download.data)).pages) == 2
+
+    # Mesmo conteúdo já gerado: o mesmo job, pronto na hora
+    again = client.post('/api/pdf/jobs', json={'ids': ids})
+    assert again.status_code == 200
+    assert again.get_json()['data']['id'] == job['id']
+
+def test_unknown_job_and_invalid_request(client):
+    assert client.get('/api/pdf/jobs/nao-existe').status_code == 404
+    assert client.post('/api/pdf/jobs', json={}).status_code == 400
+
+@pytest.fixture
+def blocked_render(monkeypatch):
+    """Geração que só termina quando o teste liberar"""
+    release = threading.Event()
+
+    def render(data_list, offload=False):
+        release.wait(10)
+        return b'%PDF-1.4 teste'
+
+    monkeypatch.setattr(utils.pdf_jobs, 'render_prescriptions_pdf', render)
+    yield release
+    release.set()
+
+def test_identical_requests_share_the_job_and_full_queue_is_refused(app, blocked_render):
+    jobs = PdfJobQueue(workers=1, max_queued=1)
+    with app.app_context():
+        running, created = jobs.submit([{'n': 1}], 'a.pdf')
+        assert created
+        _wait_for(lambda: running.status == 'gerando')  # A única thread pegou o primeiro job
+
+        assert jobs.submit([{'n': 1}], 'a.pdf') == (running, False)
+        queued, _ = jobs.submit([{'n': 2}], 'b.pdf')  # Ocupa a única vaga da fila
+        with pytest.raises(PdfQueueFull):
+            jobs.submit([{'n': 3}], 'c.pdf')
+
+        blocked_render.set()
+        _wait_for(lambda: queued.status == DONE)
+        assert running.status == DONE
+        assert jobs.open_result(queued).read() == b'%PDF-1.4 teste'
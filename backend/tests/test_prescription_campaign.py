@@ -0,0 +1,52 @@
+"""
+Campanhas de receitas: validação do pedido e criação em lote
+"""
+
+import pytest
+
+from models import Medicine, Patient, Prescription
+
+def _ids(app):
+    with app.app_context():
+        patients = [patient.public_id for patient in Patient.query.order_by(Patient.id)]
+        medicines = [medicine.public_id for medicine in Medicine.query.order_by(Medicine.id)]
+    return patients, medicines
+
+@pytest.mark.parametrize('body, message', [
+    ([], "Corpo da requisição deve ser um objeto JSON"),
+    ({'pacientes': [1], 'medicamentos': [{'medicamentoId': 'x'}], 'datas': ['2025-01-10']},
+     "pacientes deve ser uma lista de ids de paciente"),
+    ({'pacientes': 'abc', 'medicamentos': [{'medicamentoId': 'x'}], 'datas': ['2025-01-10']},
+     "pacientes deve ser uma lista de ids de paciente"),
+    ({'pacientes': ['abc'], 'medicamentos': ['x'], 'datas': ['2025-01-10']},
+     "Cada medicamento deve ser um objeto com medicamentoId"),
+    ({'pacientes': ['abc'], 'medicamentos': [{'medicamentoId': 7}], 'datas': ['2025-01-10']},
+     "Cada medicamento deve ser um objeto com medicamentoId"),
+    ({'pacientes': ['abc'], 'medicamentos': [{'medicamentoId': 'x', 'posologia': 3}], 'datas': ['2025-01-10']},
+     "posologia deve ser texto"),
+    ({'pacientes': ['abc'], 'medicamentos': [{'medicamentoId': 'x'}], 'datas': '2025-01-10'},
+     "datas deve ser uma lista"),
+])
+def test_malformed_campaign_is_rejected(client, body, message):
+    response = client.post('/api/prescriptions/campaign', json=body)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == message
+
+def test_campaign_creates_one_prescription_per_patient_and_date(app, client, seed_prescriptions):
+    seed_prescriptions(3)
+    patients, medicines = _ids(app)
+
+    response = client.post('/api/prescriptions/campaign', json={
+        'pacientes': patients,
+        'medicamentos': [{'medicamentoId': medicines[0], 'posologia': '1 ao dia'}],
+        'datas': ['2025-01-10', {'date': '2025-02-10', 'enabled': True}, {'date': '2025-03-10', 'enabled': False}],
+    })
+
+    assert response.status_code == 200
+    summary = response.get_json()['data']
+    assert (summary['receitas'], summary['itens'], summary['pacientes']) == (6, 6, 3)
+    assert summary['datas'] == ['2025-01-10', '2025-02-10']
+    with app.app_context():
+        created = Prescription.query.filter(Prescription.observacoes.is_(None)).all()
+        assert len(created) == 6
+        assert created[0].get_medicamentos() == [{'medicamentoId': medicines[0], 'posologia': '1 AO DIA'}]
@@ -0,0 +1,43 @@
+"""
+expand=medicamentos,paciente nas rotas de receitas
+"""
+
+import json
+
+from database import db
+from models import Medicine, Patient, Prescription
+
+def test_invalid_expand_is_a_client_error(client):
+    response = client.get('/api/prescriptions?expand=foo')
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith('expand inválido: foo')
+
+def test_expand_includes_patient_and_medicine_details(app, client, seed_prescriptions):
+    seed_prescriptions(2)
+    with app.app_context():
+        prescription_id = Prescription.query.first().public_id
+
+    plain = client.get(f'/api/prescriptions/{prescription_id}').get_json()['data']
+    assert 'paciente' not in plain
+    assert all('medicamento' not in med for med in plain['medicamentos'])
+
+    expanded = client.get(f'/api/prescriptions/{prescription_id}?expand=medicamentos,paciente').get_json()['data']
+    assert expanded['paciente']['id'] == expanded['pacienteId']
+    assert [med['medicamento']['id'] for med in expanded['medicamentos']] == \
+        [med['medicamentoId'] for med in plain['medicamentos']]
+
+def test_expand_legacy_json_prescription(app, client, seed_prescriptions):
+    seed_prescriptions(1)
+    with app.app_context():
+        medicine = Medicine.query.first()
+        legacy = Prescription(
+            patient_id=Patient.query.first().id,
+            medicamentos_json=json.dumps([{'medicamentoId': medicine.public_id, 'posologia': 'X'}])
+        )
+        db.session.add(legacy)
+        db.session.commit()
+        legacy_id, medicine_name = legacy.public_id, medicine.denominacao_generica
+
+    data = client.get(f'/api/prescriptions/{legacy_id}?expand=medicamentos').get_json()['data']
+    assert data['medicamentos'][0]['posologia'] == 'X'
+    assert data['medicamentos'][0]['medicamento']['nome'] == medicine_name
@@ -0,0 +1,52 @@
+"""
+Regressão de N+1: o número de comandos SQL para listar e serializar receitas
+não pode crescer com o tamanho do resultado
+"""
+
+from models import Prescription
+from utils.medicine_catalog import medicine_catalog
+from utils.sql_profiler import query_budget
+
+# Orçamento folgado: o que importa é a contagem ser a mesma para N e 10×N
+BUDGET = 10
+
+def _list_statements(client):
+    with query_budget(BUDGET) as profile:
+        response = client.get('/api/prescriptions?limit=500')
+    assert response.status_code == 200
+    return profile.count, len(response.get_json()['data'])
+
+def _to_dict_statements(app, expand):
+    with app.app_context():
+        with query_budget(BUDGET) as profile:
+            prescriptions = Prescription.query_with_details().all()
+            result = [prescription.to_dict(expand) for prescription in prescriptions]
+    return profile.count, result
+
+def test_list_statement_count_does_not_grow(app, client, seed_prescriptions):
+    seed_prescriptions(10)
+    with app.app_context():
+        medicine_catalog.entries()  # Carga do catálogo fora da medição
+    small, small_rows = _list_statements(client)
+
+    seed_prescriptions(90)
+    large, large_rows = _list_statements(client)
+
+    assert (small_rows, large_rows) == (10, 100)
+    assert small == large
+
+def test_to_dict_expand_statement_count_does_not_grow(app, seed_prescriptions):
+    expand = ('medicamentos', 'paciente')
+    seed_prescriptions(10)
+    with app.app_context():
+        medicine_catalog.entries()
+    small, small_result = _to_dict_statements(app, expand)
+
+    seed_prescriptions(90)
+    large, large_result = _to_dict_statements(app, expand)
+
+    assert (len(small_result), len(large_result)) == (10, 100)
+    assert small == large
+    first = large_result[0]
+    assert first['paciente']['id'] == first['pacienteId']
+    assert all(med['medicamento']['id'] == med['medicamentoId'] for med in first['medicamentos'])
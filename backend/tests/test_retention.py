@@ -0,0 +1,83 @@
+"""
+Retenção de receitas: remoção em lotes, retomada após interrupção e execução pela API
+"""
+
+import os
+import time
+from datetime import date
+
+import pytest
+
+from config import Config
+from database import db
+from models import Medicine, Patient, Prescription, PrescriptionItem
+from utils.retention import preview_purge, purge_prescriptions
+
+CUTOFF = date(2021, 1, 1)
+
+@pytest.fixture
+def dated_prescriptions(app, seed_prescriptions):
+    """5 receitas de 2020 e 2 recentes, com 2 itens cada"""
+    seed_prescriptions(7)
+    with app.app_context():
+        for number, prescription in enumerate(Prescription.query.order_by(Prescription.id)):
+            prescription.data = date(2020, 1, number + 1) if number < 5 else date.today()
+        db.session.commit()
+
+def _counts():
+    return Prescription.query.count(), PrescriptionItem.query.count()
+
+def test_purge_removes_only_expired_prescriptions_in_batches(app, dated_prescriptions):
+    with app.app_context():
+        assert preview_purge(CUTOFF)['receitas'] == 5
+        assert preview_purge(CUTOFF)['itens'] == 10
+
+        summary = purge_prescriptions(CUTOFF, batch_size=2, pause=0, log=lambda *args: None)
+
+        assert (summary['receitas'], summary['itens'], summary['retomada']) == (5, 10, False)
+        assert _counts() == (2, 4)
+        assert Patient.query.count() == 7 and Medicine.query.count() == 3
+        assert not os.path.exists(Config.RETENTION_STATE_FILE)
+
+class InterruptAfterFirstBatch(dict):
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        raise KeyboardInterrupt
+
+def test_interrupted_purge_resumes_where_it_stopped(app, dated_prescriptions):
+    with app.app_context():
+        with pytest.raises(KeyboardInterrupt):
+            purge_prescriptions(CUTOFF, batch_size=2, pause=0, progress=InterruptAfterFirstBatch(),
+                                log=lambda *args: None)
+        db.session.rollback()
+        assert _counts() == (5, 10)
+        assert os.path.exists(Config.RETENTION_STATE_FILE)
+
+        # Sem corte: o da execução interrompida prevalece
+        summary = purge_prescriptions(batch_size=2, pause=0, log=lambda *args: None)
+
+        assert (summary['receitas'], summary['corte'], summary['retomada']) == (5, CUTOFF.isoformat(), True)
+        assert _counts() == (2, 4)
+
+def test_retention_through_the_api(client, dated_prescriptions):
+    dias = (date.today() - CUTOFF).days
+    etag = client.get('/api/prescriptions').headers['ETag']
+
+    preview = client.post('/api/storage/retention', json={'dias': dias, 'simular': True}).get_json()['data']
+    assert preview['receitas'] == 5
+
+    response = client.post('/api/storage/retention', json={'dias': dias, 'arquivar': False})
+    assert response.status_code == 202
+    deadline = time.monotonic() + 10
+    while (status := client.get('/api/storage/retention').get_json()['data'])['emAndamento']:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+    assert status['erro'] is None
+    assert status['progresso']['receitas'] == 5
+    listed = client.get('/api/prescriptions', headers={'If-None-Match': etag})
+    assert listed.status_code == 200
+    assert len(listed.get_json()['data']) == 2
+
+def test_invalid_retention_days(client):
+    assert client.post('/api/storage/retention', json={'dias': 'muitos'}).status_code == 400
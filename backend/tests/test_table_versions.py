@@ -0,0 +1,47 @@
+"""
+ETags pelas versões das tabelas: gravações de outro processo também invalidam
+"""
+
+import os
+import subprocess
+import sys
+
+from config import Config
+from database import db
+from models import Patient
+from utils.table_versions import table_versions
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_import_from_another_process_changes_etag(app, client, tmp_path):
+    first = client.get('/api/patients')
+    etag = first.headers['ETag']
+    assert client.get('/api/patients', headers={'If-None-Match': etag}).status_code == 304
+
+    csv_path = tmp_path / 'pacientes.csv'
+    csv_path.write_text('nome,cpf,dataNascimento\nMARIA DA SILVA,,1980-01-02\n', encoding='utf-8')
+    script = (
+        "from config import Config\n"
+        f"Config.SQLALCHEMY_DATABASE_URI = {Config.SQLALCHEMY_DATABASE_URI!r}\n"
+        "Config.SQLITE_MAINTENANCE_ENABLED = False\n"
+        "from importar_pacientes import importar_pacientes\n"
+        f"importar_pacientes({str(csv_path)!r})\n"
+    )
+    subprocess.run([sys.executable, '-c', script], cwd=BACKEND_DIR, check=True, capture_output=True)
+
+    response = client.get('/api/patients', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert [patient['nome'] for patient in response.get_json()['data']] == ['MARIA DA SILVA']
+
+def test_rollback_does_not_advance_version(app):
+    with app.app_context():
+        before = table_versions.version(Patient.__tablename__)
+        db.session.add(Patient(nome='DESFEITO'))
+        db.session.flush()
+        db.session.rollback()
+        assert table_versions.version(Patient.__tablename__) == before
+
+        db.session.add(Patient(nome='GRAVADO'))
+        db.session.commit()
+        assert table_versions.version(Patient.__tablename__) == before + 1
@@ -2,10 +2,13 @@
 """
 Padronização de respostas da API
 Regra arquitetural: todas as respostas seguem o padrão {"data": ..., "error": null}
+O JSON é gerado pelo provider do app (utils/json_provider: orjson quando disponível)
 """
 
 from functools import wraps
-from flask import jsonify
+from flask import current_app, jsonify, request
+from utils.pagination import InvalidParameter, Page
+from utils.table_versions import table_versions
 
 def api_response_wrapper(func):
     """Decorator para padronizar respostas da API"""
@@ -13,10 +16,18 @@ def api_response_wrapper(func):
     def wrapper(*args, **kwargs):
         try:
             result = func(*args, **kwargs)
+            if isinstance(result, Page):
+                return jsonify({
+                    "data": result.items,
+                    "error": None,
+                    "next_cursor": result.next_cursor
+                })
             return jsonify({
                 "data": result,
                 "error": None
             })
+        except InvalidParameter as e:
+            return error_response(str(e), 400)
         except Exception as e:
             return jsonify({
                 "data": None,
@@ -24,12 +35,15 @@ def api_response_wrapper(func):
             }), 500
     return wrapper
 
-def success_response(data):
-    """Retorna resposta de sucesso padronizada"""
-    return jsonify({
+def success_response(data, message=None):
+    """Retorna resposta de sucesso padronizada (message opcional)"""
+    payload = {
         "data": data,
         "error": None
-    })
+    }
+    if message:
+        payload["message"] = message
+    return jsonify(payload)
 
 def error_response(message, status_code=400):
     """Retorna resposta de erro padronizada"""
@@ -37,3 +51,26 @@ def error_response(message, status_code=400):
         "data": None,
         "error": message
     }), status_code
+
+def conditional_response(*tables):
+    """
+    GET condicional: ETag forte pela versão das tabelas das quais a rota depende
+    Se o cliente já tem a versão atual, responde 304 lendo só as versões (sem consultar os dados)
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            etag = table_versions.etag(tables)
+            # Comparação fraca: vale também para a versão comprimida (ETag W/)
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(func(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'  # Sempre revalidar
+            return response
+        return wrapper
+    return decorator
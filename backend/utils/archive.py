@@ -0,0 +1,266 @@
+"""
+Arquivos anuais de receitas: anos encerrados saem do banco principal para
+arquivo/receitas_<ano>.db (mesmas colunas, mesmos ids)
+Os arquivos só são anexados (ATTACH, somente leitura) quando o período de uma
+consulta alcança o ano deles; o banco principal fica pequeno e o histórico do
+paciente continua completo
+As receitas arquivadas guardam o public_id do paciente (patient_public_id): o id
+interno pode ser reutilizado por outro cadastro depois que o paciente é excluído
+"""
+
+import json
+import os
+import re
+from datetime import date
+
+from sqlalchemy import Column, Index, MetaData, String, Table, create_engine, delete, select
+
+from config import Config
+from database import db
+from models import Patient, Prescription, PrescriptionItem
+from utils.medicine_catalog import medicine_catalog
+
+_ARCHIVE_FILE = re.compile(r'^receitas_(\d{4})\.db$')
+_metadata_by_schema = {}
+
+def archive_path(year):
+    return os.path.join(Config.ARCHIVE_DIR, f'receitas_{year}.db')
+
+def archived_years():
+    """Anos com arquivo em disco, do mais antigo ao mais recente"""
+    if not os.path.isdir(Config.ARCHIVE_DIR):
+        return []
+    years = []
+    for name in os.listdir(Config.ARCHIVE_DIR):
+        match = _ARCHIVE_FILE.match(name)
+        if match:
+            years.append(int(match.group(1)))
+    return sorted(years)
+
+def archive_tables(schema=None):
+    """
+    (receitas, itens) com as colunas dos modelos, sem chaves estrangeiras
+    (pacientes e medicamentos ficam no banco principal), mais patient_public_id
+    nas receitas; schema = nome do ATTACH
+    """
+    metadata = _metadata_by_schema.get(schema)
+    if metadata is None:
+        metadata = MetaData(schema=schema)
+        for model in (Prescription, PrescriptionItem):
+            Table(model.__tablename__, metadata, *[
+                Column(column.name, column.type, primary_key=column.primary_key)
+                for column in model.__table__.columns
+            ])
+        prescriptions = metadata.tables[_qualified(schema, Prescription.__tablename__)]
+        items = metadata.tables[_qualified(schema, PrescriptionItem.__tablename__)]
+        prescriptions.append_column(Column('patient_public_id', String(36)))
+        Index('ix_arquivo_prescriptions_patient_data', prescriptions.c.patient_id, prescriptions.c.data)
+        Index('ix_arquivo_prescriptions_patient_public_id_data',
+              prescriptions.c.patient_public_id, prescriptions.c.data)
+        Index('ix_arquivo_prescriptions_public_id', prescriptions.c.public_id, unique=True)
+        Index('ix_arquivo_items_prescription_position', items.c.prescription_id, items.c.position, unique=True)
+        _metadata_by_schema[schema] = metadata
+
+    return (metadata.tables[_qualified(schema, Prescription.__tablename__)],
+            metadata.tables[_qualified(schema, PrescriptionItem.__tablename__)])
+
+def _qualified(schema, name):
+    return f'{schema}.{name}' if schema else name
+
+def ensure_archive(year):
+    """Cria o arquivo do ano (tabelas e índices) se ainda não existir"""
+    path = archive_path(year)
+    if os.path.exists(path):
+        return path
+    os.makedirs(Config.ARCHIVE_DIR, exist_ok=True)
+    engine = create_engine(f'sqlite:///{path}')
+    try:
+        archive_tables()[0].metadata.create_all(engine)
+    finally:
+        engine.dispose()
+    return path
+
+def _attach(conn, year, read_only):
+    schema = f'arquivo_{year}'
+    path = os.path.abspath(archive_path(year)).replace('\\', '/')
+    # mode=ro: o arquivo não pode ser alterado pelas consultas (requer uri=True na conexão)
+    target = f'file:{path}?mode=ro' if read_only else path
+    conn.exec_driver_sql(f"ATTACH DATABASE ? AS {schema}", (target,))
+    return schema
+
+def _detach(conn, schema):
+    conn.exec_driver_sql(f"DETACH DATABASE {schema}")
+
+def _upgrade_archive(conn, schema):
+    """
+    Arquivos criados antes de patient_public_id: adiciona a coluna e a preenche pelo
+    banco principal. Cadastro criado depois da receita não pode ser o dono dela (id
+    reutilizado); essas receitas ficam sem paciente e não aparecem em nenhum histórico
+    """
+    columns = {row[1] for row in conn.exec_driver_sql(f"PRAGMA {schema}.table_info(prescriptions)")}
+    if 'patient_public_id' in columns:
+        return False
+
+    conn.exec_driver_sql(f"ALTER TABLE {schema}.prescriptions ADD COLUMN patient_public_id VARCHAR(36)")
+    conn.exec_driver_sql(
+        f"UPDATE {schema}.prescriptions SET patient_public_id = ("
+        "SELECT patients.public_id FROM main.patients AS patients "
+        "WHERE patients.id = prescriptions.patient_id "
+        "AND (patients.created_at IS NULL OR patients.created_at <= prescriptions.created_at))"
+    )
+    for index in archive_tables(schema)[0].indexes:
+        index.create(conn, checkfirst=True)
+    conn.commit()
+    return True
+
+def upgrade_archives():
+    """Atualiza os arquivos anuais existentes para o formato atual (chamada nas migrações)"""
+    upgraded = []
+    with db.engine.connect() as conn:
+        for year in archived_years():
+            schema = _attach(conn, year, read_only=False)
+            try:
+                if _upgrade_archive(conn, schema):
+                    upgraded.append(year)
+            finally:
+                conn.rollback()
+                _detach(conn, schema)
+    return upgraded
+
+def archive_batch(low, high, cutoff):
+    """
+    Copia as receitas (e itens) da faixa de ids anteriores ao corte para os
+    arquivos dos respectivos anos. Cópia e remoção (em retention) são transações
+    separadas: se o processo parar entre as duas, a repetição não duplica nada
+    """
+    prescription_table = Prescription.__table__
+    item_table = PrescriptionItem.__table__
+    patient_table = Patient.__table__
+    in_batch = (prescription_table.c.id.between(low, high)) & (prescription_table.c.data < cutoff)
+
+    with db.engine.connect() as conn:
+        years = conn.execute(
+            select(prescription_table.c.data).where(in_batch).distinct()
+        ).scalars().all()
+        conn.rollback()
+
+        for year in sorted({value.year for value in years}):
+            ensure_archive(year)
+            schema = _attach(conn, year, read_only=False)
+            try:
+                _upgrade_archive(conn, schema)
+                prescriptions, items = archive_tables(schema)
+                of_year = in_batch & prescription_table.c.data.between(date(year, 1, 1), date(year, 12, 31))
+                conn.execute(
+                    prescriptions.insert().prefix_with('OR IGNORE').from_select(
+                        [column.name for column in prescription_table.columns] + ['patient_public_id'],
+                        select(prescription_table, patient_table.c.public_id)
+                        .join(patient_table, patient_table.c.id == prescription_table.c.patient_id)
+                        .where(of_year)
+                    )
+                )
+                conn.execute(
+                    items.insert().prefix_with('OR IGNORE').from_select(
+                        [column.name for column in item_table.columns],
+                        select(item_table).where(
+                            item_table.c.prescription_id.in_(select(prescription_table.c.id).where(of_year))
+                        )
+                    )
+                )
+                conn.commit()
+            finally:
+                conn.rollback()  # DETACH não é permitido com transação aberta
+                _detach(conn, schema)
+
+def archived_prescriptions(patient, start=None, end=None, expand=()):
+    """
+    Receitas arquivadas do paciente no período (dicts no formato da API, com 'arquivo')
+    expand: mesmas opções de Prescription.to_dict()
+    Só os anos que o período alcança são anexados, um de cada vez
+    """
+    years = [
+        year for year in archived_years()
+        if (start is None or year >= start.year) and (end is None or year <= end.year)
+    ]
+    if not years:
+        return []
+
+    results = []
+    with db.engine.connect() as conn:
+        for year in years:
+            schema = _attach(conn, year, read_only=True)
+            try:
+                prescriptions, items = archive_tables(schema)
+                query = select(prescriptions).where(prescriptions.c.patient_public_id == patient.public_id)
+                if start is not None:
+                    query = query.where(prescriptions.c.data >= start)
+                if end is not None:
+                    query = query.where(prescriptions.c.data <= end)
+                rows = conn.execute(query).all()
+
+                items_by_prescription = {}
+                if rows:
+                    item_rows = conn.execute(
+                        select(items).where(items.c.prescription_id.in_([row.id for row in rows]))
+                        .order_by(items.c.prescription_id, items.c.position)
+                    ).all()
+                    for item in item_rows:
+                        items_by_prescription.setdefault(item.prescription_id, []).append(item)
+
+                results.extend(
+                    _archived_dict(row, items_by_prescription.get(row.id, []), patient, year, expand)
+                    for row in rows
+                )
+            finally:
+                conn.rollback()
+                _detach(conn, schema)
+    return results
+
+def delete_archived_prescriptions(patient):
+    """Remove as receitas arquivadas do paciente (e itens) de todos os anos; retorna quantas"""
+    deleted = 0
+    with db.engine.connect() as conn:
+        for year in archived_years():
+            schema = _attach(conn, year, read_only=False)
+            try:
+                prescriptions, items = archive_tables(schema)
+                of_patient = select(prescriptions.c.id).where(prescriptions.c.patient_public_id == patient.public_id)
+                conn.execute(delete(items).where(items.c.prescription_id.in_(of_patient)))
+                deleted += conn.execute(
+                    delete(prescriptions).where(prescriptions.c.patient_public_id == patient.public_id)
+                ).rowcount
+                conn.commit()
+            finally:
+                conn.rollback()
+                _detach(conn, schema)
+    return deleted
+
+def _archived_dict(row, items, patient, year, expand=()):
+    """Mesmo formato de Prescription.to_dict()"""
+    if row.medicamentos_json:
+        medicamentos = json.loads(row.medicamentos_json)
+    else:
+        medicamentos = []
+        for item in items:
+            medicine = medicine_catalog.get_by_id(item.medicine_id)
+            if medicine is not None:
+                medicamentos.append({'medicamentoId': medicine.public_id, 'posologia': item.posologia or ''})
+
+    if 'medicamentos' in expand:
+        for med in medicamentos:
+            medicine = medicine_catalog.get(med.get('medicamentoId'))
+            med['medicamento'] = medicine.to_dict() if medicine is not None else None
+
+    result = {
+        'id': row.public_id,
+        'pacienteId': patient.public_id,
+        'data': row.data.isoformat(),
+        'dataVencimento': row.data_vencimento.isoformat() if row.data_vencimento else None,
+        'medicamentos': medicamentos,
+        'observacoes': row.observacoes or '',
+        'created_at': row.created_at.isoformat(),
+        'arquivo': year,
+    }
+    if 'paciente' in expand:
+        result['paciente'] = patient.to_dict()
+    return result
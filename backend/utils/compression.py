@@ -0,0 +1,49 @@
+"""
+Compressão gzip/deflate das respostas da API conforme o Accept-Encoding
+Só respostas JSON/texto completas (não em fluxo) acima de Config.COMPRESS_MIN_SIZE
+"""
+
+import gzip
+import zlib
+
+from flask import request
+
+from config import Config
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/')
+
+def choose_encoding():
+    """Codificação preferida pelo cliente entre as suportadas (gzip ganha no empate)"""
+    return request.accept_encodings.best_match(['gzip', 'deflate'])
+
+def compress_response(response):
+    """Hook after_request: comprime o corpo e ajusta cabeçalhos"""
+    if (response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or not response.mimetype.startswith(COMPRESSIBLE_MIMETYPES)):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+
+    body = response.get_data()
+    if len(body) < Config.COMPRESS_MIN_SIZE:
+        return response
+
+    if encoding == 'gzip':
+        body = gzip.compress(body, compresslevel=Config.COMPRESS_LEVEL, mtime=0)
+    else:
+        body = zlib.compress(body, Config.COMPRESS_LEVEL)
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+
+    # Mesmo conteúdo em outra codificação: a ETag passa a ser fraca (If-None-Match usa comparação fraca)
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
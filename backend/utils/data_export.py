@@ -0,0 +1,159 @@
+"""
+Exportação em fluxo de receitas e pacientes (CSV ou NDJSON)
+Consultas Core com yield_per: o banco é lido em lotes e cada lote é escrito e
+descartado antes do próximo, então a memória não cresce com o período exportado
+"""
+
+import csv
+import io
+import json
+from datetime import timedelta
+
+from config import Config
+from database import db
+from models import Patient, Prescription, PrescriptionItem
+from utils.medicine_catalog import medicine_catalog
+
+PATIENT_COLUMNS = ['id', 'nome', 'cpf', 'dataNascimento', 'created_at']
+
+# CSV de receitas: uma linha por medicamento (dados da receita repetidos)
+PRESCRIPTION_COLUMNS = [
+    'id', 'data', 'dataVencimento', 'pacienteId', 'pacienteNome', 'pacienteCpf',
+    'medicamentoId', 'denominacaoGenerica', 'concentracao', 'apresentacao', 'posologia',
+    'observacoes', 'created_at',
+]
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+def iter_patients(start=None, end=None, batch_size=None):
+    """Gera lotes de pacientes (dicts no formato da API), filtrando pela data de cadastro"""
+    query = db.select(
+        Patient.public_id, Patient.nome, Patient.cpf, Patient.data_nascimento, Patient.created_at
+    )
+    if start:
+        query = query.where(Patient.created_at >= start)
+    if end:
+        query = query.where(Patient.created_at < end + timedelta(days=1))
+    query = query.order_by(Patient.id).execution_options(
+        yield_per=batch_size or Config.EXPORT_BATCH_SIZE
+    )
+
+    for rows in db.session.execute(query).partitions():
+        yield [
+            {
+                'id': row.public_id,
+                'nome': row.nome,
+                'cpf': row.cpf,
+                'dataNascimento': _isoformat(row.data_nascimento),
+                'created_at': _isoformat(row.created_at),
+            }
+            for row in rows
+        ]
+
+def _load_items(prescription_ids):
+    """Itens de um lote de receitas em uma consulta: {prescription_id: [(medicine_id, posologia)]}"""
+    items = {}
+    query = db.select(
+        PrescriptionItem.prescription_id, PrescriptionItem.medicine_id, PrescriptionItem.posologia
+    ).where(
+        PrescriptionItem.prescription_id.in_(prescription_ids)
+    ).order_by(PrescriptionItem.prescription_id, PrescriptionItem.position)
+
+    for prescription_id, medicine_id, posologia in db.session.execute(query):
+        items.setdefault(prescription_id, []).append((medicine_id, posologia))
+    return items
+
+def _medicamento(medicine, posologia):
+    return {
+        'medicamentoId': medicine.public_id,
+        'denominacaoGenerica': medicine.denominacao_generica,
+        'concentracao': medicine.concentracao,
+        'apresentacao': medicine.apresentacao,
+        'posologia': posologia or '',
+    }
+
+def _resolve_medicamentos(row, items):
+    """Medicamentos da receita pelo catálogo em memória (itens ou JSON legado)"""
+    medicamentos = []
+    if row.medicamentos_json:
+        # Receita ainda não migrada para prescription_items
+        for med in json.loads(row.medicamentos_json):
+            medicine = medicine_catalog.get(med['medicamentoId'])
+            if medicine is not None:
+                medicamentos.append(_medicamento(medicine, med.get('posologia')))
+        return medicamentos
+
+    for medicine_id, posologia in items.get(row.id, ()):
+        medicine = medicine_catalog.get_by_id(medicine_id)
+        if medicine is not None:  # Medicamento excluído do catálogo
+            medicamentos.append(_medicamento(medicine, posologia))
+    return medicamentos
+
+def iter_prescriptions(start=None, end=None, batch_size=None):
+    """Gera lotes de receitas com paciente e medicamentos, filtrando pela data da receita"""
+    query = db.select(
+        Prescription.id, Prescription.public_id, Prescription.data, Prescription.data_vencimento,
+        Prescription.medicamentos_json, Prescription.observacoes, Prescription.created_at,
+        Patient.public_id.label('paciente_id'), Patient.nome.label('paciente_nome'),
+        Patient.cpf.label('paciente_cpf'),
+    ).join(Patient, Prescription.patient_id == Patient.id)
+    if start:
+        query = query.where(Prescription.data >= start)
+    if end:
+        query = query.where(Prescription.data <= end)
+    query = query.order_by(Prescription.data, Prescription.id).execution_options(
+        yield_per=batch_size or Config.EXPORT_BATCH_SIZE
+    )
+
+    for rows in db.session.execute(query).partitions():
+        items = _load_items([row.id for row in rows if not row.medicamentos_json])
+        yield [
+            {
+                'id': row.public_id,
+                'data': _isoformat(row.data),
+                'dataVencimento': _isoformat(row.data_vencimento),
+                'pacienteId': row.paciente_id,
+                'pacienteNome': row.paciente_nome,
+                'pacienteCpf': row.paciente_cpf,
+                'medicamentos': _resolve_medicamentos(row, items),
+                'observacoes': row.observacoes or '',
+                'created_at': _isoformat(row.created_at),
+            }
+            for row in rows
+        ]
+
+def flatten_prescription(prescription):
+    """Linhas do CSV de uma receita: uma por medicamento"""
+    base = {key: value for key, value in prescription.items() if key != 'medicamentos'}
+    if not prescription['medicamentos']:
+        return [base]
+    return [dict(base, **medicamento) for medicamento in prescription['medicamentos']]
+
+def stream_csv(batches, columns, flatten=None):
+    """
+    CSV com BOM e ';' (abre direto no Excel em português e volta pelo importador)
+    Cada lote vira um único pedaço da resposta
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, delimiter=';', extrasaction='ignore')
+    buffer.write('\ufeff')
+    writer.writeheader()
+
+    for batch in batches:
+        for record in batch:
+            writer.writerows(flatten(record) if flatten else [record])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def stream_ndjson(batches):
+    """Um objeto JSON por linha"""
+    for batch in batches:
+        yield ''.join(
+            json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+            for record in batch
+        )
@@ -3,6 +3,8 @@
 Padronização de dados de entrada
 """
 
+import unicodedata
+
 def format_text_field(value):
     """
     Padroniza campos de texto: uppercase e remove espaços extras
@@ -26,3 +28,11 @@ def format_medicine_name(name):
     formatted = re.sub(r'[^\w\s\-\.]', '', formatted)
     
     return formatted
+
+def remove_accents(value):
+    """Remove acentos para buscas: 'JOÃO' -> 'JOAO', 'ÁCIDO' -> 'ACIDO'"""
+    if not value:
+        return ""
+    
+    decomposed = unicodedata.normalize('NFKD', value)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
@@ -0,0 +1,96 @@
+"""
+Campos esparsos nas listagens e buscas: ?fields=id,nome
+Só as colunas dos campos pedidos são lidas do SQLite (load_only) e serializadas;
+sem fields a resposta continua sendo o to_dict() completo
+"""
+
+from collections import namedtuple
+
+from flask import request
+
+from database import db
+from models import Medicine, Patient, Prescription
+from utils.pagination import InvalidParameter
+
+# columns: atributos do modelo lidos do banco; value(obj, expand): valor na resposta
+# options(): opções de carga extras (relacionamentos) que o campo exige; função porque
+# os backrefs só existem depois que os mapeamentos são configurados
+Field = namedtuple('Field', ['columns', 'value', 'options'], defaults=[tuple])
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+class FieldSet:
+    """Campos da API de um modelo, no formato do to_dict() dele"""
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields
+
+    def parse(self):
+        """Campos pedidos em ?fields=, validados e na ordem pedida; None = todos"""
+        names = [name.strip() for name in request.args.get('fields', '').split(',') if name.strip()]
+        if not names:
+            return None
+        invalid = [name for name in names if name not in self.fields]
+        if invalid:
+            raise InvalidParameter(
+                f"fields inválido: {', '.join(invalid)} (use {', '.join(self.fields)})"
+            )
+        return tuple(dict.fromkeys(names))
+
+    def columns(self, names, *required):
+        """Colunas dos campos pedidos mais as exigidas pela consulta (ex.: ordenação)"""
+        columns = {column for name in names for column in self.fields[name].columns}
+        columns.update(column.key for column in required)
+        return [getattr(self.model, column) for column in sorted(columns)]
+
+    def load_options(self, names, *required):
+        """Opções da query: load_only das colunas e os relacionamentos dos campos"""
+        options = [db.load_only(*self.columns(names, *required))]
+        for name in names:
+            options.extend(self.fields[name].options())
+        return options
+
+    def serialize(self, obj, names, expand=()):
+        return {name: self.fields[name].value(obj, expand) for name in names}
+
+patient_fields = FieldSet(Patient, {
+    'id': Field(('public_id',), lambda patient, expand: patient.public_id),
+    'nome': Field(('nome',), lambda patient, expand: patient.nome),
+    'cpf': Field(('cpf',), lambda patient, expand: patient.cpf),
+    'dataNascimento': Field(('data_nascimento',), lambda patient, expand: _isoformat(patient.data_nascimento)),
+    'created_at': Field(('created_at',), lambda patient, expand: _isoformat(patient.created_at)),
+})
+
+# Também serve para CatalogEntry (mesmos nomes de atributo do modelo)
+medicine_fields = FieldSet(Medicine, {
+    'id': Field(('public_id',), lambda medicine, expand: medicine.public_id),
+    'nome': Field(('denominacao_generica',), lambda medicine, expand: medicine.denominacao_generica),
+    'dosagem': Field(('concentracao',), lambda medicine, expand: medicine.concentracao),
+    'apresentacao': Field(('apresentacao',), lambda medicine, expand: medicine.apresentacao),
+    'created_at': Field(('created_at',), lambda medicine, expand: _isoformat(medicine.created_at)),
+})
+
+prescription_fields = FieldSet(Prescription, {
+    'id': Field(('public_id',), lambda prescription, expand: prescription.public_id),
+    'pacienteId': Field(
+        ('patient_id',), lambda prescription, expand: prescription.patient.public_id,
+        lambda: (db.joinedload(Prescription.patient),)
+    ),
+    'paciente': Field(
+        ('patient_id',), lambda prescription, expand: prescription.patient.to_dict(),
+        lambda: (db.joinedload(Prescription.patient),)
+    ),
+    'data': Field(('data',), lambda prescription, expand: prescription.data.isoformat()),
+    'dataVencimento': Field(
+        ('data_vencimento',), lambda prescription, expand: _isoformat(prescription.data_vencimento)
+    ),
+    'medicamentos': Field(
+        ('medicamentos_json',),
+        lambda prescription, expand: prescription.get_medicamentos(expand='medicamentos' in expand),
+        lambda: (db.selectinload(Prescription.items),)
+    ),
+    'observacoes': Field(('observacoes',), lambda prescription, expand: prescription.observacoes or ''),
+    'created_at': Field(('created_at',), lambda prescription, expand: _isoformat(prescription.created_at)),
+})
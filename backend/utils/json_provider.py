@@ -0,0 +1,38 @@
+"""
+Codificação JSON das respostas da API (jsonify, success_response, error_response)
+Usa orjson quando instalado e cai para o json da biblioteca padrão sem ele
+"""
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Dependência opcional: sem ela o comportamento é o do Flask
+    orjson = None
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Provider do Flask com orjson: JSON compacto em UTF-8, chaves na ordem original"""
+
+    compact = True
+    sort_keys = False
+    ensure_ascii = False
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        # Bytes direto para o corpo, sem passar por str
+        body = orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS)
+        return self._app.response_class(body, mimetype=self.mimetype)
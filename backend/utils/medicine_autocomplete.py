@@ -0,0 +1,208 @@
+"""
+Índice em memória para o autocomplete de medicamentos
+Prefixo por palavra + trigramas (trecho no meio da palavra e erros de digitação),
+sem acentos, sobre nome, concentração e apresentação. Não consulta o banco:
+é alimentado pelo medicine_catalog e atualizado a cada alteração dele
+"""
+
+import bisect
+import re
+import threading
+from collections import OrderedDict, defaultdict
+
+from utils.data_format import remove_accents
+from utils.medicine_catalog import medicine_catalog
+
+# Pesos de relevância por tipo de correspondência
+SCORE_NAME_PREFIX = 4
+SCORE_PREFIX = 3
+SCORE_SUBSTRING = 2
+SCORE_FUZZY = 1
+
+# Similaridade mínima de trigramas para aceitar um termo com erro de digitação
+FUZZY_THRESHOLD = 0.5
+
+def normalize(value):
+    """Texto de busca: maiúsculo e sem acentos"""
+    return remove_accents(value or '').upper()
+
+def tokenize(value):
+    return re.findall(r'\w+', normalize(value))
+
+def trigrams(token, padded=True):
+    """Trigramas de uma palavra; com padding o início da palavra também conta"""
+    if padded:
+        token = f'  {token} '
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+class MedicineAutocomplete:
+    """Índice de prefixos e trigramas com LRU das consultas recentes"""
+
+    def __init__(self, catalog, cache_size=256):
+        self._catalog = catalog
+        self._cache_size = cache_size
+        self._lock = threading.RLock()
+        self._built = False
+        self._entries = {}                      # id -> CatalogEntry
+        self._entry_tokens = {}                 # id -> (tokens do nome, tokens dos demais campos)
+        self._token_ids = defaultdict(set)      # palavra -> ids
+        self._sorted_tokens = []                # palavras ordenadas (busca de prefixo)
+        self._trigram_ids = defaultdict(set)    # trigrama -> ids
+        self._results = OrderedDict()           # LRU: (consulta, limit) -> [CatalogEntry]
+        catalog.subscribe(self._on_catalog_change)
+
+    def _on_catalog_change(self, event, entry):
+        with self._lock:
+            self._results.clear()
+            if event == 'reload':
+                self._built = False
+            elif not self._built:
+                return
+            elif event == 'put':
+                self._remove(entry.id)
+                self._add(entry)
+            elif event == 'discard':
+                self._remove(entry.id)
+
+    def _add(self, entry):
+        name_tokens = tokenize(entry.denominacao_generica)
+        other_tokens = tokenize(f'{entry.concentracao} {entry.apresentacao}')
+        self._entries[entry.id] = entry
+        self._entry_tokens[entry.id] = (name_tokens, other_tokens)
+
+        for token in set(name_tokens + other_tokens):
+            if not self._token_ids[token]:
+                bisect.insort(self._sorted_tokens, token)
+            self._token_ids[token].add(entry.id)
+            for trigram in trigrams(token):
+                self._trigram_ids[trigram].add(entry.id)
+
+    def _remove(self, medicine_id):
+        if medicine_id not in self._entries:
+            return
+        name_tokens, other_tokens = self._entry_tokens.pop(medicine_id)
+        del self._entries[medicine_id]
+
+        for token in set(name_tokens + other_tokens):
+            ids = self._token_ids[token]
+            ids.discard(medicine_id)
+            if not ids:
+                del self._token_ids[token]
+                index = bisect.bisect_left(self._sorted_tokens, token)
+                del self._sorted_tokens[index]
+            for trigram in trigrams(token):
+                self._trigram_ids[trigram].discard(medicine_id)
+                if not self._trigram_ids[trigram]:
+                    del self._trigram_ids[trigram]
+
+    def _build(self):
+        entries = self._catalog.entries()
+        with self._lock:
+            self._entries.clear()
+            self._entry_tokens.clear()
+            self._token_ids.clear()
+            self._sorted_tokens = []
+            self._trigram_ids.clear()
+            for entry in entries:
+                self._add(entry)
+            self._built = True
+
+    def _prefix_ids(self, term):
+        found = set()
+        index = bisect.bisect_left(self._sorted_tokens, term)
+        while index < len(self._sorted_tokens) and self._sorted_tokens[index].startswith(term):
+            found |= self._token_ids[self._sorted_tokens[index]]
+            index += 1
+        return found
+
+    def _substring_ids(self, term):
+        # Candidatos que contêm todos os trigramas do termo, confirmados no texto
+        candidates = None
+        for trigram in trigrams(term, padded=False):
+            ids = self._trigram_ids.get(trigram, set())
+            candidates = set(ids) if candidates is None else candidates & ids
+            if not candidates:
+                return set()
+        return {
+            medicine_id for medicine_id in candidates
+            if any(term in token for tokens in self._entry_tokens[medicine_id] for token in tokens)
+        }
+
+    def _fuzzy_ids(self, term):
+        term_trigrams = trigrams(term)
+        counts = defaultdict(int)
+        for trigram in term_trigrams:
+            for medicine_id in self._trigram_ids.get(trigram, ()):
+                counts[medicine_id] += 1
+        return {
+            medicine_id for medicine_id, shared in counts.items()
+            if shared / len(term_trigrams) >= FUZZY_THRESHOLD
+        }
+
+    def _score_term(self, term):
+        """Retorna {id: pontuação} para um termo da consulta"""
+        scores = {}
+        for medicine_id in self._prefix_ids(term):
+            name_tokens, _ = self._entry_tokens[medicine_id]
+            if any(token.startswith(term) for token in name_tokens):
+                scores[medicine_id] = SCORE_NAME_PREFIX
+            else:
+                scores[medicine_id] = SCORE_PREFIX
+        if scores or len(term) < 3:
+            return scores
+
+        for medicine_id in self._substring_ids(term):
+            scores[medicine_id] = SCORE_SUBSTRING
+        if scores:
+            return scores
+
+        return {medicine_id: SCORE_FUZZY for medicine_id in self._fuzzy_ids(term)}
+
+    def search(self, query, limit=20):
+        """Retorna até limit CatalogEntry que casam com todos os termos da consulta"""
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        # Garante índice construído e catálogo dentro do TTL
+        self._catalog.entries()
+        key = (' '.join(terms), limit)
+
+        with self._lock:
+            if not self._built:
+                self._build()
+
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+                return cached
+
+            totals = None
+            for term in terms:
+                scores = self._score_term(term)
+                if totals is None:
+                    totals = scores
+                else:
+                    totals = {
+                        medicine_id: totals[medicine_id] + score
+                        for medicine_id, score in scores.items()
+                        if medicine_id in totals
+                    }
+                if not totals:
+                    break
+
+            ranked = sorted(
+                (self._entries[medicine_id] for medicine_id in totals or ()),
+                key=lambda entry: (
+                    -totals[entry.id], entry.denominacao_generica, entry.concentracao, entry.id
+                )
+            )
+            result = ranked[:limit]
+
+            self._results[key] = result
+            if len(self._results) > self._cache_size:
+                self._results.popitem(last=False)
+            return result
+
+# Instância única por processo, ligada ao catálogo
+medicine_autocomplete = MedicineAutocomplete(medicine_catalog)
@@ -0,0 +1,157 @@
+"""
+Cache em memória do catálogo de medicamentos
+O catálogo é pequeno e quase não muda: carregado inteiro em uma consulta,
+atualizado pelas rotas de medicamentos e pelo seed (write-through)
+"""
+
+import threading
+import time
+from collections import namedtuple
+
+from config import Config
+
+_CatalogEntryBase = namedtuple('CatalogEntry', [
+    'id', 'public_id', 'denominacao_generica', 'concentracao', 'apresentacao', 'created_at'
+])
+
+class CatalogEntry(_CatalogEntryBase):
+    """Cópia imutável de um Medicine, segura para compartilhar entre threads"""
+    __slots__ = ()
+
+    @classmethod
+    def from_model(cls, medicine):
+        return cls(
+            medicine.id,
+            medicine.public_id,
+            medicine.denominacao_generica,
+            medicine.concentracao,
+            medicine.apresentacao,
+            medicine.created_at
+        )
+
+    def to_dict(self):
+        return {
+            'id': self.public_id,
+            'nome': self.denominacao_generica,
+            'dosagem': self.concentracao,
+            'apresentacao': self.apresentacao,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class MedicineCatalog:
+    """Catálogo de medicamentos por public_id e por id interno"""
+
+    # Intervalo mínimo entre recargas disparadas por public_id desconhecido
+    MISS_RELOAD_INTERVAL = 1.0
+
+    def __init__(self, ttl=None):
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._maps = None  # ({public_id: entry}, {id: entry}) - trocado atomicamente
+        self._loaded_at = 0.0
+        self._listeners = []
+
+    @property
+    def ttl(self):
+        return Config.MEDICINE_CACHE_TTL if self._ttl is None else self._ttl
+
+    def _load(self):
+        """Carrega o catálogo inteiro em uma única consulta"""
+        from models import Medicine
+
+        entries = [CatalogEntry.from_model(medicine) for medicine in Medicine.query.all()]
+        maps = (
+            {entry.public_id: entry for entry in entries},
+            {entry.id: entry for entry in entries}
+        )
+        with self._lock:
+            self._maps = maps
+            self._loaded_at = time.monotonic()
+        self._notify('reload', None)
+        return maps
+
+    def subscribe(self, listener):
+        """Registra listener(evento, entry) para 'reload', 'put' e 'discard'"""
+        self._listeners.append(listener)
+
+    def _notify(self, event, entry):
+        for listener in self._listeners:
+            listener(event, entry)
+
+    def _current(self):
+        # TTL cobre alterações feitas por outros processos (seed, outros workers)
+        maps = self._maps
+        if maps is None or time.monotonic() - self._loaded_at > self.ttl:
+            maps = self._load()
+        return maps
+
+    def entries(self):
+        """Retorna todos os medicamentos do catálogo"""
+        by_public_id, _ = self._current()
+        return list(by_public_id.values())
+
+    def get(self, public_id):
+        """Retorna o CatalogEntry pelo public_id ou None"""
+        by_public_id, _ = self._current()
+        entry = by_public_id.get(public_id)
+        if entry is None and time.monotonic() - self._loaded_at > self.MISS_RELOAD_INTERVAL:
+            # Pode ter sido criado por outro processo desde a última carga
+            by_public_id, _ = self._load()
+            entry = by_public_id.get(public_id)
+        return entry
+
+    def get_by_id(self, medicine_id):
+        """Retorna o CatalogEntry pelo id interno ou None"""
+        _, by_id = self._current()
+        entry = by_id.get(medicine_id)
+        if entry is None and time.monotonic() - self._loaded_at > self.MISS_RELOAD_INTERVAL:
+            _, by_id = self._load()
+            entry = by_id.get(medicine_id)
+        return entry
+
+    def get_many(self, public_ids):
+        """Retorna {public_id: CatalogEntry} apenas para os ids encontrados"""
+        found = {}
+        for public_id in public_ids:
+            entry = self.get(public_id)
+            if entry is not None:
+                found[public_id] = entry
+        return found
+
+    def put(self, medicine):
+        """Atualiza (write-through) um medicamento recém criado ou alterado"""
+        entry = CatalogEntry.from_model(medicine)
+        with self._lock:
+            if self._maps is None:
+                return
+            by_public_id, by_id = dict(self._maps[0]), dict(self._maps[1])
+            old = by_id.get(entry.id)
+            if old is not None and old.public_id != entry.public_id:
+                by_public_id.pop(old.public_id, None)
+            by_public_id[entry.public_id] = entry
+            by_id[entry.id] = entry
+            self._maps = (by_public_id, by_id)
+        self._notify('put', entry)
+
+    def discard(self, public_id):
+        """Remove um medicamento excluído"""
+        with self._lock:
+            if self._maps is None:
+                return
+            by_public_id, by_id = dict(self._maps[0]), dict(self._maps[1])
+            entry = by_public_id.pop(public_id, None)
+            if entry is not None:
+                by_id.pop(entry.id, None)
+            self._maps = (by_public_id, by_id)
+        if entry is not None:
+            self._notify('discard', entry)
+
+    def invalidate(self):
+        """Descarta o catálogo; a próxima leitura recarrega do banco"""
+        with self._lock:
+            self._maps = None
+            self._loaded_at = 0.0
+        self._notify('reload', None)
+
+# Instância única por processo
+medicine_catalog = MedicineCatalog()
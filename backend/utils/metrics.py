@@ -0,0 +1,194 @@
+"""
+Métricas de desempenho em memória, expostas em /api/metrics no formato Prometheus
+Latência por endpoint (histograma), requisições por status, quantidade e tempo de
+SQL por endpoint e tempo de geração de PDF. Custo de poucos microssegundos por
+requisição: contadores em dicts sob um lock, sem dependências externas
+"""
+
+import bisect
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import Config
+
+# Consultas fora de uma requisição (migrações, manutenção, scripts)
+BACKGROUND_ENDPOINT = 'background'
+
+class Histogram:
+    """Contagem por faixa (não acumulada; acumulada só na exportação), soma e total"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Última posição: acima do maior limite
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Metrics:
+    """Registro de métricas do processo"""
+
+    def __init__(self, latency_buckets=None, pdf_buckets=None):
+        self._lock = threading.Lock()
+        self._latency_buckets = latency_buckets or Config.METRICS_LATENCY_BUCKETS
+        self._pdf_buckets = pdf_buckets or Config.METRICS_PDF_BUCKETS
+        self._latency = {}       # endpoint -> Histogram
+        self._requests = {}      # (endpoint, method, status) -> total
+        self._sql_count = {}     # endpoint -> comandos SQL
+        self._sql_seconds = {}   # endpoint -> segundos em SQL
+        self._pdf = Histogram(self._pdf_buckets)
+        self._pdf_pages = 0
+
+    def observe_request(self, endpoint, method, status, seconds, sql_count, sql_seconds):
+        with self._lock:
+            histogram = self._latency.get(endpoint)
+            if histogram is None:
+                histogram = self._latency[endpoint] = Histogram(self._latency_buckets)
+            histogram.observe(seconds)
+            key = (endpoint, method, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            self._sql_count[endpoint] = self._sql_count.get(endpoint, 0) + sql_count
+            self._sql_seconds[endpoint] = self._sql_seconds.get(endpoint, 0.0) + sql_seconds
+
+    def observe_sql(self, endpoint, seconds):
+        """SQL fora de requisição, contado direto no registro"""
+        with self._lock:
+            self._sql_count[endpoint] = self._sql_count.get(endpoint, 0) + 1
+            self._sql_seconds[endpoint] = self._sql_seconds.get(endpoint, 0.0) + seconds
+
+    def observe_pdf(self, seconds, pages):
+        with self._lock:
+            self._pdf.observe(seconds)
+            self._pdf_pages += pages
+
+    def render(self):
+        """Texto no formato de exposição do Prometheus (0.0.4)"""
+        lines = []
+        with self._lock:
+            lines += [
+                '# HELP sismed_http_request_duration_seconds Latência das requisições por endpoint',
+                '# TYPE sismed_http_request_duration_seconds histogram',
+            ]
+            for endpoint, histogram in sorted(self._latency.items()):
+                lines += _histogram_lines(
+                    'sismed_http_request_duration_seconds', histogram, f'endpoint="{endpoint}"'
+                )
+
+            lines += [
+                '# HELP sismed_http_requests_total Requisições por endpoint, método e status',
+                '# TYPE sismed_http_requests_total counter',
+            ]
+            for (endpoint, method, status), total in sorted(self._requests.items()):
+                lines.append(
+                    f'sismed_http_requests_total{{endpoint="{endpoint}",method="{method}",'
+                    f'status="{status}"}} {total}'
+                )
+
+            lines += [
+                '# HELP sismed_sql_statements_total Comandos SQL executados por endpoint',
+                '# TYPE sismed_sql_statements_total counter',
+            ]
+            for endpoint, total in sorted(self._sql_count.items()):
+                lines.append(f'sismed_sql_statements_total{{endpoint="{endpoint}"}} {total}')
+
+            lines += [
+                '# HELP sismed_sql_duration_seconds_total Tempo gasto em SQL por endpoint',
+                '# TYPE sismed_sql_duration_seconds_total counter',
+            ]
+            for endpoint, seconds in sorted(self._sql_seconds.items()):
+                lines.append(f'sismed_sql_duration_seconds_total{{endpoint="{endpoint}"}} {seconds:.6f}')
+
+            lines += [
+                '# HELP sismed_pdf_render_duration_seconds Tempo de geração dos PDFs (ReportLab)',
+                '# TYPE sismed_pdf_render_duration_seconds histogram',
+            ]
+            lines += _histogram_lines('sismed_pdf_render_duration_seconds', self._pdf)
+            lines += [
+                '# HELP sismed_pdf_pages_total Receitas (páginas) geradas em PDF',
+                '# TYPE sismed_pdf_pages_total counter',
+                f'sismed_pdf_pages_total {self._pdf_pages}',
+            ]
+        return '\n'.join(lines) + '\n'
+
+def _histogram_lines(name, histogram, labels=''):
+    prefix = f'{labels},' if labels else ''
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {histogram.count}')
+    suffix = f'{{{labels}}}' if labels else ''
+    lines.append(f'{name}_sum{suffix} {histogram.sum:.6f}')
+    lines.append(f'{name}_count{suffix} {histogram.count}')
+    return lines
+
+# Instância única por processo
+metrics = Metrics()
+
+def _before_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_sql_count = 0
+    g.metrics_sql_seconds = 0.0
+
+def _after_request(response):
+    started = g.get('metrics_started')
+    if started is None:
+        return response
+
+    request_g = g._get_current_object()
+    endpoint, method, status = request.endpoint or 'unmatched', request.method, response.status_code
+
+    def record():
+        metrics.observe_request(
+            endpoint, method, status, time.perf_counter() - started,
+            request_g.metrics_sql_count, request_g.metrics_sql_seconds,
+        )
+
+    if response.is_streamed:
+        # Exportações em fluxo: mede até o fim do envio, incluindo o SQL dos lotes
+        response.call_on_close(record)
+    else:
+        record()
+    return response
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_started', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info['metrics_query_started'].pop()
+    if has_request_context() and 'metrics_sql_count' in g:
+        g.metrics_sql_count += 1
+        g.metrics_sql_seconds += seconds
+    else:
+        metrics.observe_sql(BACKGROUND_ENDPOINT, seconds)
+
+def _handle_error(exception_context):
+    # Comando que falhou não passa pelo after_cursor_execute
+    if exception_context.connection is not None:
+        started = exception_context.connection.info.get('metrics_query_started')
+        if started:
+            started.pop()
+
+def init_metrics(app):
+    """
+    Liga os hooks de requisição e os eventos de SQL (chamada no create_app antes
+    dos demais after_request, para que a latência inclua a compressão)
+    """
+    if not Config.METRICS_ENABLED:
+        return
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
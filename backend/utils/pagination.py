@@ -0,0 +1,104 @@
+"""
+Paginação por cursor (keyset) para os endpoints de listagem
+O cursor é opaco para o frontend: base64 da última chave de ordenação enviada
+"""
+
+import base64
+import json
+from collections import namedtuple
+from datetime import date, datetime
+
+from flask import request
+from sqlalchemy import tuple_
+
+from config import Config
+
+# Resultado paginado - o api_response_wrapper inclui next_cursor no envelope
+Page = namedtuple('Page', ['items', 'next_cursor'])
+
+class InvalidParameter(ValueError):
+    """Parâmetro da query string inválido: o api_response_wrapper responde 400"""
+
+def encode_cursor(values):
+    """Codifica os valores da chave de ordenação em um cursor opaco"""
+    serializable = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    raw = json.dumps(serializable, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, columns):
+    """Decodifica um cursor de volta para os valores tipados das colunas"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise InvalidParameter("Cursor de paginação inválido")
+
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise InvalidParameter("Cursor de paginação inválido")
+
+    return [_decode_value(column, value) for column, value in zip(columns, values)]
+
+def _decode_value(column, value):
+    """Converte um valor do cursor para o tipo da coluna; qualquer divergência é cursor inválido"""
+    if value is None:
+        return None
+
+    python_type = column.type.python_type
+    try:
+        if python_type in (datetime, date):
+            if not isinstance(value, str):
+                raise TypeError(value)
+            return python_type.fromisoformat(value)
+        if python_type is int:
+            # bool é subclasse de int, mas nunca é uma chave válida
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise TypeError(value)
+            return value
+        if python_type is str:
+            if not isinstance(value, str):
+                raise TypeError(value)
+            return value
+    except (TypeError, ValueError):
+        raise InvalidParameter("Cursor de paginação inválido")
+
+    # Tipos de coluna não previstos: só valores escalares do JSON
+    if not isinstance(value, (str, int, float)):
+        raise InvalidParameter("Cursor de paginação inválido")
+    return value
+
+def get_page_args():
+    """Lê cursor e limit da query string aplicando os limites configurados"""
+    cursor = request.args.get('cursor') or None
+
+    limit = request.args.get('limit', Config.API_PAGE_SIZE)
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise InvalidParameter("Parâmetro limit inválido")
+
+    limit = max(1, min(limit, Config.API_MAX_PAGE_SIZE))
+    return cursor, limit
+
+def paginate_keyset(query, columns, cursor=None, limit=None, descending=False):
+    """
+    Aplica paginação keyset em uma query ordenada por columns
+    A última coluna deve ser única (ex: id) para desempatar a ordenação
+    """
+    if limit is None:
+        limit = Config.API_PAGE_SIZE
+
+    if cursor:
+        key = tuple_(*columns)
+        values = tuple_(*decode_cursor(cursor, columns))
+        query = query.filter(key < values if descending else key > values)
+
+    order = [column.desc() for column in columns] if descending else list(columns)
+    rows = query.order_by(*order).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in columns])
+
+    return Page(rows, next_cursor)
@@ -0,0 +1,193 @@
+"""
+Importação em massa de pacientes (CSV ou NDJSON)
+Lê o arquivo em fluxo, padroniza como o cadastro individual e insere em lotes
+com executemany, uma transação curta por lote
+"""
+
+import csv
+import io
+import itertools
+import json
+from datetime import date, datetime
+
+from sqlalchemy.exc import IntegrityError
+
+from config import Config
+from database import db
+from models import Patient
+from utils.data_format import format_text_field
+from utils.security import generate_public_id, validate_cpf, format_cpf, normalize_cpf
+from utils.table_versions import table_versions
+
+def detect_format(filename=None, content_type=None, default='csv'):
+    """Formato pelo nome do arquivo ou content-type: 'csv' ou 'ndjson'"""
+    name = (filename or '').lower()
+    kind = (content_type or '').lower()
+    if name.endswith(('.ndjson', '.jsonl')) or 'ndjson' in kind or 'jsonl' in kind:
+        return 'ndjson'
+    if name.endswith('.csv') or 'csv' in kind:
+        return 'csv'
+    return default
+
+def iter_records(binary_stream, file_format):
+    """Gera (número da linha, dict) sem carregar o arquivo inteiro em memória"""
+    text = io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
+
+    if file_format == 'ndjson':
+        for line_number, line in enumerate(text, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield line_number, None
+                continue
+            yield line_number, record if isinstance(record, dict) else None
+    else:
+        # CSV exportado do Excel em pt-BR costuma usar ';'
+        header = text.readline()
+        delimiter = ';' if header.count(';') > header.count(',') else ','
+        reader = csv.DictReader(itertools.chain([header], text), delimiter=delimiter)
+        for record in reader:
+            # Linha 1 é o cabeçalho
+            yield reader.line_num, record
+
+def _field(record, *names):
+    """Primeiro campo preenchido entre os nomes aceitos, como texto"""
+    for name in names:
+        value = record.get(name)
+        if value not in (None, ''):
+            return str(value).strip()
+    return ''
+
+def normalize_patient_record(record):
+    """
+    Aplica as mesmas regras do create_patient
+    Retorna (linha para inserir, None) ou (None, mensagem de erro)
+    """
+    if record is None:
+        return None, "Linha inválida"
+
+    nome = format_text_field(_field(record, 'nome'))
+    if not nome:
+        return None, "Nome é obrigatório"
+
+    cpf = _field(record, 'cpf')
+    if cpf and not validate_cpf(cpf):
+        return None, "CPF inválido"
+
+    data_nascimento = None
+    raw_date = _field(record, 'dataNascimento', 'data_nascimento')
+    if raw_date:
+        try:
+            # Mesmo formato do cadastro (AAAA-MM-DD), sem o custo do strptime por linha
+            if len(raw_date) != 10:
+                raise ValueError(raw_date)
+            data_nascimento = date.fromisoformat(raw_date)
+        except ValueError:
+            return None, "Data de nascimento inválida"
+
+    return {
+        'public_id': generate_public_id(),
+        'nome': nome,
+        'cpf': format_text_field(format_cpf(cpf)) if cpf else None,
+        'cpf_digits': normalize_cpf(cpf),
+        'data_nascimento': data_nascimento,
+        'created_at': datetime.utcnow(),
+    }, None
+
+def _existing_cpfs(digits):
+    """CPFs (só dígitos) da lista que já estão cadastrados"""
+    found = set()
+    digits = list(digits)
+    # Lotes abaixo do limite de variáveis por comando das versões antigas do SQLite (999)
+    for start in range(0, len(digits), 500):
+        found.update(db.session.execute(
+            db.select(Patient.cpf_digits).where(Patient.cpf_digits.in_(digits[start:start + 500]))
+        ).scalars())
+    return found
+
+def _insert_row_by_row(insert, numbered_rows, add_error):
+    """Insere cada linha em um savepoint; CPF duplicado vira erro da linha. Retorna as inseridas"""
+    inserted = []
+    for line_number, row in numbered_rows:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert, row)
+        except IntegrityError:
+            if not row['cpf_digits']:
+                raise
+            add_error(line_number, "CPF já cadastrado")
+        else:
+            inserted.append(row)
+    return inserted
+
+def import_patients(records, chunk_size=None, max_errors=None):
+    """
+    Insere pacientes de um iterável de (linha, dict) em lotes
+    CPF já cadastrado ou repetido no arquivo vira erro da linha (uma consulta por lote)
+    Retorna o resumo com total, inseridos e erros por linha
+    """
+    chunk_size = chunk_size or Config.IMPORT_CHUNK_SIZE
+    max_errors = Config.IMPORT_MAX_ERRORS if max_errors is None else max_errors
+    insert = Patient.__table__.insert()
+
+    summary = {'total': 0, 'inserted': 0, 'errorCount': 0, 'errors': []}
+    chunk = []  # (linha, registro)
+    seen_cpfs = {}  # cpf_digits -> linha em que apareceu no arquivo
+
+    def add_error(line_number, error):
+        summary['errorCount'] += 1
+        if len(summary['errors']) < max_errors:
+            summary['errors'].append({'linha': line_number, 'erro': error})
+
+    def flush():
+        if not chunk:
+            return
+        try:
+            existing = _existing_cpfs(row['cpf_digits'] for _, row in chunk if row['cpf_digits'])
+            pending = []
+            for line_number, row in chunk:
+                if row['cpf_digits'] in existing:
+                    add_error(line_number, "CPF já cadastrado")
+                else:
+                    pending.append((line_number, row))
+            if pending:
+                rows = [row for _, row in pending]
+                try:
+                    db.session.execute(insert, rows)
+                except IntegrityError:
+                    # CPF cadastrado por outra conexão depois da consulta: o lote volta
+                    # e é inserido linha a linha, só as repetidas viram erro
+                    db.session.rollback()
+                    rows = _insert_row_by_row(insert, pending, add_error)
+                if rows:
+                    table_versions.bump(db.session, Patient.__tablename__)  # Insert Core não dispara eventos do ORM
+                db.session.commit()
+                summary['inserted'] += len(rows)
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            chunk.clear()
+
+    for line_number, record in records:
+        summary['total'] += 1
+        row, error = normalize_patient_record(record)
+        if error:
+            add_error(line_number, error)
+            continue
+
+        digits = row['cpf_digits']
+        if digits:
+            if digits in seen_cpfs:
+                add_error(line_number, f"CPF repetido no arquivo (linha {seen_cpfs[digits]})")
+                continue
+            seen_cpfs[digits] = line_number
+
+        chunk.append((line_number, row))
+        if len(chunk) >= chunk_size:
+            flush()
+
+    flush()
+    return summary
@@ -0,0 +1,113 @@
+"""
+Busca de pacientes por nome (índice FTS5) ou CPF (índice em patients.cpf)
+O índice patients_fts é mantido por triggers e ignora acentos: JOAO encontra JOÃO
+"""
+
+import re
+
+from database import db
+from models import Patient
+from utils.data_format import remove_accents
+
+# DDL do índice de busca - criado/atualizado em migrations.ensure_patient_search_index
+PATIENT_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS patients_fts USING fts5(
+        nome,
+        content='patients',
+        content_rowid='id',
+        tokenize="unicode61 remove_diacritics 2",
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS patients_fts_ai AFTER INSERT ON patients BEGIN
+        INSERT INTO patients_fts(rowid, nome) VALUES (new.id, new.nome);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS patients_fts_ad AFTER DELETE ON patients BEGIN
+        INSERT INTO patients_fts(patients_fts, rowid, nome) VALUES ('delete', old.id, old.nome);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS patients_fts_au AFTER UPDATE OF nome ON patients BEGIN
+        INSERT INTO patients_fts(patients_fts, rowid, nome) VALUES ('delete', old.id, old.nome);
+        INSERT INTO patients_fts(rowid, nome) VALUES (new.id, new.nome);
+    END
+    """,
+]
+
+# Consultas só com dígitos e pontuação de CPF vão direto ao índice de CPF
+_CPF_QUERY = re.compile(r'^[\d.\-\s]+$')
+
+def format_cpf_prefix(digits):
+    """Aplica a máscara de CPF a um prefixo de dígitos: '1234' -> '123.4'"""
+    parts = [digits[:3], digits[3:6], digits[6:9]]
+    formatted = '.'.join(part for part in parts if part)
+    if len(digits) > 9:
+        formatted += '-' + digits[9:11]
+    return formatted
+
+def build_match_query(query):
+    """Converte o texto digitado em uma consulta FTS5 por prefixo: 'jo sil' -> '"JO"* "SIL"*'"""
+    terms = re.findall(r'\w+', remove_accents(query).upper())
+    return ' '.join(f'"{term}"*' for term in terms)
+
+def _patient_query(columns):
+    """Patient.query lendo só as colunas informadas (None = todas)"""
+    query = Patient.query
+    return query.options(db.load_only(*columns)) if columns else query
+
+def search_by_cpf(query, limit, columns=None):
+    """Busca por CPF completo (igualdade) ou parcial (faixa) usando o índice de cpf"""
+    digits = re.sub(r'[^0-9]', '', query)[:11]
+    prefix = format_cpf_prefix(digits)
+
+    if len(digits) == 11:
+        condition = Patient.cpf == prefix
+    else:
+        # Faixa [prefixo, prefixo + maior caractere) usa o índice, ao contrário de LIKE
+        condition = db.and_(Patient.cpf >= prefix, Patient.cpf < prefix + '\uffff')
+
+    return _patient_query(columns).filter(condition).order_by(Patient.cpf).limit(limit).all()
+
+def search_by_name(query, limit, columns=None):
+    """Busca por nome no índice FTS5, ordenada por relevância (bm25)"""
+    match = build_match_query(query)
+    if not match:
+        return []
+
+    # Só as colunas pedidas; as demais ficam sem carregar na instância
+    if columns:
+        keys = dict.fromkeys(['id', *(column.key for column in columns)])
+        selected = ', '.join(f'patients.{key}' for key in keys)
+    else:
+        selected = 'patients.*'
+    statement = db.text(
+        f"SELECT {selected} FROM patients_fts "
+        "JOIN patients ON patients.id = patients_fts.rowid "
+        "WHERE patients_fts MATCH :match "
+        "ORDER BY patients_fts.rank, patients.nome LIMIT :limit"
+    )
+    return db.session.query(Patient).from_statement(statement).params(
+        match=match, limit=limit
+    ).all()
+
+def search_by_name_like(query, limit, columns=None):
+    """Fallback sem FTS5: LIKE '%x%' (varre a tabela)"""
+    return _patient_query(columns).filter(
+        Patient.nome.contains(query.upper())
+    ).order_by(Patient.nome).limit(limit).all()
+
+def search_patients(query, limit, fts_enabled=True, columns=None):
+    """
+    Busca pacientes por CPF (se a consulta parecer CPF) ou por nome
+    columns: colunas de Patient a ler (fields=); None = todas
+    """
+    if _CPF_QUERY.match(query) and re.search(r'\d', query):
+        return search_by_cpf(query, limit, columns)
+
+    if fts_enabled:
+        return search_by_name(query, limit, columns)
+    return search_by_name_like(query, limit, columns)
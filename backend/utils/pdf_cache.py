@@ -0,0 +1,108 @@
+"""
+Cache em disco dos PDFs gerados, endereçado pelo conteúdo
+A chave é o hash dos dados impressos (receita, paciente, medicamentos) e da
+versão do template: reimprimir uma receita inalterada não executa o ReportLab
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from config import Config
+
+def pdf_cache_key(data_list, template_fingerprint):
+    """Hash SHA-256 dos dados de uma ou mais receitas + impressão digital do template"""
+    canonical = json.dumps(
+        [template_fingerprint, data_list], sort_keys=True, default=str, separators=(',', ':')
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+class PdfCache:
+    """LRU em disco: arquivos <chave>.pdf, mtime como último acesso, limite de bytes"""
+
+    def __init__(self, directory=None, max_bytes=None):
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = None  # Bytes em disco, calculado na primeira escrita
+
+    @property
+    def directory(self):
+        return self._directory or Config.PDF_TEMP_DIR
+
+    @property
+    def max_bytes(self):
+        return Config.PDF_CACHE_MAX_BYTES if self._max_bytes is None else self._max_bytes
+
+    def path_for(self, key):
+        return os.path.join(self.directory, f'{key}.pdf')
+
+    def exists(self, key):
+        return os.path.exists(self.path_for(key))
+
+    def open(self, key):
+        """Abre o PDF em cache para leitura (e marca o acesso) ou retorna None"""
+        path = self.path_for(key)
+        try:
+            cached = open(path, 'rb')
+        except OSError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return cached
+
+    def put(self, key, pdf_bytes):
+        """Grava o PDF de forma atômica e aplica o limite de tamanho"""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                tmp_file.write(pdf_bytes)
+            os.replace(tmp_path, self.path_for(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan()[1]
+            else:
+                self._size += len(pdf_bytes)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _scan(self):
+        """Lista (mtime, tamanho, caminho) dos PDFs em cache e o total em bytes"""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith('.pdf'):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries, sum(size for _, size, _ in entries)
+
+    def _evict(self):
+        """Remove os PDFs acessados há mais tempo até ficar em 90% do limite"""
+        entries, total = self._scan()
+        target = self.max_bytes * 0.9
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                # Arquivo em uso (Windows) ou removido por outro processo
+                continue
+        self._size = total
+
+# Instância única por processo
+pdf_cache = PdfCache()
@@ -1,199 +1,358 @@
-
 """
 Gerador de PDF para receitas médicas
 Layout oficial da Prefeitura de Perobal - Nova versão v9.0
+
+As partes fixas do topo (logo e cabeçalho) ficam em um template montado uma vez
+por processo e desenhado como form XObject na primeira página de cada receita;
+paciente, medicamentos, assinatura e rodapé seguem o fluxo do conteúdo
 """
 
+from reportlab.lib.enums import TA_CENTER
 from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
 from reportlab.lib.units import cm
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import (
+    BaseDocTemplate, Frame, NextPageTemplate, PageBreak, PageTemplate, Paragraph, Spacer, Table, TableStyle
+)
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-from reportlab.pdfgen import canvas
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
+import atexit
+import hashlib
+import multiprocessing
 import os
-from models import Medicine
+import threading
+import time
 from config import Config
+from utils.metrics import metrics
 
-def generate_prescription_pdf(prescription):
-    """
-    Gera PDF da receita médica seguindo o novo modelo oficial v9.0
-    """
-    buffer = BytesIO()
-    
-    # Configurar documento
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        rightMargin=2*cm,
-        leftMargin=2*cm,
-        topMargin=1.5*cm,
-        bottomMargin=2*cm
-    )
-    
-    # Estilos
-    styles = getSampleStyleSheet()
-    
-    # Estilo personalizado para cabeçalho principal
-    header_main_style = ParagraphStyle(
-        'HeaderMain',
-        parent=styles['Normal'],
-        fontSize=16,
-        fontName='Helvetica-Bold',
-        alignment=TA_CENTER,
-        spaceAfter=8
-    )
-    
-    # Estilo para subtítulo do cabeçalho
-    header_sub_style = ParagraphStyle(
-        'HeaderSub',
-        parent=styles['Normal'],
-        fontSize=14,
-        fontName='Helvetica-Bold',
-        alignment=TA_CENTER,
-        spaceAfter=6
-    )
-    
-    # Estilo para título da receita
-    title_style = ParagraphStyle(
-        'Title',
-        parent=styles['Normal'],
-        fontSize=20,
-        fontName='Helvetica-Bold',
-        alignment=TA_CENTER,
-        spaceAfter=20
-    )
-    
-    # Estilo para dados do paciente
-    patient_style = ParagraphStyle(
-        'PatientStyle',
-        parent=styles['Normal'],
-        fontSize=12,
-        fontName='Helvetica',
-        spaceAfter=6
-    )
-    
-    # Estilo para medicamentos
-    medicine_style = ParagraphStyle(
-        'MedicineStyle',
-        parent=styles['Normal'],
-        fontSize=11,
-        fontName='Helvetica',
-        leftIndent=20,
-        spaceAfter=12
-    )
-    
-    # Conteúdo do PDF
-    story = []
-    
-    # NOVO CABEÇALHO OFICIAL v9.0
-    # Logo da Prefeitura (centralizada)
-    logo_path = os.path.join(os.path.dirname(__file__), '..', 'static', 'logo_perobal_oficial.png')
-    if os.path.exists(logo_path):
+# Alterar sempre que o layout mudar (invalida PDFs já gerados em cache)
+TEMPLATE_VERSION = '9.2'
+
+LOGO_PATH = os.path.join(os.path.dirname(__file__), '..', 'static', 'logo_perobal_oficial.png')
+
+PAGE_WIDTH, PAGE_HEIGHT = A4
+LEFT_MARGIN = RIGHT_MARGIN = 2*cm
+TOP_MARGIN = 1.5*cm
+BOTTOM_MARGIN = 2*cm
+FRAME_PADDING = 6  # Padding padrão do Frame do platypus
+LOGO_SIZE = 4*cm
+
+FOOTER_TEXT = "Rua Jaracatiá, 1060 - Telefax (044)3625-1225 - CEP. 87538-000 - PEROBAL - PARANÁ"
+
+class PrescriptionPdfTemplate:
+    """Estilos, logo decodificada e geometria do cabeçalho da receita"""
+
+    HEADER_FORM_NAME = 'sismed_cabecalho'
+
+    def __init__(self, logo_path=LOGO_PATH):
+        # Estilos
+        styles = getSampleStyleSheet()
+
+        # Estilo para dados do paciente
+        self.patient_style = ParagraphStyle(
+            'PatientStyle',
+            parent=styles['Normal'],
+            fontSize=12,
+            fontName='Helvetica',
+            spaceAfter=6
+        )
+
+        # Estilo para medicamentos
+        self.medicine_style = ParagraphStyle(
+            'MedicineStyle',
+            parent=styles['Normal'],
+            fontSize=11,
+            fontName='Helvetica',
+            leftIndent=20,
+            spaceAfter=12
+        )
+
+        # Estilo do rodapé oficial
+        self.footer_style = ParagraphStyle(
+            'Footer',
+            parent=styles['Normal'],
+            fontSize=8,
+            fontName='Helvetica',
+            alignment=TA_CENTER
+        )
+
+        self.patient_table_style = TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),  # Primeira coluna em negrito
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 0),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+            ('TOPPADDING', (0, 0), (-1, -1), 3),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+        ])
+
+        self.signature_table_style = TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('ALIGN', (0, 0), (0, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 0),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+            ('TOPPADDING', (0, 0), (-1, -1), 5),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
+        ])
+
+        self.logo, logo_digest = self._load_logo(logo_path)
+
+        # Identifica layout + logo nas chaves do cache de PDFs
+        self.fingerprint = f'{TEMPLATE_VERSION}:{logo_digest}'
+
+        # Cabeçalho: mesmos parágrafos do fluxo original, desenhados no form
+        styles_normal = styles['Normal']
+        self.header_styles = [
+            (ParagraphStyle('HeaderMain', parent=styles_normal, fontSize=16, fontName='Helvetica-Bold',
+                            alignment=TA_CENTER, spaceAfter=8), "PREFEITURA DE PEROBAL", 0),
+            (ParagraphStyle('HeaderSub', parent=styles_normal, fontSize=14, fontName='Helvetica-Bold',
+                            alignment=TA_CENTER, spaceAfter=6), "SECRETARIA MUNICIPAL DE SAÚDE", 0.5*cm),
+            (ParagraphStyle('Title', parent=styles_normal, fontSize=20, fontName='Helvetica-Bold',
+                            alignment=TA_CENTER, spaceAfter=20), "RECEITA MÉDICA", 1*cm),
+        ]
+
+        content_width = PAGE_WIDTH - LEFT_MARGIN - RIGHT_MARGIN
+        self.page_frame_args = dict(
+            x1=LEFT_MARGIN, y1=BOTTOM_MARGIN, width=content_width,
+            height=PAGE_HEIGHT - TOP_MARGIN - BOTTOM_MARGIN
+        )
+        header_top = PAGE_HEIGHT - TOP_MARGIN - FRAME_PADDING
+        self.logo_y = header_top - LOGO_SIZE
+        header_height = sum(
+            flowable.wrap(content_width - 2*FRAME_PADDING, PAGE_HEIGHT)[1] + flowable.getSpaceAfter()
+            for flowable in self._header_flowables()
+        )
+        # Conteúdo começa onde o cabeçalho terminava no fluxo original
+        self.content_top = header_top - header_height + FRAME_PADDING
+
+        # Primeira página da receita: conteúdo abaixo do cabeçalho
+        self.first_frame_args = dict(self.page_frame_args, height=self.content_top - BOTTOM_MARGIN, id='conteudo')
+        # Páginas seguintes de uma receita longa: sem cabeçalho, como no fluxo original
+        self.next_frame_args = dict(self.page_frame_args, id='continuacao')
+
+    @classmethod
+    def _load_logo(cls, logo_path):
+        """
+        Lê e decodifica a logo uma única vez
+        Retorna (ImageReader, hash do arquivo); sem logo válida o PDF sai sem imagem
+        """
+        if not os.path.exists(logo_path):
+            return None, None
         try:
-            logo = Image(logo_path, width=4*cm, height=4*cm)
-            logo.hAlign = 'CENTER'
-            story.append(logo)
-            story.append(Spacer(1, 0.3*cm))
-        except:
+            with open(logo_path, 'rb') as logo_file:
+                logo_bytes = logo_file.read()
+            logo = ImageReader(BytesIO(logo_bytes))
+            logo.getRGBData()  # Decodifica agora: o template é compartilhado entre threads
+            return logo, hashlib.sha256(logo_bytes).hexdigest()[:16]
+        except Exception:
             print("Aviso: Logo não encontrada, continuando sem imagem")
-    
-    # Cabeçalho texto conforme nova especificação
-    story.append(Paragraph("PREFEITURA DE PEROBAL", header_main_style))
-    story.append(Paragraph("SECRETARIA MUNICIPAL DE SAÚDE", header_sub_style))
-    story.append(Spacer(1, 0.5*cm))
-    
-    # Título principal
-    story.append(Paragraph("RECEITA MÉDICA", title_style))
-    story.append(Spacer(1, 1*cm))
-    
-    # Dados do paciente em tabela
-    patient_data = [
-        ['Paciente:', prescription.patient.nome],
-        ['CPF:', prescription.patient.cpf or 'NÃO INFORMADO'],
-        ['Data Nascimento:', prescription.patient.data_nascimento.strftime('%d/%m/%Y') if prescription.patient.data_nascimento else 'NÃO INFORMADO'],
-        ['Data:', prescription.data.strftime('%d/%m/%Y')],
-    ]
-    
-    patient_table = Table(patient_data, colWidths=[3*cm, 12*cm])
-    patient_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),  # Primeira coluna em negrito
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 0),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-        ('TOPPADDING', (0, 0), (-1, -1), 3),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-    ]))
-    
-    story.append(patient_table)
-    story.append(Spacer(1, 1*cm))
-    
-    # Medicamentos prescritos
-    story.append(Paragraph("<b>MEDICAMENTOS PRESCRITOS:</b>", patient_style))
-    story.append(Spacer(1, 0.5*cm))
-    
-    # Lista numerada de medicamentos
-    medicamentos = prescription.get_medicamentos()
-    for i, med_data in enumerate(medicamentos, 1):
-        # Buscar dados do medicamento por public_id
-        medicine = Medicine.query.filter_by(public_id=med_data['medicamentoId']).first()
-        
-        if medicine:
-            medicine_text = f"{i}. <b>{medicine.denominacao_generica} - {medicine.concentracao} ({medicine.apresentacao})</b>"
-            story.append(Paragraph(medicine_text, medicine_style))
-            
+            return None, None
+
+    def _header_flowables(self):
+        """Parágrafos do cabeçalho (novos a cada uso: o wrap altera o flowable)"""
+        flowables = []
+        if self.logo is not None:
+            flowables.append(Spacer(1, LOGO_SIZE + 0.3*cm))  # Lugar da logo
+        for style, text, space in self.header_styles:
+            flowables.append(Paragraph(text, style))
+            if space:
+                flowables.append(Spacer(1, space))
+        return flowables
+
+    def _draw_header(self, canv):
+        """Desenha logo e cabeçalho nas posições que ocupavam no fluxo original"""
+        if self.logo is not None:
+            canv.drawImage(
+                self.logo, (PAGE_WIDTH - LOGO_SIZE) / 2, self.logo_y,
+                width=LOGO_SIZE, height=LOGO_SIZE, mask='auto'
+            )
+        Frame(**self.page_frame_args).addFromList(self._header_flowables(), canv)
+
+    def on_first_page(self, canv, doc):
+        """Callback da primeira página de cada receita: cabeçalho gravado uma vez por documento"""
+        if not canv.hasForm(self.HEADER_FORM_NAME):
+            canv.beginForm(self.HEADER_FORM_NAME)
+            self._draw_header(canv)
+            canv.endForm()
+        canv.doForm(self.HEADER_FORM_NAME)
+
+    def build_document(self, buffer):
+        """Documento A4: página com cabeçalho para cada receita, continuação sem cabeçalho"""
+        doc = BaseDocTemplate(
+            buffer,
+            pagesize=A4,
+            rightMargin=RIGHT_MARGIN,
+            leftMargin=LEFT_MARGIN,
+            topMargin=TOP_MARGIN,
+            bottomMargin=BOTTOM_MARGIN
+        )
+        doc.addPageTemplates([
+            PageTemplate(
+                id='receita', frames=[Frame(**self.first_frame_args)],
+                onPage=self.on_first_page, autoNextPageTemplate='continuacao'
+            ),
+            PageTemplate(id='continuacao', frames=[Frame(**self.next_frame_args)]),
+        ])
+        return doc
+
+    def build_story(self, data):
+        """Partes variáveis da receita: paciente, medicamentos e observações"""
+        story = []
+
+        # Dados do paciente em tabela
+        patient_data = [
+            ['Paciente:', data['paciente_nome']],
+            ['CPF:', data['paciente_cpf'] or 'NÃO INFORMADO'],
+            ['Data Nascimento:', data['paciente_nascimento'].strftime('%d/%m/%Y') if data['paciente_nascimento'] else 'NÃO INFORMADO'],
+            ['Data:', data['data'].strftime('%d/%m/%Y')],
+        ]
+
+        patient_table = Table(patient_data, colWidths=[3*cm, 12*cm])
+        patient_table.setStyle(self.patient_table_style)
+
+        story.append(patient_table)
+        story.append(Spacer(1, 1*cm))
+
+        # Medicamentos prescritos
+        story.append(Paragraph("<b>MEDICAMENTOS PRESCRITOS:</b>", self.patient_style))
+        story.append(Spacer(1, 0.5*cm))
+
+        # Lista numerada de medicamentos
+        for i, (nome, concentracao, apresentacao, posologia) in enumerate(data['medicamentos'], 1):
+            medicine_text = f"{i}. <b>{nome} - {concentracao} ({apresentacao})</b>"
+            story.append(Paragraph(medicine_text, self.medicine_style))
+
             # Posologia apenas se não estiver vazia
-            if med_data.get('posologia') and med_data['posologia'].strip():
-                posology_text = f"   {med_data['posologia']}"
-                story.append(Paragraph(posology_text, medicine_style))
-            
+            if posologia and posologia.strip():
+                posology_text = f"   {posologia}"
+                story.append(Paragraph(posology_text, self.medicine_style))
+
             story.append(Spacer(1, 0.3*cm))
-    
-    # Observações apenas se houver
-    if prescription.observacoes and prescription.observacoes.strip():
-        story.append(Spacer(1, 0.5*cm))
-        story.append(Paragraph("<b>OBSERVAÇÕES:</b>", patient_style))
-        story.append(Paragraph(prescription.observacoes, patient_style))
-    
-    # Espaço para assinatura
-    story.append(Spacer(1, 2*cm))
-    
-    signature_data = [
-        ['', ''],
-        ['_' * 40, ''],
-        ['Assinatura do Profissional', ''],
-    ]
-    
-    signature_table = Table(signature_data, colWidths=[8*cm, 7*cm])
-    signature_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('ALIGN', (0, 0), (0, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 0),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-        ('TOPPADDING', (0, 0), (-1, -1), 5),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
-    ]))
-    
-    story.append(signature_table)
-    
-    # Rodapé oficial
-    story.append(Spacer(1, 1*cm))
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=8,
-        fontName='Helvetica',
-        alignment=TA_CENTER
-    )
-    story.append(Paragraph("Rua Jaracatiá, 1060 - Telefax (044)3625-1225 - CEP. 87538-000 - PEROBAL - PARANÁ", footer_style))
-    
-    # Construir PDF
-    doc.build(story)
-    
+
+        # Observações apenas se houver
+        if data['observacoes'] and data['observacoes'].strip():
+            story.append(Spacer(1, 0.5*cm))
+            story.append(Paragraph("<b>OBSERVAÇÕES:</b>", self.patient_style))
+            story.append(Paragraph(data['observacoes'], self.patient_style))
+
+        # Espaço para assinatura, logo após o conteúdo
+        story.append(Spacer(1, 2*cm))
+        signature_table = Table(
+            [['', ''], ['_' * 40, ''], ['Assinatura do Profissional', '']],
+            colWidths=[8*cm, 7*cm]
+        )
+        signature_table.setStyle(self.signature_table_style)
+        story.append(signature_table)
+
+        # Rodapé oficial
+        story.append(Spacer(1, 1*cm))
+        story.append(Paragraph(FOOTER_TEXT, self.footer_style))
+
+        return story
+
+    def render(self, data_list):
+        """Renderiza uma ou mais receitas (uma por página) em um único PDF"""
+        buffer = BytesIO()
+        story = []
+        for data in data_list:
+            if story:
+                # Cada receita começa em uma nova página com cabeçalho
+                story.append(NextPageTemplate('receita'))
+                story.append(PageBreak())
+            story.extend(self.build_story(data))
+
+        self.build_document(buffer).build(story)
+        return buffer.getvalue()
+
+_template = None
+_template_lock = threading.Lock()
+
+def get_pdf_template():
+    """Template único por processo, criado no primeiro uso"""
+    global _template
+    if _template is None:
+        with _template_lock:
+            if _template is None:
+                _template = PrescriptionPdfTemplate()
+    return _template
+
+def prescription_pdf_data(prescription):
+    """
+    Dados da receita usados no PDF, em tipos simples (serializáveis entre processos)
+    Deve ser chamado com a sessão aberta; o PDF em si não consulta o banco
+    """
+    patient = prescription.patient
+    return {
+        'paciente_nome': patient.nome,
+        'paciente_cpf': patient.cpf,
+        'paciente_nascimento': patient.data_nascimento,
+        'data': prescription.data,
+        'medicamentos': [
+            (medicine.denominacao_generica, medicine.concentracao, medicine.apresentacao, posologia)
+            for medicine, posologia in prescription.get_medicamentos_detalhados()
+        ],
+        'observacoes': prescription.observacoes,
+    }
+
+def _render_in_worker(data_list):
+    """Executado nos processos do pool: cada processo monta seu próprio template"""
+    return get_pdf_template().render(data_list)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn: mesmo comportamento no Windows e sem herdar conexões/threads do Flask
+                _pool = ProcessPoolExecutor(
+                    max_workers=Config.PDF_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+    return _pool
+
+def render_prescriptions_pdf(data_list, offload=False):
+    """
+    Gera um único PDF com várias receitas, na ordem recebida
+    Lotes grandes são divididos entre processos e as partes unidas com pypdf;
+    offload=True manda também os lotes pequenos para o pool (fila de PDFs)
+    """
+    started = time.perf_counter()
+    pdf_bytes = _render_batch(data_list, offload)
+    metrics.observe_pdf(time.perf_counter() - started, len(data_list))
+    return pdf_bytes
+
+def _render_batch(data_list, offload=False):
+    workers = Config.PDF_WORKERS
+    if workers <= 1 or len(data_list) < Config.PDF_PARALLEL_MIN_BATCH:
+        if offload:
+            return _get_pool().submit(_render_in_worker, data_list).result()
+        return get_pdf_template().render(data_list)
+
+    from pypdf import PdfWriter
+
+    chunk_size = -(-len(data_list) // workers)  # Divisão arredondando para cima
+    chunks = [data_list[i:i + chunk_size] for i in range(0, len(data_list), chunk_size)]
+    parts = _get_pool().map(_render_in_worker, chunks)
+
+    writer = PdfWriter()
+    for part in parts:
+        writer.append(BytesIO(part))
+    output = BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+def generate_prescription_pdf(prescription):
+    """
+    Gera PDF da receita médica seguindo o novo modelo oficial v9.0
+    """
+    buffer = BytesIO(render_prescriptions_pdf([prescription_pdf_data(prescription)]))
     buffer.seek(0)
     return buffer
@@ -0,0 +1,163 @@
+"""
+Fila assíncrona de geração de PDFs
+A requisição só reúne os dados e enfileira; threads da fila entregam o ReportLab
+ao pool de processos e gravam o resultado no cache em disco. O id do job é a
+chave do cache: pedidos idênticos em andamento compartilham o mesmo job e PDFs já
+gerados ficam prontos na hora. Fila limitada: cheia, o pedido é recusado
+"""
+
+import queue
+import threading
+import time
+from datetime import datetime
+from io import BytesIO
+
+from config import Config
+from utils.pdf_cache import pdf_cache, pdf_cache_key
+from utils.pdf_generator import get_pdf_template, render_prescriptions_pdf
+
+PENDING = 'pendente'
+RUNNING = 'gerando'
+DONE = 'concluido'
+FAILED = 'erro'
+
+class PdfQueueFull(Exception):
+    """Fila de PDFs no limite (Config.PDF_JOB_QUEUE_MAX)"""
+
+class PdfJob:
+    """Um PDF pedido à fila (uma ou várias receitas)"""
+
+    __slots__ = ('id', 'data_list', 'prescription_count', 'download_name', 'status', 'error',
+                 'created_at', 'finished_at', 'pdf_bytes')
+
+    def __init__(self, job_id, data_list, download_name):
+        self.id = job_id
+        self.data_list = data_list
+        self.prescription_count = len(data_list)
+        self.download_name = download_name
+        self.status = PENDING
+        self.error = None
+        self.created_at = datetime.now()
+        self.finished_at = None
+        self.pdf_bytes = None  # Só quando o cache em disco falhou
+
+    @property
+    def in_flight(self):
+        return self.status in (PENDING, RUNNING)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'receitas': self.prescription_count,
+            'arquivo': self.download_name,
+            'erro': self.error,
+            'criadoEm': self.created_at.isoformat(),
+            'concluidoEm': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+class PdfJobQueue:
+    """Jobs por id, fila limitada e threads de geração (iniciadas no primeiro pedido)"""
+
+    def __init__(self, workers=None, max_queued=None):
+        self._workers = workers
+        self._max_queued = max_queued
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._queue = None
+        self._threads = []
+
+    @property
+    def workers(self):
+        return self._workers or Config.PDF_JOB_WORKERS
+
+    @property
+    def max_queued(self):
+        return self._max_queued or Config.PDF_JOB_QUEUE_MAX
+
+    def submit(self, data_list, download_name):
+        """
+        Retorna (job, criado): criado=False quando um job idêntico já existia
+        Levanta PdfQueueFull se a fila estiver cheia
+        """
+        job_id = pdf_cache_key(data_list, get_pdf_template().fingerprint)
+
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(job_id)
+            if job is not None and (job.in_flight or self._available(job)):
+                return job, False
+
+            job = PdfJob(job_id, data_list, download_name)
+            if pdf_cache.exists(job_id):
+                # Mesmo conteúdo já impresso antes: nada a gerar
+                self._finish(job, DONE)
+            else:
+                self._start()
+                try:
+                    self._queue.put_nowait(job)
+                except queue.Full:
+                    raise PdfQueueFull(
+                        f"Fila de PDFs cheia ({self.max_queued}); tente novamente em instantes"
+                    )
+            self._jobs[job_id] = job
+            return job, True
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def open_result(self, job):
+        """Arquivo (ou buffer) do PDF concluído, ou None se saiu do cache"""
+        if job.pdf_bytes is not None:
+            return BytesIO(job.pdf_bytes)
+        return pdf_cache.open(job.id)
+
+    def _available(self, job):
+        return job.status == DONE and (job.pdf_bytes is not None or pdf_cache.exists(job.id))
+
+    def _start(self):
+        if self._queue is not None:
+            return
+        self._queue = queue.Queue(maxsize=self.max_queued)
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'sismed-pdf-{number}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            job.status = RUNNING
+            try:
+                # offload: o ReportLab roda no pool de processos, fora do GIL da API
+                pdf_bytes = render_prescriptions_pdf(job.data_list, offload=True)
+                try:
+                    pdf_cache.put(job.id, pdf_bytes)
+                except OSError as e:
+                    print(f"⚠️  Cache de PDF indisponível: {e}")
+                    job.pdf_bytes = pdf_bytes
+                self._finish(job, DONE)
+            except Exception as e:
+                self._finish(job, FAILED, f"Erro ao gerar PDF: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def _finish(self, job, status, error=None):
+        job.error = error
+        job.finished_at = datetime.now()
+        job.data_list = None  # Libera a memória
+        job.status = status
+
+    def _prune(self):
+        """Esquece jobs finalizados há mais de PDF_JOB_TTL segundos"""
+        limit = time.time() - Config.PDF_JOB_TTL
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at.timestamp() < limit
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+# Instância única por processo
+pdf_jobs = PdfJobQueue()
@@ -0,0 +1,158 @@
+"""
+Campanhas de receitas: o mesmo esquema de medicamentos para muitos pacientes
+em várias datas (renovações do programa de saúde mental)
+Pacientes validados em poucas consultas por conjunto, medicamentos pelo catálogo
+em memória; receitas e itens inseridos com executemany em uma única transação
+"""
+
+from datetime import date, datetime
+
+from config import Config
+from database import db
+from models import Patient, Prescription, PrescriptionItem
+from utils.data_format import format_text_field
+from utils.medicine_catalog import medicine_catalog
+from utils.security import generate_public_id
+from utils.table_versions import table_versions
+
+# Abaixo do limite de variáveis por comando das versões antigas do SQLite (999)
+LOOKUP_CHUNK_SIZE = 500
+
+def _parse_dates(datas):
+    """Aceita ["2025-01-10", ...] ou o formato da tela [{"date": ..., "enabled": true}]"""
+    dates = []
+    for value in datas:
+        if isinstance(value, dict):
+            if not value.get('enabled', False):
+                continue
+            value = value.get('date')
+        try:
+            dates.append(date.fromisoformat(value))
+        except (TypeError, ValueError):
+            raise ValueError(f"Data inválida: {value}")
+    return sorted(set(dates))
+
+def _resolve_patients(public_ids):
+    """{public_id: id interno} dos pacientes encontrados"""
+    found = {}
+    for start in range(0, len(public_ids), LOOKUP_CHUNK_SIZE):
+        chunk = public_ids[start:start + LOOKUP_CHUNK_SIZE]
+        found.update(db.session.execute(
+            db.select(Patient.public_id, Patient.id).where(Patient.public_id.in_(chunk))
+        ).all())
+    return found
+
+def plan_campaign(data):
+    """
+    Valida o pedido {"pacientes": [...], "medicamentos": [...], "datas": [...], "observacoes"}
+    Retorna (plano, None) ou (None, (mensagem, status))
+    """
+    if not isinstance(data, dict):
+        return None, ("Corpo da requisição deve ser um objeto JSON", 400)
+
+    patients = data.get('pacientes') or []
+    if not isinstance(patients, list) or not all(isinstance(value, str) for value in patients):
+        return None, ("pacientes deve ser uma lista de ids de paciente", 400)
+    patient_ids = list(dict.fromkeys(patients))  # Sem repetidos, na ordem
+    if not patient_ids:
+        return None, ("Lista de pacientes é obrigatória", 400)
+
+    medicamentos = data.get('medicamentos') or []
+    if not isinstance(medicamentos, list):
+        return None, ("medicamentos deve ser uma lista", 400)
+    if not medicamentos:
+        return None, ("Lista de medicamentos é obrigatória", 400)
+    for med in medicamentos:
+        if not isinstance(med, dict) or not isinstance(med.get('medicamentoId'), str):
+            return None, ("Cada medicamento deve ser um objeto com medicamentoId", 400)
+        if not isinstance(med.get('posologia') or '', str):
+            return None, ("posologia deve ser texto", 400)
+
+    datas = data.get('datas') or []
+    if not isinstance(datas, list):
+        return None, ("datas deve ser uma lista", 400)
+    if not isinstance(data.get('observacoes') or '', str):
+        return None, ("observacoes deve ser texto", 400)
+
+    try:
+        dates = _parse_dates(datas)
+    except ValueError as e:
+        return None, (str(e), 400)
+    if not dates:
+        return None, ("Nenhuma data foi selecionada", 400)
+
+    total = len(patient_ids) * len(dates)
+    if total > Config.CAMPAIGN_MAX_PRESCRIPTIONS:
+        return None, (f"Máximo de {Config.CAMPAIGN_MAX_PRESCRIPTIONS} receitas por campanha ({total} pedidas)", 400)
+
+    # Medicamentos: catálogo em memória, sem consulta
+    items = []
+    for position, med in enumerate(medicamentos):
+        medicine = medicine_catalog.get(med.get('medicamentoId'))
+        if medicine is None:
+            return None, (f"Medicamento {med.get('medicamentoId')} não encontrado", 404)
+        posologia = (med.get('posologia') or '').strip().upper()
+        items.append((medicine.id, posologia, position))
+
+    patients = _resolve_patients(patient_ids)
+    missing = [public_id for public_id in patient_ids if public_id not in patients]
+    if missing:
+        shown = ', '.join(missing[:10]) + (f" e mais {len(missing) - 10}" if len(missing) > 10 else '')
+        return None, (f"Pacientes não encontrados: {shown}", 404)
+
+    observacoes = format_text_field(data.get('observacoes') or '') or None
+    return {
+        'patient_ids': [patients[public_id] for public_id in patient_ids],
+        'dates': dates,
+        'items': items,
+        'observacoes': observacoes,
+    }, None
+
+def create_campaign(plan):
+    """Insere todas as receitas e itens do plano em uma transação; retorna o resumo"""
+    # Mesmo created_at para a campanha inteira: uma consulta pelo índice traz os ids gerados
+    created_at = datetime.utcnow()
+    prescription_rows = [
+        {
+            'public_id': generate_public_id(),
+            'patient_id': patient_id,
+            'data': prescription_date,
+            'data_vencimento': None,
+            'medicamentos_json': '',
+            'observacoes': plan['observacoes'],
+            'created_at': created_at,
+        }
+        for patient_id in plan['patient_ids']
+        for prescription_date in plan['dates']
+    ]
+
+    try:
+        db.session.execute(Prescription.__table__.insert(), prescription_rows)
+        ids = dict(db.session.execute(
+            db.select(Prescription.public_id, Prescription.id).where(Prescription.created_at == created_at)
+        ).all())
+
+        item_rows = []
+        for row in prescription_rows:
+            prescription_id = ids[row['public_id']]
+            for medicine_id, posologia, position in plan['items']:
+                item_rows.append({
+                    'prescription_id': prescription_id,
+                    'medicine_id': medicine_id,
+                    'posologia': posologia,
+                    'position': position,
+                })
+        db.session.execute(PrescriptionItem.__table__.insert(), item_rows)
+        table_versions.bump(db.session, Prescription.__tablename__)  # Insert Core não dispara eventos do ORM
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {
+        'receitas': len(prescription_rows),
+        'itens': len(item_rows),
+        'pacientes': len(plan['patient_ids']),
+        'datas': [prescription_date.isoformat() for prescription_date in plan['dates']],
+        'criadoEm': created_at.isoformat(),
+    }
@@ -0,0 +1,198 @@
+"""
+Retenção de receitas: remove as receitas (e itens) com data anterior ao corte,
+ou as move para os arquivos anuais (utils/archive) quando arquivar=True
+Trabalha em lotes por faixa de id, cada um em uma transação curta seguida de uma
+pausa, para que a API continue gravando durante a limpeza. O progresso fica em
+um arquivo de estado: uma execução interrompida continua de onde parou
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import delete, func, select
+
+from config import Config
+from database import db
+from models import Prescription, PrescriptionItem
+from utils.archive import archive_batch
+from utils.table_versions import table_versions
+
+def retention_cutoff(days=None, archive=False):
+    """
+    Receitas com data anterior a este dia saem do banco
+    Para arquivar, o corte recua ao início do ano: só anos encerrados vão para os arquivos
+    """
+    days = Config.PRESCRIPTION_RETENTION_DAYS if days is None else days
+    cutoff = date.today() - timedelta(days=days)
+    return date(cutoff.year, 1, 1) if archive else cutoff
+
+def _expired(cutoff, after_id=0):
+    return (Prescription.data < cutoff) & (Prescription.id > after_id)
+
+def preview_purge(cutoff):
+    """Simulação: quantas receitas e itens seriam removidos"""
+    prescriptions, first_id, last_id = db.session.execute(
+        select(func.count(), func.min(Prescription.id), func.max(Prescription.id))
+        .where(_expired(cutoff))
+    ).one()
+    items = db.session.execute(
+        select(func.count()).select_from(PrescriptionItem).where(
+            PrescriptionItem.prescription_id.in_(select(Prescription.id).where(_expired(cutoff)))
+        )
+    ).scalar()
+    return {
+        'corte': cutoff.isoformat(),
+        'receitas': prescriptions,
+        'itens': items,
+        'primeiroId': first_id,
+        'ultimoId': last_id,
+    }
+
+def _load_state(state_path):
+    try:
+        with open(state_path, encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # Estado de outro banco não vale para este
+    return state if state.get('banco') == str(db.engine.url) else None
+
+def _save_state(state_path, state):
+    tmp_path = f'{state_path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
+
+def _clear_state(state_path):
+    if os.path.exists(state_path):
+        os.remove(state_path)
+
+def purge_prescriptions(cutoff=None, batch_size=None, pause=None, state_path=None,
+                        progress=None, log=print, archive=False):
+    """
+    Remove (ou arquiva, com archive=True) as receitas anteriores ao corte em lotes de batch_size ids
+    Retoma a execução interrompida registrada em state_path (o corte e o modo dela prevalecem)
+    progress (dict opcional) é atualizado a cada lote para acompanhamento
+    """
+    batch_size = batch_size or Config.RETENTION_BATCH_SIZE
+    pause = Config.RETENTION_BATCH_PAUSE if pause is None else pause
+    state_path = state_path or Config.RETENTION_STATE_FILE
+
+    state = _load_state(state_path)
+    resumed = state is not None
+    if resumed:
+        log(f"♻️  Retomando limpeza interrompida (corte {state['corte']}, após o id {state['ultimoId']})")
+    else:
+        cutoff = cutoff or retention_cutoff(archive=archive)
+        state = {'banco': str(db.engine.url), 'corte': cutoff.isoformat(), 'arquivar': archive,
+                 'ultimoId': 0, 'receitas': 0, 'itens': 0}
+    cutoff = date.fromisoformat(state['corte'])
+    archive = state.get('arquivar', False)
+
+    progress = progress if progress is not None else {}
+    started = time.perf_counter()
+    deleted_before = state['receitas']
+
+    while True:
+        # Leitura fora da transação de escrita: define a faixa do lote
+        ids = db.session.execute(
+            select(Prescription.id).where(_expired(cutoff, state['ultimoId']))
+            .order_by(Prescription.id).limit(batch_size)
+        ).scalars().all()
+        db.session.rollback()  # Encerra a leitura antes de gravar
+        if not ids:
+            break
+
+        low, high = ids[0], ids[-1]
+        if archive:
+            archive_batch(low, high, cutoff)
+        batch = select(Prescription.id).where(
+            Prescription.id.between(low, high), Prescription.data < cutoff
+        )
+        with db.engine.begin() as conn:
+            items = conn.execute(
+                delete(PrescriptionItem).where(PrescriptionItem.prescription_id.in_(batch))
+            ).rowcount
+            prescriptions = conn.execute(
+                delete(Prescription).where(
+                    Prescription.id.between(low, high), Prescription.data < cutoff
+                )
+            ).rowcount
+            table_versions.bump(conn, Prescription.__tablename__)  # Delete Core não dispara eventos do ORM
+
+        state['ultimoId'] = high
+        state['receitas'] += prescriptions
+        state['itens'] += items
+        _save_state(state_path, state)
+        progress.update((key, value) for key, value in state.items() if key != 'banco')
+
+        # Pausa entre lotes: outras conexões conseguem o lock de escrita
+        if pause:
+            time.sleep(pause)
+
+    _clear_state(state_path)
+    seconds = time.perf_counter() - started
+    deleted_now = state['receitas'] - deleted_before
+    summary = {
+        'corte': state['corte'],
+        'receitas': state['receitas'],
+        'itens': state['itens'],
+        'arquivadas': archive,
+        'retomada': resumed,
+        'segundos': round(seconds, 3),
+        'receitasPorSegundo': round(deleted_now / seconds, 1) if seconds else None,
+    }
+    progress.update(summary)
+    return summary
+
+class RetentionRunner:
+    """Execução da retenção em segundo plano a partir da API (uma por vez)"""
+
+    def __init__(self, app):
+        self.app = app
+        self._lock = threading.Lock()
+        self._thread = None
+        self.progress = {}
+        self.started_at = None
+        self.finished_at = None
+        self.last_error = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, cutoff, archive=False):
+        """False se já houver uma limpeza em andamento"""
+        with self._lock:
+            if self.running:
+                return False
+            self.progress = {'corte': cutoff.isoformat()}
+            self.started_at, self.finished_at, self.last_error = datetime.now(), None, None
+            self._thread = threading.Thread(
+                target=self._run, args=(cutoff, archive), name='sismed-retention', daemon=True
+            )
+            self._thread.start()
+            return True
+
+    def _run(self, cutoff, archive):
+        with self.app.app_context():
+            try:
+                purge_prescriptions(
+                    cutoff, progress=self.progress, log=self.app.logger.info, archive=archive
+                )
+            except Exception as e:
+                self.last_error = str(e)
+            finally:
+                self.finished_at = datetime.now()
+
+    def status(self):
+        return {
+            'emAndamento': self.running,
+            'progresso': dict(self.progress),
+            'inicio': self.started_at.isoformat() if self.started_at else None,
+            'fim': self.finished_at.isoformat() if self.finished_at else None,
+            'erro': self.last_error,
+        }
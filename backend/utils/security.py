@@ -21,6 +21,14 @@ def validate_cpf(cpf):
     # Verifica se tem 11 dígitos
     return len(cpf_clean) == 11
 
+def normalize_cpf(cpf):
+    """CPF só com dígitos (chave de patients.cpf_digits) ou None se não tiver 11 dígitos"""
+    if not cpf:
+        return None
+    
+    cpf_clean = re.sub(r'[^0-9]', '', cpf)
+    return cpf_clean if len(cpf_clean) == 11 else None
+
 def format_cpf(cpf):
     """Formata CPF com pontos e traço"""
     if not cpf:
@@ -0,0 +1,192 @@
+"""
+Profiler de SQL por requisição e detector de N+1 (modo de desenvolvimento)
+Registra cada comando executado, agrupa pelo formato normalizado (sem valores,
+listas IN colapsadas) e aponta como N+1 os formatos repetidos, com o ponto do
+código que os disparou. Ativado por Config.SQL_PROFILER_ENABLED; em testes,
+query_budget() falha quando um trecho excede o número de consultas permitido
+"""
+
+import contextvars
+import os
+import re
+import sys
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from flask import current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import Config
+
+QueryRecord = namedtuple('QueryRecord', ['statement', 'shape', 'seconds', 'call_site'])
+
+# Perfis ativos no contexto atual (requisição e/ou query_budget aninhados)
+_active_profiles = contextvars.ContextVar('sismed_sql_profiles', default=())
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Frames de bibliotecas e deste módulo não contam como ponto de chamada
+_IGNORED_PATHS = (os.path.abspath(__file__), os.path.join(BACKEND_DIR, 'benchmarks'))
+
+class QueryBudgetExceeded(AssertionError):
+    """Trecho executou mais consultas que o orçamento"""
+
+def normalize_statement(statement):
+    """Formato do comando: literais viram ? e IN (?, ?, ...) vira IN (?...)"""
+    shape = _STRING_LITERAL.sub('?', statement)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = _IN_LIST.sub('(?...)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+def find_call_site():
+    """Primeiro frame do código do SisMed (fora de bibliotecas) que levou à consulta"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if (filename.startswith(BACKEND_DIR) and not filename.startswith(_IGNORED_PATHS)
+                and 'site-packages' not in filename):
+            relative = os.path.relpath(filename, BACKEND_DIR)
+            return f'{relative}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return '?'
+
+class SqlProfile:
+    """Comandos de uma requisição (ou de um bloco query_budget)"""
+
+    def __init__(self, n_plus_one_threshold=None):
+        self.threshold = n_plus_one_threshold or Config.SQL_PROFILER_N1_THRESHOLD
+        self.records = []
+
+    @property
+    def count(self):
+        return len(self.records)
+
+    @property
+    def seconds(self):
+        return sum(record.seconds for record in self.records)
+
+    def groups(self):
+        """[(formato, quantidade, segundos, pontos de chamada)] do mais repetido ao menos"""
+        grouped = {}
+        for record in self.records:
+            group = grouped.setdefault(record.shape, [0, 0.0, {}])
+            group[0] += 1
+            group[1] += record.seconds
+            group[2][record.call_site] = group[2].get(record.call_site, 0) + 1
+        return sorted(
+            ((shape, count, seconds, call_sites) for shape, (count, seconds, call_sites) in grouped.items()),
+            key=lambda group: (-group[1], -group[2])
+        )
+
+    def n_plus_one(self):
+        """Formatos repetidos a partir do limite: o padrão típico de N+1"""
+        return [group for group in self.groups() if group[1] >= self.threshold]
+
+    def header_value(self):
+        suspects = self.n_plus_one()
+        value = f'queries={self.count}; time={self.seconds * 1000:.1f}ms; n+1={len(suspects)}'
+        if suspects:
+            _, count, _, call_sites = suspects[0]
+            top_site = max(call_sites, key=call_sites.get)
+            value += f'; worst={count}x@{top_site}'
+        return value
+
+    def report(self, limit=10):
+        """Texto com os formatos mais repetidos e seus pontos de chamada"""
+        lines = [f'{self.count} consultas em {self.seconds * 1000:.1f} ms']
+        for shape, count, seconds, call_sites in self.groups()[:limit]:
+            flag = ' [N+1]' if count >= self.threshold else ''
+            lines.append(f'  {count}x {seconds * 1000:.1f} ms{flag}: {shape[:160]}')
+            for site, site_count in sorted(call_sites.items(), key=lambda item: -item[1])[:3]:
+                lines.append(f'      {site_count}x {site}')
+        return '\n'.join(lines)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active_profiles.get():
+        conn.info.setdefault('profiler_query_started', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profiles = _active_profiles.get()
+    started = conn.info.get('profiler_query_started')
+    if not profiles or not started:
+        return
+    record = QueryRecord(
+        statement, normalize_statement(statement), time.perf_counter() - started.pop(), find_call_site()
+    )
+    for profile in profiles:
+        profile.records.append(record)
+
+def _handle_error(exception_context):
+    if exception_context.connection is not None:
+        started = exception_context.connection.info.get('profiler_query_started')
+        if started:
+            started.pop()
+
+def _listen():
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+
+def _push(profile):
+    return _active_profiles.set(_active_profiles.get() + (profile,))
+
+@contextmanager
+def query_budget(max_queries):
+    """
+    Para testes: falha com QueryBudgetExceeded se o bloco executar mais de max_queries
+    Ex.: with query_budget(3): client.get('/api/prescriptions?limit=100')
+    """
+    _listen()
+    profile = SqlProfile()
+    token = _push(profile)
+    try:
+        yield profile
+    finally:
+        _active_profiles.reset(token)
+
+    if profile.count > max_queries:
+        raise QueryBudgetExceeded(
+            f'{profile.count} consultas para um orçamento de {max_queries}\n{profile.report()}'
+        )
+
+def _before_request():
+    profile = SqlProfile()
+    g.sql_profile = profile
+    g.sql_profile_token = _push(profile)
+
+def _after_request(response):
+    profile = g.get('sql_profile')
+    if profile is None:
+        return response
+
+    response.headers['X-SQL-Profile'] = profile.header_value()
+    suspects = profile.n_plus_one()
+    message = f'SQL {request.method} {request.path}: {profile.header_value()}'
+    if suspects:
+        current_app.logger.warning(f'{message}\n{profile.report()}')
+    else:
+        current_app.logger.info(message)
+    return response
+
+def _teardown_request(exception=None):
+    # Sempre desativa o perfil, mesmo se a requisição falhou antes do after_request
+    token = g.pop('sql_profile_token', None)
+    if token is not None:
+        _active_profiles.reset(token)
+
+def init_sql_profiler(app):
+    """Liga o profiler às requisições (chamada no create_app; só com SQL_PROFILER_ENABLED)"""
+    if not Config.SQL_PROFILER_ENABLED:
+        return
+    _listen()
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
@@ -0,0 +1,81 @@
+"""
+Contadores de versão por tabela para ETags das leituras da API
+Os contadores ficam no próprio banco (tabela table_versions) e avançam na mesma
+transação que altera os dados: gravações de outros processos (importar_pacientes.py,
+limpar_receitas.py, seed.py) também mudam a ETag do servidor, e um rollback desfaz
+o avanço. Alterações pelo ORM são marcadas pelos eventos dos modelos e gravadas
+no flush; gravações fora do ORM (Core em lote) chamam bump() na própria conexão
+"""
+
+import uuid
+
+from sqlalchemy import Column, Integer, String, Table, bindparam, event, select, text
+from sqlalchemy.orm import Session, object_session
+
+from database import db
+
+table_versions_table = Table(
+    'table_versions', db.metadata,
+    Column('tabela', String(50), primary_key=True),
+    Column('versao', Integer, nullable=False, default=0),
+)
+
+# INSERT OR IGNORE + UPDATE em vez de UPSERT: funciona em SQLite anterior ao 3.24
+_INSERT_MISSING = text("INSERT OR IGNORE INTO table_versions (tabela, versao) VALUES (:tabela, 0)")
+_INCREMENT = text("UPDATE table_versions SET versao = versao + 1 WHERE tabela = :tabela")
+
+class TableVersions:
+    """Versão de cada tabela, lida e gravada no banco (a mesma para todos os processos)"""
+
+    def __init__(self):
+        # Reiniciar o servidor invalida as ETags (ex.: banco restaurado de um backup)
+        self._boot_id = uuid.uuid4().hex[:8]
+
+        event.listen(Session, 'after_flush', self._on_flush)
+        event.listen(Session, 'after_rollback', self._on_rollback)
+
+    def bump(self, connection, *tables):
+        """Avança as tabelas na transação de connection (Connection ou Session)"""
+        params = [{'tabela': table} for table in tables]
+        if params:
+            connection.execute(_INSERT_MISSING, params)
+            connection.execute(_INCREMENT, params)
+
+    def versions(self, tables):
+        """{tabela: versão} lidas do banco; tabela nunca alterada = 0"""
+        found = dict(db.session.execute(
+            select(table_versions_table.c.tabela, table_versions_table.c.versao)
+            .where(table_versions_table.c.tabela.in_(bindparam('tabelas', expanding=True))),
+            {'tabelas': list(tables)}
+        ).all())
+        return {table: found.get(table, 0) for table in tables}
+
+    def version(self, table):
+        return self.versions([table])[table]
+
+    def etag(self, tables):
+        """ETag forte para uma resposta que depende das tabelas informadas"""
+        versions = self.versions(tables)
+        return f"{self._boot_id}-{'.'.join(str(versions[table]) for table in tables)}"
+
+    def watch(self, *models):
+        """Registra os eventos de alteração dos modelos"""
+        for model in models:
+            for name in ('after_insert', 'after_update', 'after_delete'):
+                event.listen(model, name, self._on_change)
+
+    def _on_change(self, mapper, connection, target):
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault('changed_tables', set()).add(mapper.local_table.name)
+
+    def _on_flush(self, session, flush_context):
+        changed = session.info.pop('changed_tables', None)
+        if changed:
+            self.bump(session.connection(), *sorted(changed))
+
+    def _on_rollback(self, session):
+        session.info.pop('changed_tables', None)
+
+# Instância única por processo
+table_versions = TableVersions()
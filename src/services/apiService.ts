@@ -34,11 +34,28 @@ const apiRequest = async (endpoint: string, options: RequestInit = {}): Promise<
   }
 };
 
+// Listagens paginadas por cursor: segue next_cursor até a última página
+const PAGE_SIZE = 500;
+
+const apiRequestAll = async (endpoint: string): Promise<any[]> => {
+  const separator = endpoint.includes('?') ? '&' : '?';
+  const items: any[] = [];
+  let cursor: string | null = null;
+
+  do {
+    const cursorParam: string = cursor ? `&cursor=${encodeURIComponent(cursor)}` : '';
+    const response = await apiRequest(`${endpoint}${separator}limit=${PAGE_SIZE}${cursorParam}`);
+    items.push(...(response.data || []));
+    cursor = response.next_cursor || null;
+  } while (cursor);
+
+  return items;
+};
+
 // ==================== PACIENTES ====================
 export const patientsApi = {
   getAll: async (): Promise<Patient[]> => {
-    const response = await apiRequest('/patients');
-    return response.data || [];
+    return apiRequestAll('/patients');
   },
 
   getById: async (id: string): Promise<Patient | null> => {
@@ -71,16 +88,14 @@ export const patientsApi = {
   },
 
   search: async (query: string): Promise<Patient[]> => {
-    const response = await apiRequest(`/patients?search=${encodeURIComponent(query)}`);
-    return response.data || [];
+    return apiRequestAll(`/patients?search=${encodeURIComponent(query)}`);
   },
 };
 
 // ==================== MEDICAMENTOS ====================
 export const medicinesApi = {
   getAll: async (): Promise<Medicine[]> => {
-    const response = await apiRequest('/medicines');
-    return response.data || [];
+    return apiRequestAll('/medicines');
   },
 
   getById: async (id: string): Promise<Medicine | null> => {
@@ -113,8 +128,7 @@ export const medicinesApi = {
   },
 
   search: async (query: string): Promise<Medicine[]> => {
-    const response = await apiRequest(`/medicines?search=${encodeURIComponent(query)}`);
-    return response.data || [];
+    return apiRequestAll(`/medicines?search=${encodeURIComponent(query)}`);
   },
 };
 
@@ -122,8 +136,7 @@ export const medicinesApi = {
 export const prescriptionsApi = {
   getAll: async (patientId?: string): Promise<Prescription[]> => {
     const queryParam = patientId ? `?patient_id=${patientId}` : '';
-    const response = await apiRequest(`/prescriptions${queryParam}`);
-    return response.data || [];
+    return apiRequestAll(`/prescriptions${queryParam}`);
   },
 
   getById: async (id: string): Promise<Prescription | null> => {